@@ -0,0 +1,31 @@
+"""
+Stand-in for rest_gateway used by view_proxy.py: /api/v1/small and /api/v1/large
+return fixed JSON (FAKE_GATEWAY_ROWS rows in the large one), and /connections
+reports how many client connections have been seen. Run it under gunicorn
+with one worker so keep-alive connections are counted in one place.
+"""
+import os
+
+from flask import Flask, jsonify, request
+
+FAKE_GATEWAY_ROWS = int(os.getenv('FAKE_GATEWAY_ROWS', '50000'))
+
+app = Flask(__name__)
+connections = set()
+
+SMALL = {'status': 'success', 'message': 'ok', 'courses': [{'course_id': 'CS101', 'name': 'Intro'}]}
+LARGE = {'status': 'success', 'message': 'ok', 'rows': [{'i': i, 'name': f'row {i}'} for i in range(FAKE_GATEWAY_ROWS)]}
+
+
+@app.route('/api/v1/<path:endpoint>')
+def payload(endpoint):
+    connections.add((request.environ.get('REMOTE_ADDR'), request.environ.get('REMOTE_PORT')))
+    return jsonify(LARGE if endpoint == 'large' else SMALL)
+
+
+@app.route('/connections', methods=['GET', 'DELETE'])
+def connection_count():
+    count = len(connections)
+    if request.method == 'DELETE':
+        connections.clear()
+    return jsonify({'connections': count})
@@ -0,0 +1,129 @@
+"""
+Gateway view functions: the ROUTES table vs the hand-written handlers it replaced.
+
+Loads the previous rest_gateway.py from git (--baseline, default c330c6a^, the
+commit before the route table) next to the current one, answers every gRPC
+call from canned responses, and times each view function inside a request
+context (min of --rounds interleaved rounds) with 1 and --items items:
+
+    python benchmarks/gateway_handlers.py --items 1000 --rounds 25
+
+Also times turning the 1000-item grades response into a dict with the compiled
+serializer vs MessageToDict. Run from a git checkout; no services needed.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = os.path.join(ROOT, 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+# Every call must reach the (canned) services
+os.environ.update(COURSES_CACHE_TTL='0', GRADES_CACHE_TTL='0')
+
+from google.protobuf.json_format import MessageToDict
+
+import course_pb2
+import enrollment_pb2
+import faculty_grades_pb2
+import gateway_routes
+import grades_pb2
+import rest_gateway
+from gateway_json import message_serializer
+
+HEADERS = {'Authorization': 'Bearer bench'}
+
+CASES = [
+    # (method, path, endpoint, view kwargs, large response)
+    ('POST', '/api/v1/enroll/course/C1', 'enroll_in_course', {'course_id': 'C1'}, False),
+    ('GET', '/api/v1/grades/enrolled-with-grades', 'get_enrolled_courses_with_grades', {}, True),
+    ('GET', '/api/v1/faculty/students?page_size=0', 'get_all_students', {}, True),
+    ('GET', '/api/v1/courses', 'get_courses', {}, True),
+]
+
+
+def responses(items):
+    return {
+        'GetEnrolledCoursesWithGrades': grades_pb2.EnrolledCoursesWithGradesResponse(
+            status='success', student_name='Bench Student',
+            courses=[grades_pb2.CourseGradeInfo(course_id=f'C{i}', course_name='Course', enrollment_date='2024-01-01',
+                                                grade_released=i % 2 == 0, grade='A', semester='Fall 2024',
+                                                date_posted='2024-05-01', remarks='') for i in range(items)]),
+        'GetAllStudents': faculty_grades_pb2.StudentsResponse(
+            status='success', students=[faculty_grades_pb2.StudentInfo(student_id=f'id-{i}', username=f'user{i}')
+                                        for i in range(items)]),
+        'GetCourses': course_pb2.GetCoursesResponse(
+            status='success', courses=[course_pb2.CourseInfo(course_id=f'C{i}', name='Course', capacity=30,
+                                                             enrolled=3, is_open=True) for i in range(items)]),
+        'EnrollInCourse': enrollment_pb2.EnrollResponse(status='success', message='Enrolled'),
+    }
+
+
+class CannedStub:
+    """Stands in for every gRPC stub, answering each RPC with the current canned response"""
+
+    canned = {}
+
+    def __getattr__(self, rpc):
+        return lambda request, metadata=None, **kwargs: self.canned[rpc]
+
+
+def fake_get_stub(target, stub_class):
+    return CannedStub()
+
+
+def load_baseline(revision):
+    source = subprocess.check_output(['git', 'show', f'{revision}:services/rest_gateway.py'], cwd=ROOT)
+    module = types.ModuleType('rest_gateway_baseline')
+    module.__file__ = os.path.join(SERVICES, 'rest_gateway_baseline.py')
+    exec(compile(source, module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def time_view(module, method, path, endpoint, kwargs, number):
+    view = module.app.view_functions[endpoint]
+    with module.app.test_request_context(path, method=method, headers=HEADERS):
+        return timeit.timeit(lambda: view(**kwargs), number=number) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baseline', default='c330c6a^', help="git revision of the hand-written handlers")
+    parser.add_argument('--items', type=int, default=1000, help="items in the large responses (default 1000)")
+    parser.add_argument('--rounds', type=int, default=25, help="interleaved rounds; the best is reported (default 25)")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline)
+    baseline.get_stub = fake_get_stub
+    gateway_routes.get_stub = fake_get_stub
+
+    print(f"view functions only, best of {args.rounds} interleaved rounds")
+    for items, number in ((1, 2000), (args.items, 30)):
+        CannedStub.canned = responses(items)
+        for method, path, endpoint, kwargs, large in CASES:
+            if items > 1 and not large:
+                continue
+            best = {}
+            for _ in range(args.rounds):
+                for name, module in (('handlers', baseline), ('routes', rest_gateway)):
+                    elapsed = time_view(module, method, path, endpoint, kwargs, number)
+                    best[name] = min(best.get(name, elapsed), elapsed)
+            print(f"  {items:5d} items {endpoint:34s} handlers {best['handlers']:8.1f} us  "
+                  f"routes {best['routes']:8.1f} us  ({(best['routes'] / best['handlers'] - 1) * 100:+.0f}%)")
+
+    response = responses(args.items)['GetEnrolledCoursesWithGrades']
+    serializer = message_serializer(response.DESCRIPTOR)
+    print(f"{args.items}-course grades response -> dict")
+    for name, convert in (('compiled serializer', serializer),
+                          ('MessageToDict', lambda message: MessageToDict(message, preserving_proto_field_name=True))):
+        best = min(timeit.repeat(lambda: convert(response), number=20, repeat=5)) / 20 * 1000
+        print(f"  {name:20s} {best:6.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Load test comparing the sync gRPC servers with their grpc.aio variants (--aio).
+
+Starts the Course and Enrollment Services as subprocesses in each mode against a
+scratch database, then keeps --concurrency calls in flight from an asyncio client
+for --duration seconds with the same read mix in both modes, and prints throughput
+and latency percentiles per mode and per RPC:
+
+    python benchmarks/grpc_load.py --concurrency 1000 --duration 30
+
+Needs a PostgreSQL server (the POSTGRES_* variables) and free ports 50052/50053.
+Client and servers share the host, so run it on an otherwise idle machine.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+import grpc
+import psycopg2
+
+import course_pb2
+import course_pb2_grpc
+import enrollment_pb2
+import enrollment_pb2_grpc
+from common_auth import auth_metadata
+from common_db import POSTGRES_HOST, POSTGRES_PASSWORD, POSTGRES_PORT, POSTGRES_USER
+from common_jwt import generate_token
+
+LOAD_DB = 'student_portal_courses_load'
+COURSE_TARGET = 'localhost:50052'
+ENROLLMENT_TARGET = 'localhost:50053'
+
+
+def connect(dbname):
+    conn = psycopg2.connect(dbname=dbname, user=POSTGRES_USER, password=POSTGRES_PASSWORD,
+                            host=POSTGRES_HOST, port=POSTGRES_PORT)
+    conn.autocommit = True
+    return conn
+
+
+def create_database():
+    conn = connect('postgres')
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {LOAD_DB} WITH (FORCE);')
+        cur.execute(f'CREATE DATABASE {LOAD_DB};')
+    conn.close()
+
+
+def drop_database():
+    conn = connect('postgres')
+    with conn.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {LOAD_DB} WITH (FORCE);')
+    conn.close()
+
+
+def seed(students, courses):
+    """Extra courses, and every student enrolled in the first few"""
+    conn = connect(LOAD_DB)
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO courses (course_id, name, capacity, enrolled, is_open) VALUES (%s, %s, 100000, 0, TRUE) "
+            "ON CONFLICT DO NOTHING;",
+            [(f'LOAD{i:03d}', f'Load Test Course {i}') for i in range(courses)]
+        )
+        cur.executemany(
+            "INSERT INTO enrollments (student_public_id, course_id) VALUES (%s, %s);",
+            [(student, f'LOAD{i:03d}') for student in students for i in range(5)]
+        )
+    conn.close()
+
+
+def start_service(script, aio):
+    env = dict(os.environ, POSTGRES_DB=LOAD_DB, DB_POOL_STATS_INTERVAL='0', COURSE_STATS_INTERVAL='0')
+    args = [sys.executable, script] + (['--aio'] if aio else [])
+    return subprocess.Popen(args, cwd=SERVICES, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(target, timeout=30):
+    with grpc.insecure_channel(target) as channel:
+        grpc.channel_ready_future(channel).result(timeout=timeout)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_load(concurrency, duration, tokens, channels):
+    """Keep `concurrency` calls in flight for `duration` seconds; returns {rpc: [latency, ...]} and error count"""
+    course_channels = [grpc.aio.insecure_channel(COURSE_TARGET, options=[('grpc.use_local_subchannel_pool', 1)])
+                       for _ in range(channels)]
+    enrollment_channels = [grpc.aio.insecure_channel(ENROLLMENT_TARGET, options=[('grpc.use_local_subchannel_pool', 1)])
+                           for _ in range(channels)]
+    course_stubs = [course_pb2_grpc.CourseServiceStub(channel) for channel in course_channels]
+    enrollment_stubs = [enrollment_pb2_grpc.EnrollmentServiceStub(channel) for channel in enrollment_channels]
+
+    async def get_courses(worker):
+        await course_stubs[worker % channels].GetCourses(course_pb2.GetCoursesRequest(page_size=20))
+
+    async def get_course_details(worker):
+        await course_stubs[worker % channels].GetCourseDetails(course_pb2.CourseRequest(course_id='LOAD001'))
+
+    async def stream_courses(worker):
+        async for _ in course_stubs[worker % channels].StreamCourses(course_pb2.GetCoursesRequest(page_size=50)):
+            pass
+
+    async def get_enrollments(worker):
+        await enrollment_stubs[worker % channels].GetStudentEnrollments(
+            enrollment_pb2.StudentRequest(), metadata=auth_metadata(tokens[worker % len(tokens)]))
+
+    async def stream_enrollments(worker):
+        call = enrollment_stubs[worker % channels].StreamStudentEnrollments(
+            enrollment_pb2.StudentRequest(), metadata=auth_metadata(tokens[worker % len(tokens)]))
+        async for _ in call:
+            pass
+
+    # Same mix in both modes: reads dominate, as in the portal
+    mix = [get_courses] * 3 + [get_course_details] * 3 + [get_enrollments] * 2 + [stream_courses, stream_enrollments]
+    latencies = {rpc.__name__: [] for rpc in mix}
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(index):
+        nonlocal errors
+        rng = random.Random(index)
+        while time.monotonic() < deadline:
+            rpc = rng.choice(mix)
+            started = time.monotonic()
+            try:
+                await rpc(index)
+            except grpc.RpcError:
+                errors += 1
+                continue
+            latencies[rpc.__name__].append(time.monotonic() - started)
+
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    for channel in course_channels + enrollment_channels:
+        await channel.close()
+    return latencies, errors
+
+
+def run_mode(aio, args, tokens):
+    processes = [start_service('grpc_course_server.py', aio)]
+    try:
+        wait_ready(COURSE_TARGET)
+        processes.append(start_service('grpc_enrollment_server.py', aio))
+        wait_ready(ENROLLMENT_TARGET)
+        asyncio.run(run_load(min(args.concurrency, 50), 2, tokens, args.channels))     # warm up
+        latencies, errors = asyncio.run(run_load(args.concurrency, args.duration, tokens, args.channels))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+    return latencies, errors
+
+
+def report(mode, latencies, errors, duration):
+    every = [latency for values in latencies.values() for latency in values]
+    print(f"{mode}: {len(every) / duration:.0f} calls/s, p50 {percentile(every, 0.5) * 1000:.1f} ms, "
+          f"p99 {percentile(every, 0.99) * 1000:.1f} ms, mean {statistics.mean(every) * 1000:.1f} ms, {errors} errors")
+    for rpc, values in latencies.items():
+        if values:
+            print(f"    {rpc:20s} {len(values):7d} calls  p50 {percentile(values, 0.5) * 1000:7.1f} ms  "
+                  f"p99 {percentile(values, 0.99) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=1000, help="calls kept in flight (default 1000)")
+    parser.add_argument('--duration', type=float, default=30, help="seconds of load per mode (default 30)")
+    parser.add_argument('--channels', type=int, default=8, help="client connections per service (default 8)")
+    parser.add_argument('--students', type=int, default=1000, help="distinct callers (default 1000)")
+    parser.add_argument('--courses', type=int, default=200, help="catalog size (default 200)")
+    parser.add_argument('--modes', default='sync,aio', help="comma-separated: sync, aio (default both)")
+    args = parser.parse_args()
+
+    students = [str(uuid.uuid4()) for _ in range(args.students)]
+    tokens = [generate_token(student, f'load{i}', 'student') for i, student in enumerate(students)]
+
+    create_database()
+    try:
+        # The Course Service creates the schema on startup
+        process = start_service('grpc_course_server.py', False)
+        try:
+            wait_ready(COURSE_TARGET)
+        finally:
+            process.terminate()
+            process.wait()
+        seed(students, args.courses)
+
+        print(f"{args.concurrency} concurrent calls, {args.duration:.0f} s per mode, "
+              f"{args.channels} connections per service")
+        for mode in args.modes.split(','):
+            latencies, errors = run_mode(mode == 'aio', args, tokens)
+            report(mode, latencies, errors, args.duration)
+    finally:
+        drop_database()
+
+
+if __name__ == '__main__':
+    main()
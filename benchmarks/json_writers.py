@@ -0,0 +1,122 @@
+"""
+Large gateway responses: jsonify over the serializer's dict vs gateway_json's writers.
+
+Builds --items-element responses for the gateway's list endpoints and times
+turning each into the response body (min of --repeat runs) with
+jsonify(serializer(message)), as before, and with message_writer (or dumps, for
+the catalog's dict keyed by course_id), checking that the bytes are identical.
+Runs once with orjson and once with its import blocked:
+
+    python benchmarks/json_writers.py --items 10000 --repeat 9
+
+No services needed; the orjson run is skipped when it is not installed.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+ENCODERS = ['orjson', 'json']
+
+
+def fill(message, index):
+    """Set the scalar fields of a list element from its index"""
+    for field in message.DESCRIPTOR.fields:
+        if field.message_type is not None or field.label == field.LABEL_REPEATED:
+            continue
+        if field.cpp_type == field.CPPTYPE_STRING:
+            setattr(message, field.name, f'{field.name}-{index}')
+        elif field.cpp_type == field.CPPTYPE_BOOL:
+            setattr(message, field.name, index % 2 == 0)
+        else:
+            setattr(message, field.name, index)
+    return message
+
+
+def responses(items):
+    import course_pb2
+    import faculty_grades_pb2
+    import grades_pb2
+
+    cases = {
+        'enrolled-with-grades': (grades_pb2.EnrolledCoursesWithGradesResponse(status='success'), 'courses'),
+        'faculty students': (faculty_grades_pb2.StudentsResponse(status='success'), 'students'),
+        'course grades': (grades_pb2.CourseGradesResponse(status='success'), 'student_grades'),
+        'courses catalog': (course_pb2.GetCoursesResponse(status='success'), 'courses'),
+    }
+    for message, field in cases.values():
+        elements = getattr(message, field)
+        for index in range(items):
+            fill(elements.add(), index)
+    return {label: message for label, (message, _) in cases.items()}
+
+
+def best_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times) * 1000
+
+
+def run(encoder, items, repeat):
+    if encoder == 'json':
+        sys.modules['orjson'] = None     # block the optional import
+    from flask import Flask, jsonify
+
+    import gateway_json
+    from gateway_json import dumps, message_serializer, message_writer
+
+    if encoder == 'orjson' and gateway_json.orjson is None:
+        print("orjson: not installed, skipped")
+        return
+
+    def body_functions(label, message):
+        """(dict the route builds, writer of its body) for one response"""
+        if label == 'courses catalog':
+            entry = message_serializer(message.courses[0].DESCRIPTOR, omit=('course_id',))
+
+            def to_dict():
+                return {course.course_id: entry(course) for course in message.courses}
+            return to_dict, lambda: dumps(to_dict())
+        serializer = message_serializer(message.DESCRIPTOR, omit=('message',))
+        writer = message_writer(message.DESCRIPTOR, omit=('message',))
+        return (lambda: serializer(message)), (lambda: writer(message))
+
+    app = Flask(__name__)
+    print(f"{encoder}: {items} elements per response, best of {repeat}")
+    for label, message in responses(items).items():
+        to_dict, write = body_functions(label, message)
+        with app.app_context():
+            expected = jsonify(to_dict()).get_data().rstrip(b'\n')
+            assert write() == expected, label
+            before = best_ms(lambda: jsonify(to_dict()).get_data(), repeat)
+        after = best_ms(write, repeat)
+        print(f"  {label:22s} jsonify {before:7.1f} ms  writer {after:7.1f} ms  "
+              f"({before / after:.1f}x)  {len(expected) // 1024} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=10000, help="elements per response (default 10000)")
+    parser.add_argument('--repeat', type=int, default=9, help="runs per case; the best is reported (default 9)")
+    parser.add_argument('--encoder', choices=ENCODERS, help="run one encoder in this process (default: each in turn)")
+    args = parser.parse_args()
+
+    if args.encoder:
+        run(args.encoder, args.items, args.repeat)
+        return
+    # Each encoder in its own process, so blocking orjson cannot leak into the other run
+    for encoder in ENCODERS:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--encoder', encoder,
+                        '--items', str(args.items), '--repeat', str(args.repeat)], check=True)
+
+
+if __name__ == '__main__':
+    main()
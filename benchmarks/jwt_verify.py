@@ -0,0 +1,55 @@
+"""
+Token verification throughput: PyJWT vs common_jwt's TokenVerifier.
+
+Signs one token with the configured key and verifies it --number times per
+round on a single thread, three ways: jwt.decode, the verifier's precomputed
+HMAC path (claims cache disabled) and the verifier with its claims cache:
+
+    python benchmarks/jwt_verify.py --number 20000 --repeat 5
+
+Prints the best round of each as verifications per second. No services needed.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+
+import jwt
+
+from common_jwt import (
+    JWT_ACTIVE_KID, JWT_ALGORITHM, JWT_KEYS, JWT_SECRET_KEY, TokenVerifier, default_verifier, generate_token,
+    parse_keys
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help="verifications per round (default 20000)")
+    parser.add_argument('--repeat', type=int, default=5, help="rounds per method; the best is reported (default 5)")
+    args = parser.parse_args()
+
+    token = generate_token('3f6c1d2e-bench', 'bench', 'student')
+    secret = default_verifier.keys[default_verifier.active_kid]
+    uncached = TokenVerifier(parse_keys(JWT_KEYS, JWT_SECRET_KEY, JWT_ACTIVE_KID), JWT_ACTIVE_KID, cache_size=0)
+    cached = TokenVerifier(parse_keys(JWT_KEYS, JWT_SECRET_KEY, JWT_ACTIVE_KID), JWT_ACTIVE_KID)
+
+    # All three must agree before their speed means anything
+    expected = jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])
+    assert uncached.decode(token) == expected and cached.decode(token) == expected
+
+    methods = [
+        ('jwt.decode', lambda: jwt.decode(token, secret, algorithms=[JWT_ALGORITHM])),
+        ('TokenVerifier, no claims cache', lambda: uncached.decode(token)),
+        ('TokenVerifier, cached claims', lambda: cached.decode(token)),
+    ]
+    print(f"best of {args.repeat} rounds x {args.number} verifications, one thread")
+    for name, verify in methods:
+        best = min(timeit.repeat(verify, number=args.number, repeat=args.repeat))
+        print(f"  {name:32s} {args.number / best:10,.0f} verifications/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Unary ValidateToken calls vs one batched ValidateTokens call.
+
+Runs the Auth Service servicer in-process on a loopback port and validates
+--tokens distinct tokens, once as one unary call per token and once as a single
+ValidateTokens call. Each is timed cold (claims cache cleared) and warm:
+
+    python benchmarks/validate_batch.py --tokens 500 --repeat 5
+
+Prints the best of --repeat rounds. Validation is local (no database needed).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent import futures
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+import grpc
+
+import auth_pb2
+import auth_pb2_grpc
+from common_jwt import default_verifier, generate_token
+from grpc_auth_server import AuthServiceServicer
+
+
+def timed(call, cold):
+    if cold:
+        default_verifier.cache.clear()
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=500, help="distinct tokens to validate (default 500)")
+    parser.add_argument('--repeat', type=int, default=5, help="rounds per case; the best is reported (default 5)")
+    args = parser.parse_args()
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(AuthServiceServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    channel = grpc.insecure_channel(f'127.0.0.1:{port}')
+    stub = auth_pb2_grpc.AuthServiceStub(channel)
+
+    try:
+        tokens = [generate_token(f'00000000-0000-0000-0000-{i:012d}', f'bench{i}', 'student')
+                  for i in range(args.tokens)]
+
+        # Both paths must give the same answers before their speed means anything
+        batch = stub.ValidateTokens(auth_pb2.ValidateTokensRequest(tokens=tokens))
+        unary = [stub.ValidateToken(auth_pb2.ValidateRequest(token=token)) for token in tokens]
+        assert list(batch.results) == unary and all(result.status == "valid" for result in unary), batch.message
+
+        def unary_calls():
+            for token in tokens:
+                stub.ValidateToken(auth_pb2.ValidateRequest(token=token))
+
+        def batch_call():
+            stub.ValidateTokens(auth_pb2.ValidateTokensRequest(tokens=tokens))
+
+        print(f"{args.tokens} distinct tokens, best of {args.repeat} rounds")
+        for label, cold in (('cold', True), ('warm', False)):
+            unary_ms = min(timed(unary_calls, cold) for _ in range(args.repeat))
+            batch_ms = min(timed(batch_call, cold) for _ in range(args.repeat))
+            print(f"  {label}: {args.tokens} x ValidateToken {unary_ms:7.1f} ms, "
+                  f"1 x ValidateTokens {batch_ms:6.1f} ms ({unary_ms / batch_ms:.0f}x)")
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+if __name__ == '__main__':
+    main()
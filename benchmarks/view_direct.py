@@ -0,0 +1,141 @@
+"""
+Latency of the view server's proxy with and without VIEW_DIRECT_GRPC.
+
+Serves a fixed catalog from in-process Auth and Course servicers (no database),
+runs the gateway and the view server under gunicorn, logs in once, and times
+--requests sequential GET /api/proxy/courses calls through the view server:
+first over HTTP to the gateway, then with the gateway's routes in-process:
+
+    python benchmarks/view_direct.py --requests 500 --courses 200
+
+Needs gunicorn and free ports 5000/5001. The gateway's response cache is off
+so every call reaches the Course servicer.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent import futures
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+import grpc
+import requests
+
+import auth_pb2
+import auth_pb2_grpc
+import course_pb2
+import course_pb2_grpc
+from common_jwt import generate_token
+
+SERVICE_TARGET = '127.0.0.1:56051'
+VIEW_URL = 'http://127.0.0.1:5000'
+GATEWAY_URL = 'http://127.0.0.1:5001'
+
+
+class AuthServicer(auth_pb2_grpc.AuthServiceServicer):
+
+    def Login(self, request, context):
+        return auth_pb2.AuthResponse(status="success", message="Login successful", user_id='bench',
+                                     token=generate_token('bench', request.username, 'student'), role='student')
+
+
+class CourseServicer(course_pb2_grpc.CourseServiceServicer):
+
+    def __init__(self, courses):
+        self.courses = [
+            course_pb2.CourseInfo(course_id=f'BENCH{i:03d}', name=f'Benchmark Course {i}',
+                                  capacity=40, enrolled=i % 40, is_open=True)
+            for i in range(courses)
+        ]
+
+    def GetCourses(self, request, context):
+        return course_pb2.GetCoursesResponse(status="success", message="Courses retrieved successfully",
+                                             courses=self.courses)
+
+
+def start_app(app, url, ready_path, extra_env):
+    env = dict(os.environ, AUTH_GRPC=SERVICE_TARGET, COURSE_GRPC=SERVICE_TARGET, COURSES_CACHE_TTL='0',
+               WSGI_WORKERS='1', WSGI_THREADS='4', **extra_env)
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                '-b', url.split('//')[1], app],
+                               cwd=SERVICES, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(url + ready_path, timeout=1)
+            return process
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError(f"{app} did not start")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(count):
+    """Log in through the view server, then time `count` sequential proxied catalog calls (ms)"""
+    session = requests.Session()
+    response = session.post(VIEW_URL + '/api/login', json={'username': 'bench', 'password': 'bench'})
+    response.raise_for_status()
+    for _ in range(20):     # warm up
+        session.get(VIEW_URL + '/api/proxy/courses').content
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = session.get(VIEW_URL + '/api/proxy/courses')
+        response.content
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+    return latencies
+
+
+def report(mode, latencies):
+    print(f"{mode:34s} p50 {percentile(latencies, 0.5):6.2f} ms  p99 {percentile(latencies, 0.99):6.2f} ms  "
+          f"mean {statistics.mean(latencies):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500, help="timed calls per mode (default 500)")
+    parser.add_argument('--courses', type=int, default=200, help="catalog size (default 200)")
+    args = parser.parse_args()
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(AuthServicer(), server)
+    course_pb2_grpc.add_CourseServiceServicer_to_server(CourseServicer(args.courses), server)
+    server.add_insecure_port(SERVICE_TARGET)
+    server.start()
+
+    try:
+        print(f"{args.requests} sequential GET /api/proxy/courses, {args.courses} courses, gateway cache off")
+        gateway = start_app('rest_gateway:app', GATEWAY_URL, '/api/v1/courses', {})
+        try:
+            view = start_app('app_view:app', VIEW_URL, '/login', {})
+            try:
+                report("view -> HTTP gateway -> gRPC", measure(args.requests))
+            finally:
+                view.terminate()
+                view.wait()
+        finally:
+            gateway.terminate()
+            gateway.wait()
+
+        view = start_app('app_view:app', VIEW_URL, '/login', {'VIEW_DIRECT_GRPC': 'true'})
+        try:
+            report("view (in-process gateway) -> gRPC", measure(args.requests))
+        finally:
+            view.terminate()
+            view.wait()
+    finally:
+        server.stop(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+The view server's /api/proxy relay vs the previous per-call proxy.
+
+Serves small and large JSON from a fake gateway (fake_gateway.py under gunicorn)
+on port 5001 and calls the view server in-process (Flask test client) --requests
+times per payload, two ways: app_view's proxy_api (pooled gateway session, bytes relayed
+as they arrive) and a copy of the previous handler (a new connection per call,
+body parsed and re-encoded with jsonify). Also counts gateway connections:
+
+    python benchmarks/view_proxy.py --requests 50 --rows 50000
+
+Needs gunicorn and a free port 5001. No other services are used.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+SERVICES = os.path.join(os.path.dirname(BENCHMARKS), 'services')
+sys.path.insert(0, SERVICES)
+
+import requests
+from flask import jsonify, session
+
+import app_view
+from app_view import REST_GATEWAY_URL, login_required
+
+GATEWAY_CONNECTIONS_URL = 'http://127.0.0.1:5001/connections'
+
+
+def start_fake_gateway(rows):
+    """fake_gateway.py under gunicorn, which keeps connections alive (the Werkzeug server closes every one)"""
+    env = dict(os.environ, FAKE_GATEWAY_ROWS=str(rows))
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-w', '1', '--threads', '8', '--keep-alive', '30',
+                                '-b', '127.0.0.1:5001', 'fake_gateway:app'],
+                               cwd=BENCHMARKS, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            requests.get(GATEWAY_CONNECTIONS_URL, timeout=1)
+            return process
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("fake gateway did not start")
+
+
+def gateway_connections(reset=False):
+    return requests.request('DELETE' if reset else 'GET', GATEWAY_CONNECTIONS_URL).json()['connections']
+
+
+@app_view.app.route('/bench/previous-proxy/<path:endpoint>')
+@login_required
+def previous_proxy(endpoint):
+    """The GET path of proxy_api before the pooled session (kept here as the baseline)"""
+    headers = {'Authorization': f"Bearer {session.get('token')}", 'Content-Type': 'application/json'}
+    try:
+        response = requests.get(f'{REST_GATEWAY_URL}/{endpoint}', headers=headers, timeout=10)
+        return jsonify(response.json()), response.status_code
+    except requests.exceptions.RequestException as e:
+        return jsonify({'status': 'error', 'message': f'Service unavailable: {str(e)}'}), 503
+
+
+def measure(client, path, count):
+    """Milliseconds per call for `count` sequential calls, and the gateway connections they opened"""
+    client.get(path)    # warm up
+    gateway_connections(reset=True)
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(path)
+        response.data
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.data[:200]
+    return latencies, gateway_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50, help="timed calls per case (default 50)")
+    parser.add_argument('--rows', type=int, default=50000, help="rows in the large payload (default 50000)")
+    args = parser.parse_args()
+
+    gateway = start_fake_gateway(args.rows)
+    client = app_view.app.test_client()
+    with client.session_transaction() as view_session:
+        view_session['token'] = 'bench'
+        view_session['username'] = 'bench'
+
+    try:
+        size = len(client.get('/api/proxy/large').data)
+        print(f"{args.requests} sequential calls per case; large payload {size / 1024:.0f} KB")
+        for payload in ('small', 'large'):
+            for label, prefix in (('previous proxy', '/bench/previous-proxy/'), ('proxy_api', '/api/proxy/')):
+                latencies, opened = measure(client, prefix + payload, args.requests)
+                print(f"  {payload:5s} {label:15s} median {statistics.median(latencies):7.2f} ms  "
+                      f"mean {statistics.mean(latencies):7.2f} ms  {opened} gateway connections")
+    finally:
+        gateway.terminate()
+        gateway.wait()
+
+
+if __name__ == '__main__':
+    main()
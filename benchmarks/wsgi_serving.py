@@ -0,0 +1,102 @@
+"""
+Requests per second under the Flask debug server vs gunicorn.
+
+Starts the gateway and the view server once with `python <app>.py` and once
+under gunicorn (services/gunicorn.conf.py), then drives each with --connections
+keep-alive client threads for --duration seconds against a path that needs no
+backend: the gateway's 401 for a missing token and the view server's login page:
+
+    python benchmarks/wsgi_serving.py --connections 16 --duration 5 --workers 3
+
+Needs gunicorn and free ports 5000/5001. Client and servers share the host.
+"""
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+
+APPS = [
+    # (module, port, path)
+    ('rest_gateway', 5001, '/api/v1/grades/my-grades'),
+    ('app_view', 5000, '/login'),
+]
+
+
+def wait_ready(port, path, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+        try:
+            connection.request('GET', path)
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+        finally:
+            connection.close()
+    raise RuntimeError(f"nothing answered on port {port}")
+
+
+def run_load(port, path, connections, duration):
+    """Requests per second from `connections` threads, each reusing its connection while the server allows"""
+    completed = []
+    deadline = time.monotonic() + duration
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        count = 0
+        while time.monotonic() < deadline:
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                count += 1
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+        connection.close()
+        completed.append(count)
+
+    threads = [threading.Thread(target=client) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(completed) / duration
+
+
+def serve(args, port, path, load_args, extra_env):
+    env = dict(os.environ, **extra_env)
+    process = subprocess.Popen(args, cwd=SERVICES, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port, path)
+        run_load(port, path, load_args.connections, 1)     # warm up
+        return run_load(port, path, load_args.connections, load_args.duration)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, default=16, help="keep-alive client threads (default 16)")
+    parser.add_argument('--duration', type=float, default=5, help="seconds of load per server (default 5)")
+    parser.add_argument('--workers', default='3', help="WSGI_WORKERS for gunicorn (default 3)")
+    args = parser.parse_args()
+
+    print(f"{args.connections} client threads, {args.duration:.0f} s per server, {args.workers} gunicorn workers")
+    for module, port, path in APPS:
+        debug = serve([sys.executable, f'{module}.py'], port, path, args, {})
+        wsgi = serve([sys.executable, '-m', 'gunicorn', '-b', f'127.0.0.1:{port}', f'{module}:app'],
+                     port, path, args, {'WSGI_WORKERS': args.workers})
+        print(f"  {module:12s} GET {path:26s} debug server {debug:6.0f} req/s   gunicorn {wsgi:6.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
-from flask import Flask, render_template, session, redirect, url_for, request, jsonify, flash
+from flask import Flask, Response, render_template, session, redirect, url_for, request, jsonify, flash
 import requests
 from functools import wraps
 
+from view_http import VIEW_DIRECT_GRPC, gateway_session, close_gateway_session, gateway_module
+
 # Node 1: The View Server with Session Management
 app = Flask(__name__, 
             static_folder='../frontend/static', 
@@ -12,6 +14,21 @@ app.secret_key = 'your_secret_key_here_change_in_production'
 # REST Gateway URL
 REST_GATEWAY_URL = 'http://localhost:5001/api/v1'
 
+# Chunk size when streaming proxied gateway responses to the browser
+PROXY_CHUNK_SIZE = 64 * 1024
+
+if VIEW_DIRECT_GRPC:
+    # Load the gateway's routes now, so gunicorn's preloading shares them across workers
+    gateway_module()
+
+# Gateway response headers relayed by the proxy along with the body bytes
+PROXY_RESPONSE_HEADERS = (
+    'Content-Type', 'Content-Encoding', 'Content-Length', 'Vary', 'Retry-After',
+    'ETag', 'Cache-Control', 'Last-Modified'
+)
+# Browser validators forwarded to the gateway so a revalidation can end in a 304
+PROXY_REQUEST_HEADERS = ('If-None-Match', 'If-Modified-Since')
+
 def login_required(f):
     """Decorator to require login for protected routes"""
     @wraps(f)
@@ -43,7 +60,7 @@ def login():
     data = request.get_json()
     
     try:
-        response = requests.post(
+        response = gateway_session().post(
             f'{REST_GATEWAY_URL}/auth/login',
             json=data,
             timeout=5
@@ -78,7 +95,7 @@ def register():
     data = request.get_json()
     
     try:
-        response = requests.post(
+        response = gateway_session().post(
             f'{REST_GATEWAY_URL}/auth/register',
             json=data,
             timeout=5
@@ -110,6 +127,18 @@ def register():
 @app.route('/logout')
 def logout():
     """Handle logout"""
+    # Revoke the token so it stops working everywhere, not just in this session
+    token = session.get('token')
+    if token:
+        try:
+            gateway_session().post(
+                f'{REST_GATEWAY_URL}/auth/logout',
+                headers={'Authorization': f'Bearer {token}'},
+                timeout=5
+            )
+        except requests.exceptions.RequestException:
+            pass
+
     # Clears all session data
     session.clear()
 
@@ -169,22 +198,26 @@ def proxy_api(endpoint):
     
     headers = {
         'Authorization': f'Bearer {token}',
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        # Only ask for encodings the browser can decode, since the body is relayed as is
+        'Accept-Encoding': request.headers.get('Accept-Encoding', 'identity')
     }
+    for header in PROXY_REQUEST_HEADERS:
+        if header in request.headers:
+            headers[header] = request.headers[header]
     
     url = f'{REST_GATEWAY_URL}/{endpoint}'
     
     try:
-        if request.method == 'GET':
-            response = requests.get(url, headers=headers, timeout=10)
-        elif request.method == 'POST':
-            response = requests.post(url, headers=headers, json=request.get_json(), timeout=10)
-        elif request.method == 'PUT':
-            response = requests.put(url, headers=headers, json=request.get_json(), timeout=10)
-        elif request.method == 'DELETE':
-            response = requests.delete(url, headers=headers, timeout=10)
-        
-        return jsonify(response.json()), response.status_code
+        response = gateway_session().request(
+            request.method,
+            url,
+            params=request.args,
+            headers=headers,
+            data=request.get_data() if request.method in ('POST', 'PUT') else None,
+            timeout=10,
+            stream=True
+        )
     
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -192,6 +225,38 @@ def proxy_api(endpoint):
             'message': f'Service unavailable: {str(e)}'
         }), 503
 
+    if response.status_code == 304:
+        # Not modified: the browser keeps its copy, so relay only the validators
+        response.close()
+        relayed = Response(status=304)
+        for header in ('ETag', 'Cache-Control', 'Last-Modified', 'Vary'):
+            if header in response.headers:
+                relayed.headers[header] = response.headers[header]
+        return relayed
+
+    # Relay the gateway's bytes as they arrive (still compressed, if they are) instead of
+    # parsing and re-serializing the JSON, so the proxy's work does not grow with the payload
+    def relay():
+        try:
+            yield from response.raw.stream(PROXY_CHUNK_SIZE, decode_content=False)
+        finally:
+            response.close()
+
+    relayed = Response(relay(), status=response.status_code, direct_passthrough=True)
+    relayed.headers['Content-Type'] = 'application/json'
+    for header in PROXY_RESPONSE_HEADERS:
+        if header in response.headers:
+            relayed.headers[header] = response.headers[header]
+    return relayed
+
+def init_worker():
+    """Per-process startup; gunicorn calls it in every worker after fork (see gunicorn.conf.py)"""
+    # Pooled gateway connections must not be shared with the parent process
+    close_gateway_session()
+    if VIEW_DIRECT_GRPC:
+        # The embedded gateway needs its own gRPC channels and revocation listener
+        gateway_module().init_worker()
+
 if __name__ == '__main__':
     print("=" * 70)
     print("Starting View Server (Node 1) on Port 5000...")
@@ -201,5 +266,7 @@ if __name__ == '__main__':
     print("  - Login required for all pages except /login")
     print("  - Logout button on all authenticated pages")
     print("  - Automatic token management")
+    print(f"  - Gateway: {'in-process, direct gRPC' if VIEW_DIRECT_GRPC else REST_GATEWAY_URL}")
     print("=" * 70)
+    init_worker()
     app.run(port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+# Password hashing for the Auth Service. The KDF is CPU-bound and holds the GIL, so
+# hashes are computed in a pool of worker processes. At most PASSWORD_HASH_MAX_PENDING
+# hashes may be queued or running; beyond that callers get PasswordHasherBusy
+# (RESOURCE_EXHAUSTED) instead of tying up a server thread. Workers are spawned, not
+# forked: the server's gRPC and database threads (and their locks) must not be copied.
+
+# Werkzeug method string including its cost, e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000.
+# Stored hashes made with another method or cost are rehashed on the next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(PASSWORD_HASH_WORKERS * 2)))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hashes are already queued or running"""
+
+
+def full_method(method):
+    """`method` with Werkzeug's defaults filled in, as it is written into a hash (scrypt -> scrypt:32768:8:1)"""
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return f'scrypt:{2 ** 15}:8:1'
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+HASH_METHOD = full_method(PASSWORD_HASH_METHOD)
+
+
+def needs_rehash(password_hash):
+    return full_method(password_hash.split('$', 1)[0]) != HASH_METHOD
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    """(matches, new_hash); new_hash is set when a matching hash uses an outdated method or cost"""
+    if not check_password_hash(password_hash, password):
+        return False, None
+    return True, hash_password(password) if needs_rehash(password_hash) else None
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for hash_password / verify_password. Call start() before the
+    server starts; otherwise the pool is created on first use. A pool broken by a
+    crashed worker is replaced, so only the calls it was running fail.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Create the pool and its worker processes now"""
+        self._pool().submit(int).result()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _replace(self, executor):
+        """Drop `executor` after it broke, unless it has already been replaced"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        print("✗ Password hashing pool broke (a worker process died); starting a new one")
+        executor.shutdown(wait=False)
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password operations in progress")
+        try:
+            executor = self._pool()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                self._replace(executor)
+                executor = self._pool()
+                future = executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        def done(future):
+            self._slots.release()
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                self._replace(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def hash(self, password):
+        """Future of the hash for a new password"""
+        return self._submit(hash_password, password)
+
+    def verify(self, password_hash, password):
+        """Future of verify_password(password_hash, password)"""
+        return self._submit(verify_password, password_hash, password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,251 @@
+import asyncio
+import contextvars
+from collections import namedtuple
+
+import grpc
+from google.protobuf import descriptor_pool, message_factory
+
+from common_jwt import validate_token_locally
+
+# Per-method access policy: which roles may call it, and the response status
+# used when the caller's role is not allowed. Methods not listed are denied, so a
+# new RPC on an intercepted server stays closed until it is given a policy.
+Policy = namedtuple('Policy', ['roles', 'denied_status'])
+ANY_ROLE = None
+
+STUDENT = Policy(roles={'student'}, denied_status='error')
+FACULTY = Policy(roles={'faculty'}, denied_status='error')
+AUTHENTICATED = Policy(roles=ANY_ROLE, denied_status='error')
+
+METHOD_POLICIES = {
+    '/enrollment.EnrollmentService/EnrollInCourse': Policy(roles={'student'}, denied_status='rejected'),
+    '/enrollment.EnrollmentService/GetStudentEnrollments': AUTHENTICATED,
+    '/enrollment.EnrollmentService/DropFromCourse': Policy(roles={'student'}, denied_status='rejected'),
+    '/enrollment.EnrollmentService/StreamStudentEnrollments': AUTHENTICATED,
+
+    '/grades.GradesService/GetEnrolledCoursesWithGrades': STUDENT,
+    '/grades.GradesService/GetStudentGrades': STUDENT,
+    '/grades.GradesService/UploadGrade': FACULTY,
+    '/grades.GradesService/GetCourseGrades': FACULTY,
+    '/grades.GradesService/StreamCourseGrades': FACULTY,
+
+    '/faculty_grades.FacultyGradesService/GetAllStudents': FACULTY,
+    '/faculty_grades.FacultyGradesService/StreamAllStudents': FACULTY,
+    '/faculty_grades.FacultyGradesService/GetStudentEnrollments': FACULTY,
+    '/faculty_grades.FacultyGradesService/UploadStudentGrade': FACULTY,
+    '/faculty_grades.FacultyGradesService/UploadGradesBatch': FACULTY,
+}
+
+_current_user = contextvars.ContextVar('current_user', default=None)
+_response_classes = {}
+
+
+def current_user():
+    """Validated claims (user_id, role, username) of the caller, set by AuthInterceptor"""
+    return _current_user.get()
+
+
+def auth_metadata(token):
+    """Call metadata carrying a bearer token, for clients of intercepted services"""
+    return (('authorization', f'Bearer {token}'),)
+
+
+def _token_from_metadata(metadata):
+    for key, value in metadata or ():
+        if key == 'authorization' and value.startswith('Bearer '):
+            return value[7:]
+    return None
+
+
+def _response_class(method):
+    """Resolve the response message class of '/pkg.Service/Method' from the descriptor pool"""
+    cls = _response_classes.get(method)
+    if cls is None:
+        full_name = method.lstrip('/').replace('/', '.')
+        method_desc = descriptor_pool.Default().FindMethodByName(full_name)
+        cls = message_factory.GetMessageClass(method_desc.output_type)
+        _response_classes[method] = cls
+    return cls
+
+
+def _request_token(request):
+    return getattr(request, 'token', None)
+
+
+def _no_request_token(request_iterator):
+    return None
+
+
+def _no_policy_message(method):
+    return f"Access denied. {method} has no access policy"
+
+
+def _wrap_handler(handler, wrap_unary_response, wrap_stream_response, method, policy):
+    """Rebuild an RPC method handler with its behavior wrapped for authentication"""
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(
+            wrap_unary_response(method, policy, handler.unary_unary, _request_token),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(
+            wrap_unary_response(method, policy, handler.stream_unary, _no_request_token),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer)
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(
+            wrap_stream_response(method, policy, handler.unary_stream, _request_token),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer)
+    return grpc.stream_stream_rpc_method_handler(
+        wrap_stream_response(method, policy, handler.stream_stream, _no_request_token),
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer)
+
+
+class AuthInterceptor(grpc.ServerInterceptor):
+    """
+    Authenticates every call covered by METHOD_POLICIES before the servicer runs,
+    and aborts calls to methods without a policy with PERMISSION_DENIED.
+    The bearer token comes from the `authorization` metadata header, falling back
+    to the request's `token` field for unary requests. Rejected calls get the
+    method's normal response type with status/message set, so REST clients see
+    the same shape as before; streaming responses are aborted instead.
+    """
+
+    def __init__(self, validate=validate_token_locally, policies=METHOD_POLICIES):
+        self.validate = validate
+        self.policies = policies
+
+    def _authorize(self, method, policy, token):
+        """Return (claims, None) on success or (None, (status, message, grpc code)) on rejection"""
+        auth_result = self.validate(token)
+        if not auth_result.get('valid'):
+            message = f"Authentication failed: {auth_result.get('message', 'Invalid token')}"
+            return None, ("error", message, grpc.StatusCode.UNAUTHENTICATED)
+
+        role = auth_result.get('role')
+        if policy.roles is not ANY_ROLE and role not in policy.roles:
+            allowed = ', '.join(sorted(policy.roles))
+            message = f"Access denied. Allowed roles: {allowed}. Your role is '{role}'"
+            return None, (policy.denied_status, message, grpc.StatusCode.PERMISSION_DENIED)
+
+        return auth_result, None
+
+    def _wrap_unary_response(self, method, policy, behavior, request_token):
+        def wrapper(request_or_iterator, context):
+            token = _token_from_metadata(context.invocation_metadata()) or request_token(request_or_iterator)
+            claims, rejection = self._authorize(method, policy, token)
+            if rejection:
+                status, message, _ = rejection
+                return _response_class(method)(status=status, message=message)
+
+            reset = _current_user.set(claims)
+            try:
+                return behavior(request_or_iterator, context)
+            finally:
+                _current_user.reset(reset)
+        return wrapper
+
+    def _wrap_stream_response(self, method, policy, behavior, request_token):
+        def wrapper(request_or_iterator, context):
+            token = _token_from_metadata(context.invocation_metadata()) or request_token(request_or_iterator)
+            claims, rejection = self._authorize(method, policy, token)
+            if rejection:
+                _, message, code = rejection
+                context.abort(code, message)
+
+            reset = _current_user.set(claims)
+            try:
+                yield from behavior(request_or_iterator, context)
+            finally:
+                _current_user.reset(reset)
+        return wrapper
+
+    def _deny_unary_response(self, method, policy, behavior, request_token):
+        def wrapper(request_or_iterator, context):
+            context.abort(grpc.StatusCode.PERMISSION_DENIED, _no_policy_message(method))
+        return wrapper
+
+    def _deny_stream_response(self, method, policy, behavior, request_token):
+        def wrapper(request_or_iterator, context):
+            context.abort(grpc.StatusCode.PERMISSION_DENIED, _no_policy_message(method))
+            yield
+        return wrapper
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = handler_call_details.method
+        policy = self.policies.get(method)
+        if handler is None:
+            return handler
+        if policy is None:
+            return _wrap_handler(handler, self._deny_unary_response, self._deny_stream_response, method, None)
+
+        return _wrap_handler(handler, self._wrap_unary_response, self._wrap_stream_response, method, policy)
+
+
+class AsyncAuthInterceptor(grpc.aio.ServerInterceptor):
+    """
+    grpc.aio counterpart of AuthInterceptor, sharing its policy table and responses.
+    Set `offload=True` when `validate` may block (e.g. the Auth-service fallback)
+    so validation runs in the default executor instead of on the event loop.
+    """
+
+    def __init__(self, validate=validate_token_locally, policies=METHOD_POLICIES, offload=False):
+        self._sync = AuthInterceptor(validate=validate, policies=policies)
+        self.policies = policies
+        self.offload = offload
+
+    async def _authorize(self, method, policy, token):
+        if self.offload:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._sync._authorize, method, policy, token)
+        return self._sync._authorize(method, policy, token)
+
+    def _wrap_unary_response(self, method, policy, behavior, request_token):
+        async def wrapper(request_or_iterator, context):
+            token = _token_from_metadata(context.invocation_metadata()) or request_token(request_or_iterator)
+            claims, rejection = await self._authorize(method, policy, token)
+            if rejection:
+                status, message, _ = rejection
+                return _response_class(method)(status=status, message=message)
+
+            _current_user.set(claims)
+            return await behavior(request_or_iterator, context)
+        return wrapper
+
+    def _wrap_stream_response(self, method, policy, behavior, request_token):
+        async def wrapper(request_or_iterator, context):
+            token = _token_from_metadata(context.invocation_metadata()) or request_token(request_or_iterator)
+            claims, rejection = await self._authorize(method, policy, token)
+            if rejection:
+                _, message, code = rejection
+                await context.abort(code, message)
+
+            _current_user.set(claims)
+            async for response in behavior(request_or_iterator, context):
+                yield response
+        return wrapper
+
+    def _deny_unary_response(self, method, policy, behavior, request_token):
+        async def wrapper(request_or_iterator, context):
+            await context.abort(grpc.StatusCode.PERMISSION_DENIED, _no_policy_message(method))
+        return wrapper
+
+    def _deny_stream_response(self, method, policy, behavior, request_token):
+        async def wrapper(request_or_iterator, context):
+            await context.abort(grpc.StatusCode.PERMISSION_DENIED, _no_policy_message(method))
+            yield
+        return wrapper
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        method = handler_call_details.method
+        policy = self.policies.get(method)
+        if handler is None:
+            return handler
+        if policy is None:
+            return _wrap_handler(handler, self._deny_unary_response, self._deny_stream_response, method, None)
+
+        return _wrap_handler(handler, self._wrap_unary_response, self._wrap_stream_response, method, policy)
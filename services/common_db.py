@@ -0,0 +1,541 @@
+import base64
+import contextlib
+import itertools
+import json
+import os
+import re
+import select
+import threading
+import time
+import uuid
+
+import psycopg2
+import psycopg2.pool
+from psycopg2 import extensions
+from psycopg2.extras import DictCursor
+
+# Shared PostgreSQL connection settings for all services
+POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
+POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
+
+# Pool tuning (applies to every per-database pool)
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+# asyncpg pools (grpc.aio servers) close connections idle for longer than this; asyncpg has no maximum connection age
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))
+# Connections idle for longer than this are pinged before being handed out (0 = always)
+DB_POOL_CHECK_IDLE = float(os.getenv('DB_POOL_CHECK_IDLE', '30'))
+# Seconds between pool metrics log lines (see start_pool_stats_logger); 0 disables them
+DB_POOL_STATS_INTERVAL = float(os.getenv('DB_POOL_STATS_INTERVAL', '60'))
+# Seconds between reconnect attempts for LISTEN connections
+DB_LISTEN_RETRY = float(os.getenv('DB_LISTEN_RETRY', '5'))
+
+# Keyset pagination and streaming
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+# Rows fetched per round trip by server-side cursors
+DB_STREAM_BATCH_SIZE = int(os.getenv('DB_STREAM_BATCH_SIZE', '500'))
+
+
+class PooledConnection(extensions.connection):
+    """psycopg2 connection that remembers its owning pool and creation time"""
+    pool = None
+    created_at = 0.0
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections to a single database.
+    Blocks up to `timeout` seconds when all connections are checked out,
+    recycles connections older than `max_lifetime` and pings connections
+    that have been idle for a while before handing them out.
+    """
+
+    def __init__(self, dbname, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 timeout=DB_POOL_TIMEOUT, max_lifetime=DB_POOL_MAX_LIFETIME,
+                 check_idle=DB_POOL_CHECK_IDLE):
+        self.dbname = dbname
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+
+        self._cond = threading.Condition()
+        self._idle = []          # list of (conn, returned_at)
+        self._in_use = 0
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._connects = 0
+        self._recycled = 0
+        self._broken = 0
+
+        for _ in range(min_size):
+            try:
+                self._idle.append((self._connect(), time.monotonic()))
+            except psycopg2.OperationalError as e:
+                print(f"Database connection failed: {e}")
+                break
+
+    def _connect(self):
+        conn = psycopg2.connect(
+            dbname=self.dbname,
+            user=POSTGRES_USER,
+            password=POSTGRES_PASSWORD,
+            host=POSTGRES_HOST,
+            port=POSTGRES_PORT,
+            connection_factory=PooledConnection
+        )
+        conn.pool = self
+        conn.created_at = time.monotonic()
+        with self._cond:
+            self._connects += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, conn, returned_at):
+        """Lifetime and health check performed on checkout (outside the lock; counters are updated under it)"""
+        if conn.closed:
+            with self._cond:
+                self._broken += 1
+            return False
+
+        now = time.monotonic()
+        if now - conn.created_at > self.max_lifetime:
+            with self._cond:
+                self._recycled += 1
+            return False
+
+        if now - returned_at >= self.check_idle:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1;")
+                conn.rollback()
+            except psycopg2.Error:
+                with self._cond:
+                    self._broken += 1
+                return False
+
+        return True
+
+    def getconn(self):
+        """Check out a connection, waiting for one to be returned if the pool is saturated"""
+        started = time.monotonic()
+        waited = False
+
+        with self._cond:
+            while not self._idle and self._in_use >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise psycopg2.pool.PoolError(
+                        f"Connection pool for '{self.dbname}' exhausted after {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            wait_time = time.monotonic() - started
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            # Reserve the slot before doing any I/O outside the lock
+            self._in_use += 1
+            candidate = self._idle.pop() if self._idle else None
+
+        try:
+            if candidate is not None:
+                conn, returned_at = candidate
+                if self._is_usable(conn, returned_at):
+                    return conn
+                self._discard(conn)
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, resetting any open transaction"""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed or len(self._idle) >= self.max_size:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+
+    def stats(self):
+        """Snapshot of pool size, saturation and wait-time metrics"""
+        with self._cond:
+            size = self._in_use + len(self._idle)
+            return {
+                "dbname": self.dbname,
+                "size": size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "saturation": self._in_use / self.max_size if self.max_size else 0.0,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_time_avg_ms": (self._wait_time_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                "wait_time_max_ms": self._wait_time_max * 1000,
+                "connects": self._connects,
+                "recycled": self._recycled,
+                "broken": self._broken
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dbname):
+    """Return the process-wide pool for `dbname`, creating it on first use"""
+    pool = _pools.get(dbname)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(dbname)
+            if pool is None:
+                pool = ConnectionPool(dbname)
+                _pools[dbname] = pool
+    return pool
+
+
+def get_connection(dbname):
+    """Check out a pooled connection, or None if the database is unreachable"""
+    try:
+        return get_pool(dbname).getconn()
+    except psycopg2.pool.PoolError as e:
+        print(f"Database pool exhausted: {e}")
+        return None
+    except psycopg2.OperationalError as e:
+        print(f"Database connection failed: {e}")
+        return None
+
+
+def release_connection(conn):
+    """Return a connection obtained from get_connection() to its pool"""
+    if conn is None:
+        return
+    pool = getattr(conn, 'pool', None)
+    if pool is None:
+        conn.close()
+        return
+    pool.putconn(conn)
+
+
+def pool_stats():
+    """Metrics for every pool opened by this process, keyed by database name"""
+    return {dbname: pool.stats() for dbname, pool in list(_pools.items())}
+
+
+def log_pool_stats_forever():
+    while True:
+        time.sleep(DB_POOL_STATS_INTERVAL)
+        for stats in list(pool_stats().values()) + list(async_pool_stats().values()):
+            print(f"DB pool stats: {stats}")
+
+
+def start_pool_stats_logger():
+    """Print every pool's size, saturation and wait-time metrics every DB_POOL_STATS_INTERVAL seconds"""
+    if DB_POOL_STATS_INTERVAL > 0:
+        threading.Thread(target=log_pool_stats_forever, name="db-pool-stats", daemon=True).start()
+
+
+def close_all_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+# ============= KEYSET PAGINATION / STREAMING =============
+
+def page_limit(page_size):
+    """LIMIT for a requested page size: None (no limit) for 0, capped at MAX_PAGE_SIZE"""
+    if page_size <= 0:
+        return None
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+def encode_page_token(*key):
+    """Opaque page token holding the sort key of the last row returned"""
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+
+def decode_page_token(token, size=1):
+    """Sort key from a page token as a list of `size` values (all None for an empty token); raises ValueError"""
+    if not token:
+        return [None] * size
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid page token")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid page token")
+    return key
+
+
+def split_page(rows, limit, key):
+    """
+    Trim the result of a `LIMIT limit + 1` keyset query to one page.
+    Returns (rows, next_page_token); the token is empty on the last page.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, ""
+    rows = rows[:limit]
+    return rows, encode_page_token(*key(rows[-1]))
+
+
+def stream_rows(conn, query, params=None, batch_size=DB_STREAM_BATCH_SIZE):
+    """Yield DictRows from a server-side (named) cursor, fetching `batch_size` rows per round trip"""
+    with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=DictCursor) as cur:
+        cur.itersize = batch_size
+        cur.execute(query, params)
+        yield from cur
+
+# ============= LISTEN / NOTIFY =============
+
+def _listen_forever(dbname, channel, on_notify):
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(
+                dbname=dbname,
+                user=POSTGRES_USER,
+                password=POSTGRES_PASSWORD,
+                host=POSTGRES_HOST,
+                port=POSTGRES_PORT
+            )
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {channel};")
+            print(f"✓ Listening for '{channel}' notifications on {dbname}")
+
+            # Anything may have changed while we were not listening
+            on_notify(None)
+
+            while True:
+                if select.select([conn], [], [], 60) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    on_notify(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"✗ Listener for '{channel}' on {dbname} disconnected: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(DB_LISTEN_RETRY)
+
+
+def start_listener(dbname, channel, on_notify):
+    """
+    LISTEN on `channel` from a dedicated daemon thread, calling on_notify(payload)
+    for every notification. on_notify(None) is called after each (re)connect,
+    since notifications sent while disconnected are lost.
+    """
+    thread = threading.Thread(
+        target=_listen_forever,
+        args=(dbname, channel, on_notify),
+        name=f"listen-{channel}",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+# ============= ASYNC POOLS (grpc.aio servers) =============
+
+_PARAM_RE = re.compile(r'%\((\w+)\)s|%s')
+
+
+def to_asyncpg(query, params=()):
+    """Rewrite a psycopg2 query (%s or %(name)s placeholders) into asyncpg form ($1, $2, ...) with its args"""
+    if isinstance(params, dict):
+        names = []
+
+        def named(match):
+            name = match.group(1)
+            if name not in names:
+                names.append(name)
+            return f'${names.index(name) + 1}'
+
+        return _PARAM_RE.sub(named, query), [params[name] for name in names]
+
+    position = itertools.count(1)
+    return _PARAM_RE.sub(lambda match: f'${next(position)}', query), list(params)
+
+class AsyncPoolMetrics:
+    """Checkout wait-time counters for an asyncpg pool, reported like ConnectionPool.stats()"""
+
+    def __init__(self, dbname, pool):
+        self.dbname = dbname
+        self.pool = pool
+        self.claims = 0         # connections checked out or being waited for
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def claim(self):
+        """Count a checkout attempt; returns whether it has to wait for a connection"""
+        self.claims += 1
+        return self.claims > self.pool.get_max_size()
+
+    def record(self, wait_time, waited):
+        self.checkouts += 1
+        if waited:
+            self.waits += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def stats(self):
+        size = self.pool.get_size()
+        idle = self.pool.get_idle_size()
+        max_size = self.pool.get_max_size()
+        return {
+            "dbname": self.dbname,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "max_size": max_size,
+            "saturation": (size - idle) / max_size if max_size else 0.0,
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "wait_time_avg_ms": (self.wait_time_total / self.checkouts * 1000) if self.checkouts else 0.0,
+            "wait_time_max_ms": self.wait_time_max * 1000
+        }
+
+
+_async_pools = {}
+_async_metrics = {}
+_async_pools_lock = None
+
+
+async def get_async_pool(dbname):
+    """Return the process-wide asyncpg pool for `dbname`, creating it on first use"""
+    global _async_pools_lock
+    pool = _async_pools.get(dbname)
+    if pool is not None:
+        return pool
+
+    import asyncio
+    import asyncpg
+
+    if _async_pools_lock is None:
+        _async_pools_lock = asyncio.Lock()
+    async with _async_pools_lock:
+        pool = _async_pools.get(dbname)
+        if pool is None:
+            pool = await asyncpg.create_pool(
+                database=dbname,
+                user=POSTGRES_USER,
+                password=POSTGRES_PASSWORD,
+                host=POSTGRES_HOST,
+                port=POSTGRES_PORT,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                max_inactive_connection_lifetime=DB_POOL_MAX_IDLE
+            )
+            _async_metrics[dbname] = AsyncPoolMetrics(dbname, pool)
+            _async_pools[dbname] = pool
+    return pool
+
+
+async def acquire_async_connection(dbname):
+    """Acquire an asyncpg connection, or None if the database is unreachable or the pool is exhausted"""
+    import asyncio
+
+    try:
+        pool = await get_async_pool(dbname)
+    except Exception as e:
+        print(f"Database connection failed: {type(e).__name__}: {e}")
+        return None
+
+    metrics = _async_metrics[dbname]
+    started = time.monotonic()
+    waited = metrics.claim()
+    try:
+        conn = await pool.acquire(timeout=DB_POOL_TIMEOUT)
+        metrics.record(time.monotonic() - started, waited)
+        return conn
+    except asyncio.TimeoutError:
+        metrics.claims -= 1
+        metrics.timeouts += 1
+        print(f"Database pool exhausted: no connection to '{dbname}' within {DB_POOL_TIMEOUT}s")
+        return None
+    except Exception as e:
+        metrics.claims -= 1
+        print(f"Database connection failed: {type(e).__name__}: {e}")
+        return None
+
+
+async def release_async_connection(dbname, conn):
+    if conn is not None:
+        _async_metrics[dbname].claims -= 1
+        await _async_pools[dbname].release(conn)
+
+
+
+async def stream_async_rows(conn, query, args=(), batch_size=DB_STREAM_BATCH_SIZE):
+    """Yield records from an asyncpg server-side cursor, fetching `batch_size` rows per round trip"""
+    async with conn.transaction():
+        async for record in conn.cursor(query, *args, prefetch=batch_size):
+            yield record
+
+@contextlib.asynccontextmanager
+async def async_connection(dbname):
+    """`async with async_connection(db) as conn:` - conn is None when the database is unavailable"""
+    conn = await acquire_async_connection(dbname)
+    try:
+        yield conn
+    finally:
+        await release_async_connection(dbname, conn)
+
+
+def async_pool_stats():
+    """Metrics for every asyncpg pool opened by this process, keyed by database name"""
+    return {dbname: metrics.stats() for dbname, metrics in list(_async_metrics.items())}
+
+
+async def close_all_async_pools():
+    for pool in list(_async_pools.values()):
+        await pool.close()
+    _async_pools.clear()
+    _async_metrics.clear()
@@ -0,0 +1,106 @@
+import itertools
+import os
+import sys
+import threading
+
+import grpc
+
+# Channel tuning shared by every long-lived client channel.
+# Keepalive defaults stay within the gRPC server's default ping policy (5 minutes).
+GRPC_KEEPALIVE_TIME_MS = int(os.getenv('GRPC_KEEPALIVE_TIME_MS', '300000'))
+GRPC_KEEPALIVE_TIMEOUT_MS = int(os.getenv('GRPC_KEEPALIVE_TIMEOUT_MS', '20000'))
+GRPC_INITIAL_BACKOFF_MS = int(os.getenv('GRPC_INITIAL_BACKOFF_MS', '500'))
+GRPC_MAX_BACKOFF_MS = int(os.getenv('GRPC_MAX_BACKOFF_MS', '10000'))
+GRPC_READY_TIMEOUT = float(os.getenv('GRPC_READY_TIMEOUT', '2'))
+
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', GRPC_KEEPALIVE_TIME_MS),
+    ('grpc.keepalive_timeout_ms', GRPC_KEEPALIVE_TIMEOUT_MS),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.initial_reconnect_backoff_ms', GRPC_INITIAL_BACKOFF_MS),
+    ('grpc.min_reconnect_backoff_ms', GRPC_INITIAL_BACKOFF_MS),
+    ('grpc.max_reconnect_backoff_ms', GRPC_MAX_BACKOFF_MS),
+]
+
+_channels = {}      # address -> grpc.Channel
+_stubs = {}         # (address, stub class) -> stub
+_rotations = {}     # target -> itertools.cycle over its addresses
+_lock = threading.Lock()
+
+
+def split_target(target):
+    """A target is a single 'host:port' or a comma-separated list for round-robin"""
+    return [address.strip() for address in target.split(',') if address.strip()]
+
+
+def _get_channel_locked(address):
+    channel = _channels.get(address)
+    if channel is None:
+        channel = grpc.insecure_channel(address, options=CHANNEL_OPTIONS)
+        _channels[address] = channel
+    return channel
+
+
+def _next_address(target):
+    if ',' not in target:
+        return target.strip()
+    with _lock:
+        rotation = _rotations.get(target)
+        if rotation is None:
+            rotation = itertools.cycle(split_target(target))
+            _rotations[target] = rotation
+        return next(rotation)
+
+
+def get_channel(target):
+    """Return the shared channel for `target`, rotating across its addresses"""
+    address = _next_address(target)
+    channel = _channels.get(address)
+    if channel is None:
+        with _lock:
+            channel = _get_channel_locked(address)
+    return channel
+
+
+def get_stub(target, stub_class):
+    """Return a cached stub of `stub_class` bound to the next address of `target`"""
+    address = _next_address(target)
+    key = (address, stub_class)
+    stub = _stubs.get(key)
+    if stub is None:
+        with _lock:
+            stub = _stubs.get(key)
+            if stub is None:
+                stub = stub_class(_get_channel_locked(address))
+                _stubs[key] = stub
+    return stub
+
+
+def channel_ready(target, timeout=GRPC_READY_TIMEOUT):
+    """Check that at least one address of `target` has a connected channel"""
+    for address in split_target(target):
+        with _lock:
+            channel = _get_channel_locked(address)
+        try:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+            return True
+        except grpc.FutureTimeoutError:
+            continue
+    return False
+
+
+def close_all_channels():
+    """Close every registry channel (e.g. at shutdown or after fork)"""
+    with _lock:
+        for channel in _channels.values():
+            channel.close()
+        _channels.clear()
+        _stubs.clear()
+        _rotations.clear()
+
+
+def use_async_server(argv=None):
+    """True when a server should start its grpc.aio variant (--aio flag or GRPC_ASYNC=true)"""
+    argv = sys.argv if argv is None else argv
+    return '--aio' in argv or os.getenv('GRPC_ASYNC', 'false').lower() == 'true'
@@ -1,11 +1,239 @@
-import jwt
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from functools import wraps
-from flask import request, jsonify
+
+import jwt
+
+from common_revocation import revoked_tokens
 
 # Shared JWT config for all services
-SECRET_KEY = 'super_secret_distributed_key_shh_its_a_secret'
-ALGORITHM = 'HS256'
-EXPIRY_HOURS = 2
+JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super_secret_auth_key_12345')
+JWT_ALGORITHM = 'HS256'
+JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', '24'))
+
+# Key rotation: JWT_KEYS="kid1:secret1,kid2:secret2" lists every key still accepted,
+# JWT_ACTIVE_KID selects the one used to sign new tokens. Without JWT_KEYS the
+# single JWT_SECRET_KEY is used under the active kid.
+JWT_ACTIVE_KID = os.getenv('JWT_ACTIVE_KID', 'primary')
+JWT_KEYS = os.getenv('JWT_KEYS', '')
+
+# Seconds of clock skew between nodes tolerated when checking exp, nbf and iat
+JWT_LEEWAY = int(os.getenv('JWT_LEEWAY', '0'))
+
+# Decoded-claims cache
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+
+# Backwards-compatible names
+SECRET_KEY = JWT_SECRET_KEY
+ALGORITHM = JWT_ALGORITHM
+EXPIRY_HOURS = JWT_EXPIRATION_HOURS
+
+
+def parse_keys(spec, default_secret, active_kid):
+    """Parse 'kid:secret,...' into a dict, falling back to {active_kid: default_secret}"""
+    keys = {}
+    for item in spec.split(','):
+        if ':' in item:
+            kid, secret = item.split(':', 1)
+            keys[kid.strip()] = secret.strip()
+    if not keys:
+        keys[active_kid] = default_secret
+    return keys
+
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    """The token's jti has been revoked (see common_revocation)"""
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class ClaimsCache:
+    """Bounded LRU of decoded claims, keyed by token digest and expiring with the token's exp"""
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # digest -> claims
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is None:
+                return None
+            if claims['exp'] <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def put(self, digest, claims):
+        with self._lock:
+            self._entries[digest] = claims
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _numeric_claim(claims, name, error):
+    value = claims.get(name)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise error(f"{name} must be a number")
+    return value
+
+
+def _check_times(claims, now):
+    """The exp, nbf and iat checks jwt.decode makes; exp is required (generate_token always sets it)"""
+    exp = _numeric_claim(claims, 'exp', jwt.DecodeError)
+    if exp is None:
+        raise jwt.MissingRequiredClaimError('exp')
+    if exp <= now - JWT_LEEWAY:
+        raise jwt.ExpiredSignatureError("Signature has expired")
+
+    nbf = _numeric_claim(claims, 'nbf', jwt.DecodeError)
+    if nbf is not None and nbf > now + JWT_LEEWAY:
+        raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+
+    iat = _numeric_claim(claims, 'iat', jwt.InvalidIssuedAtError)
+    if iat is not None and iat > now + JWT_LEEWAY:
+        raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+
+
+class TokenVerifier:
+    """
+    HS256 signer/verifier shared by every service.
+    HMAC states are keyed once per kid and copied per verification, and
+    successfully decoded claims are cached until the token expires.
+    Raises the usual PyJWT exceptions so callers can keep their error handling.
+    """
+
+    def __init__(self, keys, active_kid, cache_size=TOKEN_CACHE_SIZE):
+        if active_kid not in keys:
+            raise ValueError(f"Active JWT kid '{active_kid}' has no configured key")
+        self.keys = dict(keys)
+        self.active_kid = active_kid
+        self._macs = {
+            kid: hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+            for kid, secret in self.keys.items()
+        }
+        self.cache = ClaimsCache(cache_size)
+
+    def encode(self, payload):
+        return jwt.encode(payload, self.keys[self.active_kid], algorithm=JWT_ALGORITHM,
+                          headers={'kid': self.active_kid})
+
+    def decode(self, token):
+        digest = hashlib.sha256(token.encode('utf-8')).digest()
+        claims = self.cache.get(digest)
+        if claims is not None:
+            return claims
+
+        try:
+            signing_input, _, signature_segment = token.rpartition('.')
+            header_segment, _, payload_segment = signing_input.partition('.')
+            signed_bytes = signing_input.encode('ascii')
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(signature_segment)
+        except (ValueError, TypeError, binascii.Error):
+            raise jwt.DecodeError("Invalid token encoding")
+
+        if not isinstance(header, dict) or header.get('alg') != JWT_ALGORITHM:
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+
+        base_mac = self._macs.get(header.get('kid', self.active_kid))
+        if base_mac is None:
+            raise jwt.InvalidSignatureError("Unknown signing key")
+
+        mac = base_mac.copy()
+        mac.update(signed_bytes)
+        if not hmac.compare_digest(mac.digest(), signature):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except (ValueError, TypeError, binascii.Error):
+            raise jwt.DecodeError("Invalid payload encoding")
+        if not isinstance(claims, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+
+        _check_times(claims, time.time())
+        self.cache.put(digest, claims)
+        return claims
+
+
+default_verifier = TokenVerifier(parse_keys(JWT_KEYS, JWT_SECRET_KEY, JWT_ACTIVE_KID), JWT_ACTIVE_KID)
+
+
+def generate_token(public_id, username, role):
+    """Generate a signed JWT for a user - public_id can be UUID or string"""
+    now = datetime.now(timezone.utc)
+    payload = {
+        'public_id': str(public_id),
+        'username': username,
+        'role': role,
+        'exp': now + timedelta(hours=JWT_EXPIRATION_HOURS),
+        'iat': now,
+        'jti': uuid.uuid4().hex
+    }
+    return default_verifier.encode(payload)
+
+
+def decode_token(token):
+    """Verify a JWT and return its claims (raises jwt.InvalidTokenError subclasses)"""
+    claims = default_verifier.decode(token)
+    if revoked_tokens.is_revoked(claims.get('jti')):
+        raise TokenRevokedError("Token has been revoked")
+    return claims
+
+
+def validate_token_locally(token):
+    """Validate JWT token locally without calling auth service"""
+    if not token:
+        return {
+            "valid": False,
+            "message": "Token missing"
+        }
+
+    try:
+        payload = decode_token(token)
+        return {
+            "valid": True,
+            "user_id": payload.get('public_id'),
+            "role": payload.get('role'),
+            "username": payload.get('username')
+        }
+    except jwt.ExpiredSignatureError:
+        print(f"✗ Token validation failed: Token expired")
+        return {
+            "valid": False,
+            "message": "Token expired"
+        }
+    except TokenRevokedError:
+        print(f"✗ Token validation failed: Token revoked")
+        return {
+            "valid": False,
+            "message": "Token revoked"
+        }
+    except jwt.InvalidTokenError as e:
+        print(f"✗ Token validation failed: Invalid token - {e}")
+        return {
+            "valid": False,
+            "message": "Invalid token"
+        }
 
 
 def token_required(f):
@@ -14,6 +242,8 @@ def token_required(f):
     Checks the Authorization header for a valid Bearer token
     and attaches decoded payload to request.user_data.
     """
+    from flask import request, jsonify
+
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -28,7 +258,7 @@ def token_required(f):
             return jsonify({'status': 'error', 'message': 'Token is missing!'}), 401
 
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            data = decode_token(token)
             # Attach decoded JWT to the request for downstream handlers
             request.user_data = data
         except jwt.ExpiredSignatureError:
@@ -38,4 +268,4 @@ def token_required(f):
 
         return f(*args, **kwargs)
 
-    return decorated
\ No newline at end of file
+    return decorated
@@ -0,0 +1,131 @@
+import sys
+from collections import namedtuple
+
+from common_db import get_connection, release_connection
+
+# A versioned schema change. Pending migrations are applied once per database, in
+# version order, each in its own transaction. `checks` are the hot queries the
+# migration exists for; check_plans() verifies they can still use an index.
+Migration = namedtuple('Migration', ['version', 'name', 'statements', 'checks'], defaults=((),))
+
+# A hot query (with sample parameters) that must not need a sequential scan of `table`
+PlanCheck = namedtuple('PlanCheck', ['description', 'query', 'params', 'table'])
+
+SCHEMA_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+# Advisory lock key, so replicas starting at the same time migrate one after another
+MIGRATION_LOCK_ID = 5432001
+
+
+def migrate(dbname, migrations):
+    """Apply pending migrations to `dbname`; returns the versions applied, or None on failure"""
+    conn = get_connection(dbname)
+    if conn is None:
+        print(f"Cannot migrate {dbname} without a connection.")
+        return None
+
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+            cur.execute(SCHEMA_MIGRATIONS_TABLE)
+            conn.commit()
+
+            for migration in sorted(migrations, key=lambda m: m.version):
+                cur.execute("SELECT pg_advisory_xact_lock(%s);", (MIGRATION_LOCK_ID,))
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s;", (migration.version,))
+                if cur.fetchone():
+                    conn.rollback()
+                    continue
+
+                for statement in migration.statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s);",
+                    (migration.version, migration.name)
+                )
+                conn.commit()
+                applied.append(migration.version)
+                print(f"✓ {dbname}: applied migration {migration.version} ({migration.name})")
+
+        return applied
+    except Exception as e:
+        conn.rollback()
+        print(f"✗ {dbname}: migration failed: {e}")
+        return None
+    finally:
+        release_connection(conn)
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def check_plans(dbname, migrations):
+    """
+    EXPLAIN every migration's PlanChecks with sequential scans disabled, so the
+    result does not depend on table size. Returns a list of failure messages.
+    """
+    conn = get_connection(dbname)
+    if conn is None:
+        return [f"{dbname}: no database connection"]
+
+    failures = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off;")
+            for migration in migrations:
+                for check in migration.checks:
+                    cur.execute("EXPLAIN (FORMAT JSON) " + check.query, check.params)
+                    plan = cur.fetchone()[0][0]['Plan']
+                    if any(node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == check.table
+                           for node in _plan_nodes(plan)):
+                        failures.append(
+                            f"{dbname}: migration {migration.version}: {check.description} "
+                            f"uses a sequential scan on {check.table}"
+                        )
+    except Exception as e:
+        failures.append(f"{dbname}: plan check failed: {e}")
+    finally:
+        conn.rollback()
+        release_connection(conn)
+    return failures
+
+
+def all_migrations():
+    """(database, migrations) for every service that owns a schema"""
+    import grpc_auth_server
+    import grpc_course_server
+    import grpc_grades_server
+
+    return [
+        (grpc_auth_server.POSTGRES_DB, grpc_auth_server.MIGRATIONS),
+        (grpc_course_server.POSTGRES_DB, grpc_course_server.MIGRATIONS),
+        (grpc_grades_server.POSTGRES_DB, grpc_grades_server.MIGRATIONS),
+    ]
+
+
+if __name__ == '__main__':
+    # python common_migrations.py          apply pending migrations to every database
+    # python common_migrations.py --check  fail if a hot query regresses to a sequential scan
+    sys.path.append('./generated')
+    targets = all_migrations()
+
+    if '--check' in sys.argv:
+        failures = [failure for dbname, migrations in targets for failure in check_plans(dbname, migrations)]
+        for failure in failures:
+            print(f"✗ {failure}")
+        if not failures:
+            print("✓ All hot queries can use an index")
+        sys.exit(1 if failures else 0)
+
+    results = [migrate(dbname, migrations) for dbname, migrations in targets]
+    sys.exit(1 if None in results else 0)
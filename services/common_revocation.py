@@ -0,0 +1,131 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+# Revoked token ids (jti claims), replicated to every service that verifies tokens.
+# The Auth Service records revocations in its revoked_tokens table, which sends
+# NOTIFY token_revoked; start_revocation_listener() applies them to the local set.
+
+POSTGRES_DB_AUTH = os.getenv('POSTGRES_DB_AUTH', 'student_portal_auth')
+TOKEN_REVOKED_CHANNEL = 'token_revoked'
+
+# Sizing of the bloom filter; it is rebuilt larger if more tokens are revoked at once
+REVOCATION_CAPACITY = int(os.getenv('REVOCATION_CAPACITY', '100000'))
+REVOCATION_ERROR_RATE = float(os.getenv('REVOCATION_ERROR_RATE', '0.001'))
+
+# Every revocation that has not expired yet
+REVOKED_TOKENS_QUERY = """
+    SELECT jti, EXTRACT(EPOCH FROM expires_at)::bigint AS exp
+    FROM revoked_tokens
+    WHERE expires_at > now();
+"""
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings (double hashing of one blake2b digest)"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationSet:
+    """
+    jti -> exp of revoked tokens. The bloom filter answers the common "not revoked"
+    case without touching the exact map, which confirms (and expires) its hits.
+    Expired entries are dropped whenever the filter is rebuilt.
+    """
+
+    def __init__(self, capacity=REVOCATION_CAPACITY, error_rate=REVOCATION_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+
+    def add(self, jti, exp):
+        if exp <= time.time():
+            return
+        with self._lock:
+            self._revoked[jti] = exp
+            if len(self._revoked) > self.capacity:
+                self._rebuild(self._revoked.items())
+            else:
+                self._bloom.add(jti)
+
+    def replace(self, entries):
+        """Replace the whole set with (jti, exp) pairs, e.g. after a resync"""
+        with self._lock:
+            self._rebuild(entries)
+
+    def _rebuild(self, entries):
+        now = time.time()
+        revoked = {jti: exp for jti, exp in entries if exp > now}
+        # Grow instead of letting the false positive rate climb
+        while len(revoked) > self.capacity:
+            self.capacity *= 2
+        bloom = BloomFilter(self.capacity, self.error_rate)
+        for jti in revoked:
+            bloom.add(jti)
+        self._revoked = revoked
+        self._bloom = bloom
+
+    def is_revoked(self, jti):
+        if not jti or jti not in self._bloom:
+            return False
+        exp = self._revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revoked_tokens = RevocationSet()
+
+
+def load_revocations(dbname=POSTGRES_DB_AUTH):
+    """Replace revoked_tokens with every unexpired revocation recorded in `dbname`"""
+    from common_db import get_connection, release_connection
+
+    conn = get_connection(dbname)
+    if conn is None:
+        raise ConnectionError(f"{dbname} is unavailable")
+    try:
+        with conn.cursor() as cur:
+            cur.execute(REVOKED_TOKENS_QUERY)
+            revoked_tokens.replace(cur.fetchall())
+        print(f"✓ Loaded {len(revoked_tokens)} revoked tokens")
+    finally:
+        conn.rollback()
+        release_connection(conn)
+
+
+def start_revocation_listener(dbname=POSTGRES_DB_AUTH):
+    """Keep revoked_tokens in sync with the revocations recorded in the auth database"""
+    from common_db import start_listener
+
+    def on_revocation(payload):
+        if payload is None:
+            # (Re)connected: reload everything, since notifications may have been missed
+            load_revocations(dbname)
+        else:
+            jti, exp = payload.split(' ', 1)
+            revoked_tokens.add(jti, int(exp))
+
+    return start_listener(dbname, TOKEN_REVOKED_CHANNEL, on_revocation)
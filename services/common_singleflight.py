@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+# Request coalescing: concurrent calls with the same key share one execution
+# of the underlying function (the first caller runs it, the rest wait for its
+# result or exception). Nothing is kept once the call completes.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _FlightStats:
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+
+    def _count(self, executed):
+        with self._stats_lock:
+            self.calls += 1
+            if executed:
+                self.executions += 1
+
+    def stats(self):
+        """Call counts; coalescing_ratio is the share of calls answered by another call's execution"""
+        with self._stats_lock:
+            coalesced = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else 0.0
+            }
+
+
+class SingleFlight(_FlightStats):
+    """Coalesces concurrent calls across threads"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._count(leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight(_FlightStats):
+    """Coalesces concurrent coroutine calls on one event loop"""
+
+    def __init__(self):
+        super().__init__()
+        self._calls = {}
+
+    async def _run(self, key, fn, args):
+        try:
+            return await fn(*args)
+        finally:
+            # Before the result reaches anyone, so a caller arriving after it starts a new call
+            self._calls.pop(key, None)
+
+    async def do(self, key, fn, *args):
+        task = self._calls.get(key)
+        leader = task is None
+        if leader:
+            task = self._calls[key] = asyncio.ensure_future(self._run(key, fn, args))
+        self._count(leader)
+        # shield: one cancelled caller must not cancel the call the others are waiting on
+        return await asyncio.shield(task)
@@ -0,0 +1,173 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+import jwt
+from flask import Response, make_response, request
+
+from common_jwt import decode_token
+from common_singleflight import SingleFlight
+from gateway_compression import COMPRESSORS, encoded_etag
+
+# Response cache for the REST gateway's read routes. Successful GET responses are
+# kept for a per-route TTL (per user on private routes) and always carry a strong
+# ETag, so a browser revalidating with If-None-Match gets an empty 304. Concurrent
+# misses for the same key share one backend call (gateway_flight).
+
+GATEWAY_CACHE_SIZE = int(os.getenv('GATEWAY_CACHE_SIZE', '10000'))
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'status', 'mimetype', 'etag', 'expires_at'])
+
+
+class ResponseCache:
+    """Bounded LRU of CachedResponses keyed by (endpoint, path with query, user_id or None)"""
+
+    def __init__(self, max_size=GATEWAY_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, users=(), endpoints=()):
+        """Drop every entry cached for one of `users` and every entry of `endpoints`"""
+        users = set(users) - {None}
+        with self._lock:
+            stale = [key for key in self._entries if key[2] in users or key[0] in endpoints]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+gateway_flight = SingleFlight()
+
+
+def strong_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def caller_id():
+    """public_id of the request's bearer token if it verifies locally, else None"""
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return decode_token(header[7:]).get('public_id')
+    except jwt.InvalidTokenError:
+        return None
+
+
+def _etag_matches(etag):
+    # A compressed copy of the response was sent with a per-encoding ETag
+    tags = [etag] + [encoded_etag(etag, encoding) for encoding in COMPRESSORS]
+    return any(request.if_none_match.contains(tag) for tag in tags)
+
+
+def _conditional_response(entry, private):
+    if _etag_matches(entry.etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, status=200, mimetype=entry.mimetype)
+    response.set_etag(entry.etag)
+    # Browsers may keep the body but must revalidate (cheaply, via If-None-Match) before reuse
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+        response.vary.add('Authorization')
+    else:
+        response.cache_control.public = True
+    return response
+
+
+def _render(f, args, kwargs, ttl):
+    response = make_response(f(*args, **kwargs))
+    body = response.get_data()
+    return CachedResponse(body, response.status_code, response.mimetype, strong_etag(body), time.monotonic() + ttl)
+
+
+def cached_response(ttl, private=False):
+    """
+    Cache a (non-streaming) GET route's successful responses for `ttl` seconds
+    (0 = ETags only) and coalesce concurrent identical requests into one call.
+    Private routes are cached per user; requests without a valid token bypass
+    the cache so the route reports the error itself.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user = caller_id() if private else None
+            if private and user is None:
+                return f(*args, **kwargs)
+
+            key = (request.endpoint, request.full_path, user)
+            entry = response_cache.get(key) if ttl > 0 else None
+            if entry is None:
+                entry = gateway_flight.do(key, _render, f, args, kwargs, ttl)
+                if entry.status != 200:
+                    return Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+                if ttl > 0:
+                    response_cache.put(key, entry)
+
+            return _conditional_response(entry, private)
+        return decorated
+    return decorator
+
+
+def start_invalidation_listener(dbname, channel, endpoints, per_user=False):
+    """
+    Drop cached responses whenever `channel` fires on `dbname`, so a write handled by
+    another worker (or another gateway) does not leave this one serving stale data. With
+    `per_user` a notification names the user whose entries go; otherwise, and after a
+    listener (re)connect, every entry of `endpoints` goes.
+    """
+    from common_db import start_listener
+
+    def on_notify(payload):
+        if per_user and payload:
+            response_cache.invalidate(users=[payload])
+        else:
+            response_cache.invalidate(endpoints=endpoints)
+
+    return start_listener(dbname, channel, on_notify)
+
+
+def invalidates_cache(*endpoints):
+    """After a successful write, drop the caller's cached responses and every cached response of `endpoints`"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user = caller_id()
+            response = make_response(f(*args, **kwargs))
+            if 200 <= response.status_code < 300:
+                response_cache.invalidate(users=[user], endpoints=endpoints)
+            return response
+        return decorated
+    return decorator
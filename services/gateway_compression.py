@@ -0,0 +1,60 @@
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:     # optional: without it only gzip is offered
+    brotli = None
+
+# Optional response compression for the REST gateway. Large JSON bodies (rosters, grade
+# lists) are compressed once here; the view server's proxy relays the compressed bytes
+# to the browser as they are. Compressed responses get their own strong ETag
+# ("<etag>-gzip"), which gateway_cache still recognizes in If-None-Match.
+
+GATEWAY_COMPRESSION = os.getenv('GATEWAY_COMPRESSION', 'false').lower() == 'true'
+GATEWAY_COMPRESS_MIN_SIZE = int(os.getenv('GATEWAY_COMPRESS_MIN_SIZE', '1024'))
+
+COMPRESSIBLE_MIMETYPES = frozenset(['application/json', 'text/csv'])
+
+# Preferred first
+COMPRESSORS = {'gzip': lambda body: gzip.compress(body, compresslevel=6)}
+if brotli is not None:
+    COMPRESSORS = {'br': lambda body: brotli.compress(body, quality=5), **COMPRESSORS}
+
+
+def encoded_etag(etag, encoding):
+    return f'{etag}-{encoding}'
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding in COMPRESSORS the client accepts, or None"""
+    for encoding in COMPRESSORS:
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def compress_response(response):
+    """after_request hook: compress a buffered, compressible response the client accepts"""
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None or response.content_length is None or response.content_length < GATEWAY_COMPRESS_MIN_SIZE:
+        return response
+
+    response.set_data(COMPRESSORS[encoding](response.get_data()))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+
+def init_compression(app):
+    if GATEWAY_COMPRESSION:
+        app.after_request(compress_response)
@@ -0,0 +1,182 @@
+import json
+import keyword
+import threading
+from json.encoder import encode_basestring_ascii
+
+from google.protobuf.descriptor import FieldDescriptor
+
+try:
+    import orjson
+except ImportError:     # optional: without it JSON is written by the compiled writers below
+    orjson = None
+
+# protobuf message -> JSON-ready dict for the REST gateway. Each message type gets a
+# serializer compiled once from its descriptor into a single expression (nested and
+# repeated messages inlined as dict literals and comprehensions), so a response costs
+# one attribute read per field instead of MessageToDict's reflection.
+#
+# Message writers go one step further and produce the JSON bytes directly, identical to
+# the compact jsonify output (sorted keys, no spaces, non-ASCII escaped): with orjson
+# installed they encode the serializer's dict with it, otherwise a compiled expression
+# joins the pre-encoded keys with each field's value (strings escaped by the json
+# module's C escaper). The gateway's messages have no float fields, the one place
+# orjson's output differs (1e16 instead of 1e+16).
+
+# JSON names that differ from the proto field name, by message type
+JSON_NAMES = {
+    'course.CourseInfo': {'is_open': 'open'},
+}
+
+# Fields whose JSON value is computed from the message `{m}` (a Python expression), by message type
+JSON_EXPRESSIONS = {
+    'grades.CourseGradeInfo': {'grade': '{m}.grade if {m}.grade_released else "Not Released"'},
+}
+
+class _Literal(str):
+    """Constant JSON text in a writer's parts (anything else is an expression)"""
+
+
+_serializers = {}
+_writers = {}
+_lock = threading.Lock()
+
+# The compact encoding jsonify uses outside debug mode
+_encoder = json.JSONEncoder(ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+
+
+def _attribute(var, name):
+    return f'getattr({var}, {name!r})' if keyword.iskeyword(name) else f'{var}.{name}'
+
+
+def _expression(descriptor, var, omit=(), depth=0):
+    """Dict-literal expression of the message `var` refers to"""
+    names = JSON_NAMES.get(descriptor.full_name, {})
+    expressions = JSON_EXPRESSIONS.get(descriptor.full_name, {})
+    items = []
+    for field in descriptor.fields:
+        if field.name in omit:
+            continue
+        value = _attribute(var, field.name)
+        repeated = field.label == FieldDescriptor.LABEL_REPEATED
+        if field.name in expressions:
+            value = '(' + expressions[field.name].format(m=var) + ')'
+        elif field.message_type is not None and field.message_type.GetOptions().map_entry:
+            value = f'dict({value})'
+        elif field.message_type is not None and repeated:
+            item = f'item{depth}'
+            value = f'[{_expression(field.message_type, item, depth=depth + 1)} for {item} in {value}]'
+        elif field.message_type is not None:
+            value = _expression(field.message_type, value, depth=depth + 1)
+        elif repeated:
+            value = f'list({value})'
+        items.append(f'{names.get(field.name, field.name)!r}: {value}')
+    return '{' + ', '.join(items) + '}'
+
+
+def _scalar(field, value):
+    """JSON text expression of a scalar field's `value`"""
+    if field.cpp_type == FieldDescriptor.CPPTYPE_STRING and field.type != FieldDescriptor.TYPE_BYTES:
+        return f'_string({value})'
+    if field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        return f'("true" if {value} else "false")'
+    if field.cpp_type in (FieldDescriptor.CPPTYPE_DOUBLE, FieldDescriptor.CPPTYPE_FLOAT,
+                          FieldDescriptor.CPPTYPE_STRING):
+        return f'_encode({value})'
+    return f'str({value})'     # integers and enums
+
+
+def _text_parts(descriptor, var, omit=(), depth=0):
+    """Constant strings and expressions whose concatenation is the JSON text of `var`"""
+    names = JSON_NAMES.get(descriptor.full_name, {})
+    expressions = JSON_EXPRESSIONS.get(descriptor.full_name, {})
+    items = []
+    for field in descriptor.fields:
+        if field.name in omit:
+            continue
+        value = _attribute(var, field.name)
+        repeated = field.label == FieldDescriptor.LABEL_REPEATED
+        if field.name in expressions:
+            parts = [f'_encode({expressions[field.name].format(m=var)})']
+        elif field.message_type is not None and field.message_type.GetOptions().map_entry:
+            parts = [f'_encode(dict({value}))']
+        elif field.message_type is not None and repeated:
+            item = f'item{depth}'
+            element = _join(_text_parts(field.message_type, item, depth=depth + 1))
+            parts = [_Literal('['), f'",".join([{element} for {item} in {value}])', _Literal(']')]
+        elif field.message_type is not None:
+            parts = _text_parts(field.message_type, value, depth=depth + 1)
+        elif repeated:
+            parts = [_Literal('['), f'",".join([{_scalar(field, "value")} for value in {value}])', _Literal(']')]
+        else:
+            parts = [_scalar(field, value)]
+        items.append((names.get(field.name, field.name), parts))
+
+    text = []
+    for index, (name, parts) in enumerate(sorted(items)):
+        text.append(_Literal(('{' if index == 0 else ',') + json.dumps(name) + ':'))
+        text.extend(parts)
+    text.append(_Literal('}' if items else '{}'))
+    return text
+
+
+def _join(parts):
+    """Expression concatenating `parts`, adjacent literals merged into one constant"""
+    merged = []
+    for part in parts:
+        if isinstance(part, _Literal) and merged and isinstance(merged[-1], _Literal):
+            merged[-1] = _Literal(merged[-1] + part)
+        else:
+            merged.append(part)
+    code = [repr(str(part)) if isinstance(part, _Literal) else part for part in merged]
+    return f'"".join(({", ".join(code)},))'
+
+
+def _compiled(cache, key, source):
+    function = cache.get(key)
+    if function is None:
+        with _lock:
+            function = cache.get(key)
+            if function is None:
+                function = cache[key] = eval(source(), {'_string': encode_basestring_ascii, '_encode': _encoder.encode})
+    return function
+
+
+def message_serializer(descriptor, omit=()):
+    """Compiled function turning a `descriptor` message into a dict, without the fields in `omit`"""
+    omit = frozenset(omit)
+    return _compiled(_serializers, (descriptor.full_name, omit),
+                     lambda: f'lambda m: {_expression(descriptor, "m", omit)}')
+
+
+def message_writer(descriptor, omit=()):
+    """Compiled function writing a `descriptor` message as JSON bytes, without the fields in `omit`"""
+    omit = frozenset(omit)
+    text = _compiled(_writers, (descriptor.full_name, omit),
+                     lambda: f'lambda m: {_join(_text_parts(descriptor, "m", omit))}')
+    if orjson is None:
+        return lambda message: text(message).encode('ascii')
+
+    serializer = message_serializer(descriptor, omit)
+
+    def write(message):
+        body = orjson.dumps(serializer(message), option=orjson.OPT_SORT_KEYS)
+        # orjson leaves non-ASCII characters unescaped; jsonify does not
+        return body if body.isascii() else text(message).encode('ascii')
+    return write
+
+
+def message_json(message, omit=()):
+    return message_serializer(message.DESCRIPTOR, omit)(message)
+
+
+def dumps(obj):
+    """JSON bytes of `obj`, identical to the compact jsonify output (without its newline)"""
+    if orjson is not None:
+        try:
+            body = orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+        except TypeError:       # e.g. integers beyond 64 bits; the json module handles them
+            pass
+        else:
+            if body.isascii():
+                return body
+    return _encoder.encode(obj).encode('ascii')
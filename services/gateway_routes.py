@@ -0,0 +1,228 @@
+import json
+from collections import namedtuple
+
+import grpc
+from flask import Response, current_app, jsonify, request, stream_with_context
+from google.protobuf import message_factory
+from google.protobuf.descriptor import FieldDescriptor
+
+from common_auth import auth_metadata
+from common_grpc import get_stub
+from gateway_cache import cached_response, invalidates_cache, response_cache
+from gateway_json import dumps, message_serializer, message_writer
+
+# Table-driven REST -> gRPC translation for the gateway. A Route names the RPC it calls;
+# the request message is filled from the path, the query string or JSON body and the
+# bearer token, the call goes through the shared channel registry, and the response is
+# written as JSON by the writer compiled for its message type. Server-streaming RPCs are
+# relayed as newline-delimited JSON.
+
+Service = namedtuple('Service', ['target', 'stub_class', 'descriptor', 'unavailable_message'])
+
+Route = namedtuple('Route', [
+    'endpoint', 'method', 'path', 'service', 'rpc',
+    'auth',                 # require a bearer token; it fills the request's token field and the call metadata
+    'body',                 # fill the request from the JSON body instead of the query string
+    'defaults',             # request field values used when the client gives none
+    'statuses',             # response.status -> HTTP status
+    'error_status',         # HTTP status for any other response.status; the body is then just status and message
+    'omit',                 # response fields left out of a successful body
+    'render',               # custom (response) -> body of a successful response
+    'cache_ttl',            # cached_response TTL (None = not cached)
+    'private',              # cache per user
+    'invalidates',          # endpoints whose cached responses a success drops; () = the caller's own only
+    'invalidates_user',     # request field naming a user whose cached responses a success drops
+    'busy_message',         # RESOURCE_EXHAUSTED becomes a 429 with this message instead of a 503
+    'unavailable_message',  # overrides the service's 503 message
+], defaults=(False, False, {}, {'success': 200}, 400, (), None, None, False, None, None, None, None))
+
+STREAM_ERROR_STATUS = {
+    grpc.StatusCode.UNAUTHENTICATED: 401,
+    grpc.StatusCode.PERMISSION_DENIED: 403,
+    grpc.StatusCode.INVALID_ARGUMENT: 400,
+}
+
+# How query string values are parsed into scalar request fields
+QUERY_CONVERTERS = {
+    FieldDescriptor.CPPTYPE_INT32: int,
+    FieldDescriptor.CPPTYPE_INT64: int,
+    FieldDescriptor.CPPTYPE_UINT32: int,
+    FieldDescriptor.CPPTYPE_UINT64: int,
+    FieldDescriptor.CPPTYPE_DOUBLE: float,
+    FieldDescriptor.CPPTYPE_FLOAT: float,
+    FieldDescriptor.CPPTYPE_BOOL: lambda value: value.lower() in ('1', 'true', 'yes'),
+}
+
+
+def bearer_token():
+    token = request.headers.get('Authorization')
+    if token and token.startswith('Bearer '):
+        token = token[7:]
+    return token
+
+
+def is_paginated():
+    """Whether the client asked for a page (page_size or page_token in the query string)"""
+    return 'page_size' in request.args or 'page_token' in request.args
+
+
+def _pretty_json():
+    """Whether jsonify would indent (debug mode); the gateway then leaves JSON to it"""
+    provider = current_app.json
+    return provider.compact is False or (provider.compact is None and current_app.debug)
+
+
+def _jsonify(obj, status_code):
+    response = jsonify(obj)
+    response.status_code = status_code
+    return response
+
+
+def _json_body(body, status_code):
+    return current_app.response_class(body + b'\n', status=status_code, mimetype=current_app.json.mimetype)
+
+
+def json_response(obj, status_code=200):
+    """Same response as jsonify(obj), written by gateway_json.dumps"""
+    if _pretty_json():
+        return _jsonify(obj, status_code)
+    return _json_body(dumps(obj), status_code)
+
+
+def message_response(message, serializer, writer, status_code=200):
+    """Response of a message, written straight to JSON by `writer` (`serializer` in debug mode)"""
+    if _pretty_json():
+        return _jsonify(serializer(message), status_code)
+    return _json_body(writer(message), status_code)
+
+
+def error_response(message, status_code):
+    return json_response({"status": "error", "message": message}, status_code)
+
+
+def busy_response(message):
+    response = json_response({"status": "error", "message": message}, 429)
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def ndjson_stream(responses, to_json, unavailable_message):
+    """Relay a server-streaming RPC as chunked newline-delimited JSON, one object per message"""
+    try:
+        first = next(responses, None)
+    except grpc.RpcError as e:
+        status_code = STREAM_ERROR_STATUS.get(e.code())
+        if status_code is None:
+            return error_response(unavailable_message, 503)
+        return error_response(e.details(), status_code)
+
+    def generate():
+        if first is None:
+            return
+        yield json.dumps(to_json(first)) + '\n'
+        try:
+            for message in responses:
+                yield json.dumps(to_json(message)) + '\n'
+        except grpc.RpcError as e:
+            # Headers are already sent; report the failure as the final line
+            yield json.dumps({"status": "error", "message": e.details()}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def route_view(route):
+    """View function translating requests for `route` into its RPC"""
+    method = route.service.descriptor.methods_by_name[route.rpc]
+    if method.client_streaming:
+        raise ValueError(f"{route.rpc} is client-streaming; write its route by hand")
+    request_class = message_factory.GetMessageClass(method.input_type)
+    fields = dict(method.input_type.fields_by_name)
+    repeated = frozenset(name for name, field in fields.items() if field.label == FieldDescriptor.LABEL_REPEATED)
+    query_fields = [
+        (name, QUERY_CONVERTERS.get(field.cpp_type, str))
+        for name, field in fields.items()
+        if name != 'token' and name not in repeated and field.message_type is None
+    ]
+    token_field = 'token' in fields
+    if method.server_streaming:
+        serializer, writer = message_serializer(method.output_type), None
+    else:
+        serializer = message_serializer(method.output_type, route.omit)
+        writer = message_writer(method.output_type, route.omit)
+    # List responses carry next_page_token only for paginated requests or when there is a next page
+    paged = 'next_page_token' in method.output_type.fields_by_name and not method.server_streaming
+    if paged:
+        unpaged_omit = tuple(route.omit) + ('next_page_token',)
+        unpaged_serializer = message_serializer(method.output_type, unpaged_omit)
+        unpaged_writer = message_writer(method.output_type, unpaged_omit)
+    unavailable_message = route.unavailable_message or route.service.unavailable_message
+
+    def view(**path_args):
+        token = None
+        if route.auth:
+            token = bearer_token()
+            if not token:
+                return error_response("Token missing", 401)
+
+        values = dict(route.defaults)
+        if route.body:
+            data = request.get_json(silent=True)
+            if data is None:
+                data = {}
+            if not isinstance(data, dict):
+                return error_response("Expected a JSON object", 400)
+            values.update((name, data[name]) for name in fields if data.get(name) is not None)
+        elif request.query_string:
+            for name, convert in query_fields:
+                value = request.args.get(name, type=convert)
+                if value is not None:
+                    values[name] = value
+        values.update(path_args)
+        if token and token_field:
+            values['token'] = token
+
+        if repeated:
+            for name in repeated.intersection(values):
+                if not isinstance(values[name], list):
+                    return error_response(f"{name} must be a list", 400)
+        try:
+            message = request_class(**values)
+        except (TypeError, ValueError) as e:
+            return error_response(f"Invalid request: {e}", 400)
+
+        call = getattr(get_stub(route.service.target, route.service.stub_class), route.rpc)
+        metadata = auth_metadata(token) if token else None
+        if method.server_streaming:
+            return ndjson_stream(call(message, metadata=metadata), serializer, unavailable_message)
+
+        try:
+            response = call(message, metadata=metadata)
+        except grpc.RpcError as e:
+            if route.busy_message and e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                return busy_response(route.busy_message)
+            return error_response(unavailable_message, 503)
+
+        status_code = route.statuses.get(response.status, route.error_status)
+        if status_code >= 300:
+            return json_response({"status": response.status, "message": response.message}, status_code)
+        if route.invalidates_user:
+            response_cache.invalidate(users=[getattr(message, route.invalidates_user)])
+        if route.render:
+            return json_response(route.render(response), status_code)
+        if paged and not response.next_page_token and not is_paginated():
+            return message_response(response, unpaged_serializer, unpaged_writer, status_code)
+        return message_response(response, serializer, writer, status_code)
+
+    view.__name__ = route.endpoint
+    view.__doc__ = f"{route.method} {route.path} -> {method.full_name}"
+    return view
+
+
+def add_routes(app, routes):
+    for route in routes:
+        view = route_view(route)
+        if route.cache_ttl is not None:
+            view = cached_response(route.cache_ttl, private=route.private)(view)
+        if route.invalidates is not None:
+            view = invalidates_cache(*route.invalidates)(view)
+        app.add_url_rule(route.path, route.endpoint, view, methods=[route.method])
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"C\n\x0fRegisterRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\x12\x0c\n\x04role\x18\x03 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\" \n\x0fValidateRequest\x12\r\n\x05token\x18\x01 \x01(\t\"]\n\x0c\x41uthResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05token\x18\x03 \x01(\t\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x0c\n\x04role\x18\x05 \x01(\t\"d\n\x10ValidateResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x10\n\x08username\x18\x05 \x01(\t2\xb5\x01\n\x0b\x41uthService\x12\x35\n\x08Register\x12\x15.auth.RegisterRequest\x1a\x12.auth.AuthResponse\x12/\n\x05Login\x12\x12.auth.LoginRequest\x1a\x12.auth.AuthResponse\x12>\n\rValidateToken\x12\x15.auth.ValidateRequest\x1a\x16.auth.ValidateResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"C\n\x0fRegisterRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\x12\x0c\n\x04role\x18\x03 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\" \n\x0fValidateRequest\x12\r\n\x05token\x18\x01 \x01(\t\"\'\n\x15ValidateTokensRequest\x12\x0e\n\x06tokens\x18\x01 \x03(\t\"\x1e\n\rRevokeRequest\x12\r\n\x05token\x18\x01 \x01(\t\"]\n\x0c\x41uthResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05token\x18\x03 \x01(\t\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x0c\n\x04role\x18\x05 \x01(\t\"d\n\x10ValidateResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x0c\n\x04role\x18\x04 \x01(\t\x12\x10\n\x08username\x18\x05 \x01(\t\"b\n\x16ValidateTokensResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\'\n\x07results\x18\x03 \x03(\x0b\x32\x16.auth.ValidateResponse\"1\n\x0eRevokeResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t2\xbc\x02\n\x0b\x41uthService\x12\x35\n\x08Register\x12\x15.auth.RegisterRequest\x1a\x12.auth.AuthResponse\x12/\n\x05Login\x12\x12.auth.LoginRequest\x1a\x12.auth.AuthResponse\x12>\n\rValidateToken\x12\x15.auth.ValidateRequest\x1a\x16.auth.ValidateResponse\x12K\n\x0eValidateTokens\x12\x1b.auth.ValidateTokensRequest\x1a\x1c.auth.ValidateTokensResponse\x12\x38\n\x0bRevokeToken\x12\x13.auth.RevokeRequest\x1a\x14.auth.RevokeResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,10 +37,18 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_LOGINREQUEST']._serialized_end=139
   _globals['_VALIDATEREQUEST']._serialized_start=141
   _globals['_VALIDATEREQUEST']._serialized_end=173
-  _globals['_AUTHRESPONSE']._serialized_start=175
-  _globals['_AUTHRESPONSE']._serialized_end=268
-  _globals['_VALIDATERESPONSE']._serialized_start=270
-  _globals['_VALIDATERESPONSE']._serialized_end=370
-  _globals['_AUTHSERVICE']._serialized_start=373
-  _globals['_AUTHSERVICE']._serialized_end=554
+  _globals['_VALIDATETOKENSREQUEST']._serialized_start=175
+  _globals['_VALIDATETOKENSREQUEST']._serialized_end=214
+  _globals['_REVOKEREQUEST']._serialized_start=216
+  _globals['_REVOKEREQUEST']._serialized_end=246
+  _globals['_AUTHRESPONSE']._serialized_start=248
+  _globals['_AUTHRESPONSE']._serialized_end=341
+  _globals['_VALIDATERESPONSE']._serialized_start=343
+  _globals['_VALIDATERESPONSE']._serialized_end=443
+  _globals['_VALIDATETOKENSRESPONSE']._serialized_start=445
+  _globals['_VALIDATETOKENSRESPONSE']._serialized_end=543
+  _globals['_REVOKERESPONSE']._serialized_start=545
+  _globals['_REVOKERESPONSE']._serialized_end=594
+  _globals['_AUTHSERVICE']._serialized_start=597
+  _globals['_AUTHSERVICE']._serialized_end=913
 # @@protoc_insertion_point(module_scope)
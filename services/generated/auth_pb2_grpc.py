@@ -50,6 +50,16 @@ class AuthServiceStub(object):
                 request_serializer=auth__pb2.ValidateRequest.SerializeToString,
                 response_deserializer=auth__pb2.ValidateResponse.FromString,
                 _registered_method=True)
+        self.ValidateTokens = channel.unary_unary(
+                '/auth.AuthService/ValidateTokens',
+                request_serializer=auth__pb2.ValidateTokensRequest.SerializeToString,
+                response_deserializer=auth__pb2.ValidateTokensResponse.FromString,
+                _registered_method=True)
+        self.RevokeToken = channel.unary_unary(
+                '/auth.AuthService/RevokeToken',
+                request_serializer=auth__pb2.RevokeRequest.SerializeToString,
+                response_deserializer=auth__pb2.RevokeResponse.FromString,
+                _registered_method=True)
 
 
 class AuthServiceServicer(object):
@@ -77,6 +87,20 @@ class AuthServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ValidateTokens(self, request, context):
+        """Validate many JWT tokens in one call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RevokeToken(self, request, context):
+        """Revoke a token before it expires (logout)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AuthServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -95,6 +119,16 @@ def add_AuthServiceServicer_to_server(servicer, server):
                     request_deserializer=auth__pb2.ValidateRequest.FromString,
                     response_serializer=auth__pb2.ValidateResponse.SerializeToString,
             ),
+            'ValidateTokens': grpc.unary_unary_rpc_method_handler(
+                    servicer.ValidateTokens,
+                    request_deserializer=auth__pb2.ValidateTokensRequest.FromString,
+                    response_serializer=auth__pb2.ValidateTokensResponse.SerializeToString,
+            ),
+            'RevokeToken': grpc.unary_unary_rpc_method_handler(
+                    servicer.RevokeToken,
+                    request_deserializer=auth__pb2.RevokeRequest.FromString,
+                    response_serializer=auth__pb2.RevokeResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'auth.AuthService', rpc_method_handlers)
@@ -187,3 +221,57 @@ class AuthService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ValidateTokens(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/ValidateTokens',
+            auth__pb2.ValidateTokensRequest.SerializeToString,
+            auth__pb2.ValidateTokensResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RevokeToken(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/RevokeToken',
+            auth__pb2.RevokeRequest.SerializeToString,
+            auth__pb2.RevokeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -45,6 +45,11 @@ class CourseServiceStub(object):
                 request_serializer=course__pb2.CourseRequest.SerializeToString,
                 response_deserializer=course__pb2.CourseResponse.FromString,
                 _registered_method=True)
+        self.StreamCourses = channel.unary_stream(
+                '/course.CourseService/StreamCourses',
+                request_serializer=course__pb2.GetCoursesRequest.SerializeToString,
+                response_deserializer=course__pb2.CourseInfo.FromString,
+                _registered_method=True)
 
 
 class CourseServiceServicer(object):
@@ -65,6 +70,13 @@ class CourseServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamCourses(self, request, context):
+        """Stream the catalog one course at a time, ordered by course_id
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_CourseServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -78,6 +90,11 @@ def add_CourseServiceServicer_to_server(servicer, server):
                     request_deserializer=course__pb2.CourseRequest.FromString,
                     response_serializer=course__pb2.CourseResponse.SerializeToString,
             ),
+            'StreamCourses': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamCourses,
+                    request_deserializer=course__pb2.GetCoursesRequest.FromString,
+                    response_serializer=course__pb2.CourseInfo.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'course.CourseService', rpc_method_handlers)
@@ -143,3 +160,30 @@ class CourseService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamCourses(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/course.CourseService/StreamCourses',
+            course__pb2.GetCoursesRequest.SerializeToString,
+            course__pb2.CourseInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
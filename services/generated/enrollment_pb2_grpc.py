@@ -50,6 +50,11 @@ class EnrollmentServiceStub(object):
                 request_serializer=enrollment__pb2.DropRequest.SerializeToString,
                 response_deserializer=enrollment__pb2.DropResponse.FromString,
                 _registered_method=True)
+        self.StreamStudentEnrollments = channel.unary_stream(
+                '/enrollment.EnrollmentService/StreamStudentEnrollments',
+                request_serializer=enrollment__pb2.StudentRequest.SerializeToString,
+                response_deserializer=enrollment__pb2.EnrollmentInfo.FromString,
+                _registered_method=True)
 
 
 class EnrollmentServiceServicer(object):
@@ -78,6 +83,13 @@ class EnrollmentServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamStudentEnrollments(self, request, context):
+        """Stream student's enrollments, ordered by course_id
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_EnrollmentServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -96,6 +108,11 @@ def add_EnrollmentServiceServicer_to_server(servicer, server):
                     request_deserializer=enrollment__pb2.DropRequest.FromString,
                     response_serializer=enrollment__pb2.DropResponse.SerializeToString,
             ),
+            'StreamStudentEnrollments': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamStudentEnrollments,
+                    request_deserializer=enrollment__pb2.StudentRequest.FromString,
+                    response_serializer=enrollment__pb2.EnrollmentInfo.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'enrollment.EnrollmentService', rpc_method_handlers)
@@ -188,3 +205,30 @@ class EnrollmentService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamStudentEnrollments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/enrollment.EnrollmentService/StreamStudentEnrollments',
+            enrollment__pb2.StudentRequest.SerializeToString,
+            enrollment__pb2.EnrollmentInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x66\x61\x63ulty_grades.proto\x12\x0e\x66\x61\x63ulty_grades\"#\n\x12GetStudentsRequest\x12\r\n\x05token\x18\x01 \x01(\t\":\n\x15GetEnrollmentsRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x12\n\nstudent_id\x18\x02 \x01(\t\"|\n\x12UploadGradeRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x12\n\nstudent_id\x18\x02 \x01(\t\x12\x11\n\tcourse_id\x18\x03 \x01(\t\x12\r\n\x05grade\x18\x04 \x01(\t\x12\x10\n\x08semester\x18\x05 \x01(\t\x12\x0f\n\x07remarks\x18\x06 \x01(\t\"b\n\x10StudentsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12-\n\x08students\x18\x03 \x03(\x0b\x32\x1b.faculty_grades.StudentInfo\"3\n\x0bStudentInfo\x12\x12\n\nstudent_id\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\"\xa0\x01\n\x1aStudentEnrollmentsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x12\n\nstudent_id\x18\x03 \x01(\t\x12\x18\n\x10student_username\x18\x04 \x01(\t\x12\x33\n\x0b\x65nrollments\x18\x05 \x03(\x0b\x32\x1e.faculty_grades.EnrollmentInfo\"Q\n\x0e\x45nrollmentInfo\x12\x11\n\tcourse_id\x18\x01 \x01(\t\x12\x13\n\x0b\x63ourse_name\x18\x02 \x01(\t\x12\x17\n\x0f\x65nrollment_date\x18\x03 \x01(\t\"H\n\x13UploadGradeResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08grade_id\x18\x03 \x01(\t2\xb9\x02\n\x14\x46\x61\x63ultyGradesService\x12V\n\x0eGetAllStudents\x12\".faculty_grades.GetStudentsRequest\x1a .faculty_grades.StudentsResponse\x12j\n\x15GetStudentEnrollments\x12%.faculty_grades.GetEnrollmentsRequest\x1a*.faculty_grades.StudentEnrollmentsResponse\x12]\n\x12UploadStudentGrade\x12\".faculty_grades.UploadGradeRequest\x1a#.faculty_grades.UploadGradeResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14\x66\x61\x63ulty_grades.proto\x12\x0e\x66\x61\x63ulty_grades\"J\n\x12GetStudentsRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\":\n\x15GetEnrollmentsRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x12\n\nstudent_id\x18\x02 \x01(\t\"|\n\x12UploadGradeRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x12\n\nstudent_id\x18\x02 \x01(\t\x12\x11\n\tcourse_id\x18\x03 \x01(\t\x12\r\n\x05grade\x18\x04 \x01(\t\x12\x10\n\x08semester\x18\x05 \x01(\t\x12\x0f\n\x07remarks\x18\x06 \x01(\t\"{\n\x10StudentsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12-\n\x08students\x18\x03 \x03(\x0b\x32\x1b.faculty_grades.StudentInfo\x12\x17\n\x0fnext_page_token\x18\x04 \x01(\t\"3\n\x0bStudentInfo\x12\x12\n\nstudent_id\x18\x01 \x01(\t\x12\x10\n\x08username\x18\x02 \x01(\t\"\xa0\x01\n\x1aStudentEnrollmentsResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x12\n\nstudent_id\x18\x03 \x01(\t\x12\x18\n\x10student_username\x18\x04 \x01(\t\x12\x33\n\x0b\x65nrollments\x18\x05 \x03(\x0b\x32\x1e.faculty_grades.EnrollmentInfo\"Q\n\x0e\x45nrollmentInfo\x12\x11\n\tcourse_id\x18\x01 \x01(\t\x12\x13\n\x0b\x63ourse_name\x18\x02 \x01(\t\x12\x17\n\x0f\x65nrollment_date\x18\x03 \x01(\t\"H\n\x13UploadGradeResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08grade_id\x18\x03 \x01(\t\"w\n\x0eGradeRowResult\x12\x0b\n\x03row\x18\x01 \x01(\x05\x12\x12\n\nstudent_id\x18\x02 \x01(\t\x12\x11\n\tcourse_id\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\x12\x0f\n\x07message\x18\x05 \x01(\t\x12\x10\n\x08grade_id\x18\x06 \x01(\t\"\xa0\x01\n\x19UploadGradesBatchResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x10\n\x08inserted\x18\x03 \x01(\x05\x12\x0f\n\x07updated\x18\x04 \x01(\x05\x12\x0e\n\x06\x66\x61iled\x18\x05 \x01(\x05\x12/\n\x07results\x18\x06 \x03(\x0b\x32\x1e.faculty_grades.GradeRowResult2\xf7\x03\n\x14\x46\x61\x63ultyGradesService\x12V\n\x0eGetAllStudents\x12\".faculty_grades.GetStudentsRequest\x1a .faculty_grades.StudentsResponse\x12V\n\x11StreamAllStudents\x12\".faculty_grades.GetStudentsRequest\x1a\x1b.faculty_grades.StudentInfo0\x01\x12j\n\x15GetStudentEnrollments\x12%.faculty_grades.GetEnrollmentsRequest\x1a*.faculty_grades.StudentEnrollmentsResponse\x12]\n\x12UploadStudentGrade\x12\".faculty_grades.UploadGradeRequest\x1a#.faculty_grades.UploadGradeResponse\x12\x64\n\x11UploadGradesBatch\x12\".faculty_grades.UploadGradeRequest\x1a).faculty_grades.UploadGradesBatchResponse(\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,21 +32,25 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'faculty_grades_pb2', _globa
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_GETSTUDENTSREQUEST']._serialized_start=40
-  _globals['_GETSTUDENTSREQUEST']._serialized_end=75
-  _globals['_GETENROLLMENTSREQUEST']._serialized_start=77
-  _globals['_GETENROLLMENTSREQUEST']._serialized_end=135
-  _globals['_UPLOADGRADEREQUEST']._serialized_start=137
-  _globals['_UPLOADGRADEREQUEST']._serialized_end=261
-  _globals['_STUDENTSRESPONSE']._serialized_start=263
-  _globals['_STUDENTSRESPONSE']._serialized_end=361
-  _globals['_STUDENTINFO']._serialized_start=363
-  _globals['_STUDENTINFO']._serialized_end=414
-  _globals['_STUDENTENROLLMENTSRESPONSE']._serialized_start=417
-  _globals['_STUDENTENROLLMENTSRESPONSE']._serialized_end=577
-  _globals['_ENROLLMENTINFO']._serialized_start=579
-  _globals['_ENROLLMENTINFO']._serialized_end=660
-  _globals['_UPLOADGRADERESPONSE']._serialized_start=662
-  _globals['_UPLOADGRADERESPONSE']._serialized_end=734
-  _globals['_FACULTYGRADESSERVICE']._serialized_start=737
-  _globals['_FACULTYGRADESSERVICE']._serialized_end=1050
+  _globals['_GETSTUDENTSREQUEST']._serialized_end=114
+  _globals['_GETENROLLMENTSREQUEST']._serialized_start=116
+  _globals['_GETENROLLMENTSREQUEST']._serialized_end=174
+  _globals['_UPLOADGRADEREQUEST']._serialized_start=176
+  _globals['_UPLOADGRADEREQUEST']._serialized_end=300
+  _globals['_STUDENTSRESPONSE']._serialized_start=302
+  _globals['_STUDENTSRESPONSE']._serialized_end=425
+  _globals['_STUDENTINFO']._serialized_start=427
+  _globals['_STUDENTINFO']._serialized_end=478
+  _globals['_STUDENTENROLLMENTSRESPONSE']._serialized_start=481
+  _globals['_STUDENTENROLLMENTSRESPONSE']._serialized_end=641
+  _globals['_ENROLLMENTINFO']._serialized_start=643
+  _globals['_ENROLLMENTINFO']._serialized_end=724
+  _globals['_UPLOADGRADERESPONSE']._serialized_start=726
+  _globals['_UPLOADGRADERESPONSE']._serialized_end=798
+  _globals['_GRADEROWRESULT']._serialized_start=800
+  _globals['_GRADEROWRESULT']._serialized_end=919
+  _globals['_UPLOADGRADESBATCHRESPONSE']._serialized_start=922
+  _globals['_UPLOADGRADESBATCHRESPONSE']._serialized_end=1082
+  _globals['_FACULTYGRADESSERVICE']._serialized_start=1085
+  _globals['_FACULTYGRADESSERVICE']._serialized_end=1588
 # @@protoc_insertion_point(module_scope)
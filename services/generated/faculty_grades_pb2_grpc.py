@@ -40,6 +40,11 @@ class FacultyGradesServiceStub(object):
                 request_serializer=faculty__grades__pb2.GetStudentsRequest.SerializeToString,
                 response_deserializer=faculty__grades__pb2.StudentsResponse.FromString,
                 _registered_method=True)
+        self.StreamAllStudents = channel.unary_stream(
+                '/faculty_grades.FacultyGradesService/StreamAllStudents',
+                request_serializer=faculty__grades__pb2.GetStudentsRequest.SerializeToString,
+                response_deserializer=faculty__grades__pb2.StudentInfo.FromString,
+                _registered_method=True)
         self.GetStudentEnrollments = channel.unary_unary(
                 '/faculty_grades.FacultyGradesService/GetStudentEnrollments',
                 request_serializer=faculty__grades__pb2.GetEnrollmentsRequest.SerializeToString,
@@ -50,6 +55,11 @@ class FacultyGradesServiceStub(object):
                 request_serializer=faculty__grades__pb2.UploadGradeRequest.SerializeToString,
                 response_deserializer=faculty__grades__pb2.UploadGradeResponse.FromString,
                 _registered_method=True)
+        self.UploadGradesBatch = channel.stream_unary(
+                '/faculty_grades.FacultyGradesService/UploadGradesBatch',
+                request_serializer=faculty__grades__pb2.UploadGradeRequest.SerializeToString,
+                response_deserializer=faculty__grades__pb2.UploadGradesBatchResponse.FromString,
+                _registered_method=True)
 
 
 class FacultyGradesServiceServicer(object):
@@ -63,6 +73,13 @@ class FacultyGradesServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamAllStudents(self, request, context):
+        """Stream all students, ordered by username (Faculty only)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def GetStudentEnrollments(self, request, context):
         """Get all courses a specific student is enrolled in (Faculty only)
         """
@@ -77,6 +94,13 @@ class FacultyGradesServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def UploadGradesBatch(self, request_iterator, context):
+        """Upload many grades in one call, one UploadGradeRequest per streamed message (Faculty only)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_FacultyGradesServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -85,6 +109,11 @@ def add_FacultyGradesServiceServicer_to_server(servicer, server):
                     request_deserializer=faculty__grades__pb2.GetStudentsRequest.FromString,
                     response_serializer=faculty__grades__pb2.StudentsResponse.SerializeToString,
             ),
+            'StreamAllStudents': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamAllStudents,
+                    request_deserializer=faculty__grades__pb2.GetStudentsRequest.FromString,
+                    response_serializer=faculty__grades__pb2.StudentInfo.SerializeToString,
+            ),
             'GetStudentEnrollments': grpc.unary_unary_rpc_method_handler(
                     servicer.GetStudentEnrollments,
                     request_deserializer=faculty__grades__pb2.GetEnrollmentsRequest.FromString,
@@ -95,6 +124,11 @@ def add_FacultyGradesServiceServicer_to_server(servicer, server):
                     request_deserializer=faculty__grades__pb2.UploadGradeRequest.FromString,
                     response_serializer=faculty__grades__pb2.UploadGradeResponse.SerializeToString,
             ),
+            'UploadGradesBatch': grpc.stream_unary_rpc_method_handler(
+                    servicer.UploadGradesBatch,
+                    request_deserializer=faculty__grades__pb2.UploadGradeRequest.FromString,
+                    response_serializer=faculty__grades__pb2.UploadGradesBatchResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'faculty_grades.FacultyGradesService', rpc_method_handlers)
@@ -134,6 +168,33 @@ class FacultyGradesService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamAllStudents(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/faculty_grades.FacultyGradesService/StreamAllStudents',
+            faculty__grades__pb2.GetStudentsRequest.SerializeToString,
+            faculty__grades__pb2.StudentInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def GetStudentEnrollments(request,
             target,
@@ -187,3 +248,30 @@ class FacultyGradesService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def UploadGradesBatch(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/faculty_grades.FacultyGradesService/UploadGradesBatch',
+            faculty__grades__pb2.UploadGradeRequest.SerializeToString,
+            faculty__grades__pb2.UploadGradesBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
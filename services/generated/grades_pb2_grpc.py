@@ -55,6 +55,11 @@ class GradesServiceStub(object):
                 request_serializer=grades__pb2.CourseGradesRequest.SerializeToString,
                 response_deserializer=grades__pb2.CourseGradesResponse.FromString,
                 _registered_method=True)
+        self.StreamCourseGrades = channel.unary_stream(
+                '/grades.GradesService/StreamCourseGrades',
+                request_serializer=grades__pb2.CourseGradesRequest.SerializeToString,
+                response_deserializer=grades__pb2.StudentGradeInfo.FromString,
+                _registered_method=True)
 
 
 class GradesServiceServicer(object):
@@ -89,6 +94,13 @@ class GradesServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamCourseGrades(self, request, context):
+        """Stream all grades for a course, ordered by student (Faculty view)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GradesServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -112,6 +124,11 @@ def add_GradesServiceServicer_to_server(servicer, server):
                     request_deserializer=grades__pb2.CourseGradesRequest.FromString,
                     response_serializer=grades__pb2.CourseGradesResponse.SerializeToString,
             ),
+            'StreamCourseGrades': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamCourseGrades,
+                    request_deserializer=grades__pb2.CourseGradesRequest.FromString,
+                    response_serializer=grades__pb2.StudentGradeInfo.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'grades.GradesService', rpc_method_handlers)
@@ -231,3 +248,30 @@ class GradesService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def StreamCourseGrades(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/grades.GradesService/StreamCourseGrades',
+            grades__pb2.CourseGradesRequest.SerializeToString,
+            grades__pb2.StudentGradeInfo.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,180 @@
+import itertools
+import json
+import os
+from collections import namedtuple
+
+from psycopg2.extras import execute_values
+
+from common_db import (
+    get_connection, release_connection, start_listener, stream_rows, DB_STREAM_BATCH_SIZE
+)
+
+# Read model of the grades database: local copies of course names, student usernames
+# and enrollments, so grade views never query another service's database. The course
+# and auth databases NOTIFY on every change; each notification re-reads the changed row
+# from its source and upserts (or deletes) the copy. After every listener (re)connect the
+# whole table is resynced, since notifications sent while disconnected are lost.
+
+POSTGRES_DB_COURSES = os.getenv('POSTGRES_DB_COURSES', 'student_portal_courses')
+POSTGRES_DB_AUTH = os.getenv('POSTGRES_DB_AUTH', 'student_portal_auth')
+
+# A grades-database table mirroring rows of another database. `source_query` selects every
+# row (key columns first), `source_row_query` the row(s) for the key parsed from a
+# notification payload.
+Projection = namedtuple('Projection', [
+    'table', 'key_columns', 'source_db', 'channel', 'parse_key',
+    'source_query', 'source_row_query', 'upsert_query', 'delete_query'
+])
+
+COURSE_NAMES = Projection(
+    table='course_names',
+    key_columns=('course_id',),
+    source_db=POSTGRES_DB_COURSES,
+    channel='course_changed',
+    parse_key=lambda payload: (payload,),
+    source_query="SELECT course_id, name FROM courses;",
+    source_row_query="SELECT course_id, name FROM courses WHERE course_id = %s;",
+    # Seat counts also fire course_changed; skip the write when the name is unchanged
+    upsert_query="""
+        INSERT INTO course_names (course_id, name) VALUES %s
+        ON CONFLICT (course_id) DO UPDATE SET name = EXCLUDED.name
+        WHERE course_names.name IS DISTINCT FROM EXCLUDED.name;
+    """,
+    delete_query="DELETE FROM course_names WHERE course_id = %s;"
+)
+
+STUDENT_NAMES = Projection(
+    table='student_names',
+    key_columns=('student_public_id',),
+    source_db=POSTGRES_DB_AUTH,
+    channel='user_changed',
+    parse_key=lambda payload: (payload,),
+    source_query="SELECT public_id, username FROM users WHERE role = 'student';",
+    source_row_query="SELECT public_id, username FROM users WHERE role = 'student' AND public_id = %s;",
+    upsert_query="""
+        INSERT INTO student_names (student_public_id, username) VALUES %s
+        ON CONFLICT (student_public_id) DO UPDATE SET username = EXCLUDED.username
+        WHERE student_names.username IS DISTINCT FROM EXCLUDED.username;
+    """,
+    delete_query="DELETE FROM student_names WHERE student_public_id = %s;"
+)
+
+STUDENT_ENROLLMENTS = Projection(
+    table='student_enrollments',
+    key_columns=('student_public_id', 'course_id'),
+    source_db=POSTGRES_DB_COURSES,
+    channel='enrollment_changed',
+    parse_key=json.loads,  # [student_public_id, course_id]
+    source_query="SELECT student_public_id, course_id, enrollment_date FROM enrollments;",
+    source_row_query="""
+        SELECT student_public_id, course_id, enrollment_date FROM enrollments
+        WHERE student_public_id = %s AND course_id = %s;
+    """,
+    upsert_query="""
+        INSERT INTO student_enrollments (student_public_id, course_id, enrollment_date) VALUES %s
+        ON CONFLICT (student_public_id, course_id) DO UPDATE SET enrollment_date = EXCLUDED.enrollment_date
+        WHERE student_enrollments.enrollment_date IS DISTINCT FROM EXCLUDED.enrollment_date;
+    """,
+    delete_query="DELETE FROM student_enrollments WHERE student_public_id = %s AND course_id = %s;"
+)
+
+PROJECTIONS = [COURSE_NAMES, STUDENT_NAMES, STUDENT_ENROLLMENTS]
+
+
+def _require_connection(dbname):
+    conn = get_connection(dbname)
+    if conn is None:
+        # Raised into the listener, which reconnects and rebuilds once the database is back
+        raise ConnectionError(f"{dbname} is unavailable")
+    return conn
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def rebuild(projection, dbname):
+    """
+    Bring the projection's table in line with the current source rows: upsert every
+    source row (unchanged rows are not written) and delete the rows whose key is gone
+    from the source. Only actual changes fire the table's triggers, so a resync after
+    a reconnect does not flood student_grades_changed listeners.
+    """
+    keys = ', '.join(projection.key_columns)
+    gone = ' AND '.join(f"k.{column} = t.{column}" for column in projection.key_columns)
+    source = _require_connection(projection.source_db)
+    try:
+        target = _require_connection(dbname)
+        try:
+            with target.cursor() as cur:
+                # Holds off refreshes (and other rebuilds) until commit, so none of their rows
+                # is deleted as missing; readers are not blocked
+                cur.execute(f"LOCK TABLE {projection.table} IN SHARE ROW EXCLUSIVE MODE;")
+                cur.execute(f"""
+                    CREATE TEMP TABLE rebuild_keys ON COMMIT DROP AS
+                    SELECT {keys} FROM {projection.table} WITH NO DATA;
+                """)
+                count = 0
+                for batch in _batches(stream_rows(source, projection.source_query), DB_STREAM_BATCH_SIZE):
+                    execute_values(cur, projection.upsert_query, batch, page_size=len(batch))
+                    execute_values(cur, "INSERT INTO rebuild_keys VALUES %s",
+                                   [row[:len(projection.key_columns)] for row in batch], page_size=len(batch))
+                    count += len(batch)
+                cur.execute(f"""
+                    DELETE FROM {projection.table} t
+                    WHERE NOT EXISTS (SELECT 1 FROM rebuild_keys k WHERE {gone});
+                """)
+                deleted = cur.rowcount
+            target.commit()
+            print(f"✓ Read model {projection.table} resynced ({count} rows, {deleted} deleted)")
+        except Exception:
+            target.rollback()
+            raise
+        finally:
+            release_connection(target)
+    finally:
+        source.rollback()
+        release_connection(source)
+
+
+def refresh(projection, dbname, key):
+    """Copy the source row(s) for one key, or delete the copy if the source row is gone"""
+    source = _require_connection(projection.source_db)
+    try:
+        with source.cursor() as cur:
+            cur.execute(projection.source_row_query, key)
+            rows = cur.fetchall()
+    finally:
+        source.rollback()
+        release_connection(source)
+
+    target = _require_connection(dbname)
+    try:
+        with target.cursor() as cur:
+            if rows:
+                execute_values(cur, projection.upsert_query, rows)
+            else:
+                cur.execute(projection.delete_query, key)
+        target.commit()
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        release_connection(target)
+
+
+def start_read_model_listeners(dbname):
+    """Keep every projection in `dbname` (the grades database) current from its source's notifications"""
+    for projection in PROJECTIONS:
+        def on_notify(payload, projection=projection):
+            if payload is None:
+                rebuild(projection, dbname)
+            else:
+                refresh(projection, dbname, projection.parse_key(payload))
+
+        start_listener(projection.source_db, projection.channel, on_notify)
@@ -6,74 +6,215 @@ sys.path.append('./generated')
 import auth_pb2
 import auth_pb2_grpc
 
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
-from datetime import datetime, timedelta, timezone
 import psycopg2
 import uuid
 import os
 
+from common_db import get_connection, release_connection, start_pool_stats_logger
+from common_migrations import Migration, PlanCheck, migrate
+from common_grpc import use_async_server
+from common_jwt import generate_token, decode_token, TokenRevokedError, JWT_EXPIRATION_HOURS
+from common_revocation import revoked_tokens, start_revocation_listener, REVOKED_TOKENS_QUERY
+from auth_passwords import password_hasher, PasswordHasherBusy, PASSWORD_HASH_MAX_PENDING
+
 POSTGRES_DB = os.getenv('POSTGRES_DB', 'student_portal_auth')
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
 
-JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super_secret_auth_key_12345')
-JWT_ALGORITHM = "HS256"
-JWT_EXPIRATION_HOURS = 24
+# Server threads; always leaves some free for ValidateToken while logins wait on hashing
+AUTH_GRPC_WORKERS = int(os.getenv('AUTH_GRPC_WORKERS', str(max(10, PASSWORD_HASH_MAX_PENDING + 2))))
+
+# Replace a password hash made with an outdated method or cost, unless it changed meanwhile
+REHASH_PASSWORD_QUERY = """
+    UPDATE users SET password_hash = %(new_hash)s
+    WHERE public_id = %(public_id)s AND password_hash = %(old_hash)s;
+"""
+
+# Record a revoked token until it would have expired anyway (the insert sends NOTIFY token_revoked)
+REVOKE_TOKEN_QUERY = """
+    INSERT INTO revoked_tokens (jti, public_id, expires_at)
+    VALUES (%(jti)s, %(public_id)s, to_timestamp(%(exp)s))
+    ON CONFLICT (jti) DO NOTHING;
+"""
+
+PURGE_REVOKED_TOKENS_QUERY = "DELETE FROM revoked_tokens WHERE expires_at <= now();"
+
+VALIDATE_BATCH_MAX_TOKENS = int(os.getenv('VALIDATE_BATCH_MAX_TOKENS', '1000'))
 
 def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        print(f"Database connection failed: {e}")
-        return None
+    """Check out a pooled connection to the auth database"""
+    return get_connection(POSTGRES_DB)
+
+# Schema of the auth database (see common_migrations); append new versions, never edit applied ones
+MIGRATIONS = [
+    Migration(1, 'create users', [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            public_id UUID UNIQUE NOT NULL,
+            username VARCHAR(80) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            role VARCHAR(50) NOT NULL DEFAULT 'student'
+        );
+        """
+    ], checks=[
+        PlanCheck('login lookup by username',
+                  "SELECT public_id, password_hash, role FROM users WHERE username = %s;",
+                  ('alice',), 'users'),
+    ]),
+    Migration(2, 'index users by role and username', [
+        # Serves the faculty student list: WHERE role = 'student' ORDER BY username, keyset on username
+        """
+        CREATE INDEX IF NOT EXISTS idx_users_role_username
+        ON users (role, username) INCLUDE (public_id);
+        """
+    ], checks=[
+        PlanCheck('student list page',
+                  """
+                  SELECT public_id, username FROM users
+                  WHERE role = 'student' AND username > %s
+                  ORDER BY username LIMIT 100;
+                  """,
+                  ('alice',), 'users'),
+    ]),
+    Migration(3, 'notify user changes', [
+        # Keeps the grades service's copy of student usernames current (see grades_read_model)
+        """
+        CREATE OR REPLACE FUNCTION notify_user_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('user_changed', COALESCE(NEW.public_id, OLD.public_id)::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS users_notify_changed ON users;",
+        """
+        CREATE TRIGGER users_notify_changed
+        AFTER INSERT OR UPDATE OF username, role OR DELETE ON users
+        FOR EACH ROW EXECUTE FUNCTION notify_user_changed();
+        """
+    ]),
+    Migration(4, 'revoked tokens', [
+        """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti VARCHAR(64) PRIMARY KEY,
+            public_id UUID NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            revoked_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at);",
+        # Replicates each revocation to the services' in-memory sets (see common_revocation)
+        """
+        CREATE OR REPLACE FUNCTION notify_token_revoked() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('token_revoked', NEW.jti || ' ' || EXTRACT(EPOCH FROM NEW.expires_at)::bigint);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS revoked_tokens_notify ON revoked_tokens;",
+        """
+        CREATE TRIGGER revoked_tokens_notify
+        AFTER INSERT ON revoked_tokens
+        FOR EACH ROW EXECUTE FUNCTION notify_token_revoked();
+        """
+    ], checks=[
+        PlanCheck('unexpired revocations', REVOKED_TOKENS_QUERY, (), 'revoked_tokens'),
+    ]),
+]
 
 def init_db():
+    if migrate(POSTGRES_DB, MIGRATIONS) is not None:
+        print("User table checked/created successfully.")
+
+def generate_jwt(public_id, username, role):
+    """Generate JWT token - public_id can be UUID or string"""
+    return generate_token(public_id, username, role)
+
+def save_rehashed_password(public_id, old_hash, new_hash):
+    """Store a password rehashed at the current PASSWORD_HASH_METHOD; failures only delay the upgrade"""
     conn = get_db_connection()
     if conn is None:
-        print("Cannot initialize DB without a connection.")
         return
-
-    create_table_query = """
-    CREATE TABLE IF NOT EXISTS users (
-        id SERIAL PRIMARY KEY,
-        public_id UUID UNIQUE NOT NULL,
-        username VARCHAR(80) UNIQUE NOT NULL,
-        password_hash VARCHAR(255) NOT NULL,
-        role VARCHAR(50) NOT NULL DEFAULT 'student'
-    );
-    """
     try:
         with conn.cursor() as cur:
-            cur.execute(create_table_query)
+            cur.execute(REHASH_PASSWORD_QUERY, {"public_id": str(public_id), "old_hash": old_hash, "new_hash": new_hash})
         conn.commit()
-        print("User table checked/created successfully.")
+        print(f"✓ Rehashed password for user {public_id}")
     except Exception as e:
-        print(f"Error initializing database: {e}")
+        conn.rollback()
+        print(f"✗ Could not store rehashed password for user {public_id}: {e}")
     finally:
-        conn.close()
+        release_connection(conn)
 
-def generate_jwt(public_id, username, role):
-    """Generate JWT token - public_id can be UUID or string"""
-    expiration_time = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
-    payload = {
-        'public_id': str(public_id),
-        'username': username,
-        'role': role,
-        'exp': expiration_time,
-        'iat': datetime.now(timezone.utc)
-    }
-    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
-    return token
+def validate_response(token):
+    """ValidateResponse for one token"""
+    if not token:
+        return auth_pb2.ValidateResponse(
+            status="invalid",
+            message="Token missing",
+            user_id="",
+            role="",
+            username=""
+        )
+    
+    try:
+        payload = decode_token(token)
+        return auth_pb2.ValidateResponse(
+            status="valid",
+            message="Token is valid",
+            user_id=payload['public_id'],
+            role=payload['role'],
+            username=payload['username']
+        )
+    except jwt.ExpiredSignatureError:
+        print(f"✗ Token validation failed: Token expired")
+        return auth_pb2.ValidateResponse(
+            status="invalid",
+            message="Token expired",
+            user_id="",
+            role="",
+            username=""
+        )
+    except TokenRevokedError:
+        print(f"✗ Token validation failed: Token revoked")
+        return auth_pb2.ValidateResponse(
+            status="invalid",
+            message="Token revoked",
+            user_id="",
+            role="",
+            username=""
+        )
+    except jwt.InvalidTokenError as e:
+        print(f"✗ Token validation failed: Invalid token - {e}")
+        return auth_pb2.ValidateResponse(
+            status="invalid",
+            message="Invalid token",
+            user_id="",
+            role="",
+            username=""
+        )
+
+def validate_tokens_response(tokens):
+    """ValidateTokensResponse for a batch; each distinct token is checked once"""
+    if len(tokens) > VALIDATE_BATCH_MAX_TOKENS:
+        return auth_pb2.ValidateTokensResponse(
+            status="error",
+            message=f"At most {VALIDATE_BATCH_MAX_TOKENS} tokens per call",
+            results=[]
+        )
+
+    # decode_token's claims cache is shared with ValidateToken and across batches
+    results = {}
+    for token in tokens:
+        if token not in results:
+            results[token] = validate_response(token)
+
+    return auth_pb2.ValidateTokensResponse(
+        status="success",
+        message=f"Validated {len(results)} distinct tokens",
+        results=[results[token] for token in tokens]
+    )
 
 class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
     
@@ -91,6 +232,21 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
                 role=""
             )
 
+        # Hash before checking out a connection, so slow hashing does not hold one
+        try:
+            password_hash = password_hasher.hash(password).result()
+        except PasswordHasherBusy as e:
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        except Exception as e:
+            print(f"✗ Registration error for user '{username}': {type(e).__name__}: {e}")
+            return auth_pb2.AuthResponse(
+                status="error",
+                message="An internal error occurred during registration",
+                token="",
+                user_id="",
+                role=""
+            )
+
         conn = get_db_connection()
         if conn is None:
             return auth_pb2.AuthResponse(
@@ -102,7 +258,6 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
             )
 
         try:
-            password_hash = generate_password_hash(password)
             public_id = uuid.uuid4()
             
             with conn.cursor() as cur:
@@ -151,7 +306,7 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
                 role=""
             )
         finally:
-            conn.close()
+            release_connection(conn)
 
     def Login(self, request, context):
         username = request.username
@@ -183,31 +338,6 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
                 """
                 cur.execute(select_query, (username,))
                 result = cur.fetchone()
-                
-                if result and check_password_hash(result[1], password):
-                    user_public_id = result[0]  # string from DB
-                    user_role = result[2]
-                    
-                    token = generate_jwt(user_public_id, username, user_role)
-                    
-                    print(f"✓ User '{username}' logged in successfully")
-                    
-                    return auth_pb2.AuthResponse(
-                        status="success",
-                        message="Login successful",
-                        token=token,
-                        user_id=str(user_public_id),
-                        role=user_role
-                    )
-                else:
-                    print(f"✗ Login failed for user '{username}': Invalid credentials")
-                    return auth_pb2.AuthResponse(
-                        status="error",
-                        message="Invalid credentials",
-                        token="",
-                        user_id="",
-                        role=""
-                    )
         except Exception as e:
             print(f"✗ Login error for user '{username}': {type(e).__name__}: {e}")
             import traceback
@@ -220,51 +350,102 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
                 role=""
             )
         finally:
-            conn.close()
+            # Release before verifying, so slow hashing does not hold the connection
+            release_connection(conn)
 
-    def ValidateToken(self, request, context):
-        token = request.token
-        
-        if not token:
-            return auth_pb2.ValidateResponse(
-                status="invalid",
-                message="Token missing",
+        verified, new_hash = False, None
+        if result:
+            try:
+                verified, new_hash = password_hasher.verify(result[1], password).result()
+            except PasswordHasherBusy as e:
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+            except Exception as e:
+                print(f"✗ Password check failed for user '{username}': {type(e).__name__}: {e}")
+                return auth_pb2.AuthResponse(
+                    status="error",
+                    message="Internal server error",
+                    token="",
+                    user_id="",
+                    role=""
+                )
+
+        if not verified:
+            print(f"✗ Login failed for user '{username}': Invalid credentials")
+            return auth_pb2.AuthResponse(
+                status="error",
+                message="Invalid credentials",
+                token="",
                 user_id="",
-                role="",
-                username=""
+                role=""
             )
-        
+
+        user_public_id = result[0]  # string from DB
+        user_role = result[2]
+
+        if new_hash:
+            save_rehashed_password(user_public_id, result[1], new_hash)
+
+        token = generate_jwt(user_public_id, username, user_role)
+
+        print(f"✓ User '{username}' logged in successfully")
+
+        return auth_pb2.AuthResponse(
+            status="success",
+            message="Login successful",
+            token=token,
+            user_id=str(user_public_id),
+            role=user_role
+        )
+
+    def ValidateToken(self, request, context):
+        return validate_response(request.token)
+
+    def ValidateTokens(self, request, context):
+        return validate_tokens_response(request.tokens)
+
+    def RevokeToken(self, request, context):
+        """Revoke a token (logout); services reject it from then on, until it expires"""
         try:
-            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-            return auth_pb2.ValidateResponse(
-                status="valid",
-                message="Token is valid",
-                user_id=payload['public_id'],
-                role=payload['role'],
-                username=payload['username']
-            )
-        except jwt.ExpiredSignatureError:
-            print(f"✗ Token validation failed: Token expired")
-            return auth_pb2.ValidateResponse(
-                status="invalid",
-                message="Token expired",
-                user_id="",
-                role="",
-                username=""
-            )
-        except jwt.InvalidTokenError as e:
-            print(f"✗ Token validation failed: Invalid token - {e}")
-            return auth_pb2.ValidateResponse(
-                status="invalid",
-                message="Invalid token",
-                user_id="",
-                role="",
-                username=""
-            )
+            claims = decode_token(request.token)
+        except (TokenRevokedError, jwt.ExpiredSignatureError):
+            return auth_pb2.RevokeResponse(status="success", message="Token is no longer valid")
+        except jwt.InvalidTokenError:
+            return auth_pb2.RevokeResponse(status="error", message="Invalid token")
+
+        if not claims.get('jti'):
+            # Issued before tokens carried an id; it can only expire
+            return auth_pb2.RevokeResponse(status="error", message="Token cannot be revoked")
+
+        conn = get_db_connection()
+        if conn is None:
+            return auth_pb2.RevokeResponse(status="error", message="Database connection error")
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute(REVOKE_TOKEN_QUERY, {
+                    "jti": claims['jti'], "public_id": claims['public_id'], "exp": claims['exp']
+                })
+                cur.execute(PURGE_REVOKED_TOKENS_QUERY)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"✗ Token revocation error: {type(e).__name__}: {e}")
+            return auth_pb2.RevokeResponse(status="error", message="Internal server error")
+        finally:
+            release_connection(conn)
+
+        # Other replicas and services learn about it through NOTIFY token_revoked
+        revoked_tokens.add(claims['jti'], claims['exp'])
+        print(f"✓ Revoked token {claims['jti']} of user {claims['username']}")
+        return auth_pb2.RevokeResponse(status="success", message="Token revoked")
 
 def serve():
     init_db()
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    start_revocation_listener(POSTGRES_DB)
+    start_pool_stats_logger()
+    # Start the hashing workers now rather than on the first login
+    password_hasher.start()
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=AUTH_GRPC_WORKERS))
     auth_pb2_grpc.add_AuthServiceServicer_to_server(AuthServiceServicer(), server)
     server.add_insecure_port('[::]:50051')
     print("=" * 70)
@@ -275,4 +456,9 @@ def serve():
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if use_async_server():
+        import asyncio
+        from grpc_auth_server_aio import serve_async
+        asyncio.run(serve_async())
+    else:
+        serve()
\ No newline at end of file
@@ -0,0 +1,195 @@
+import grpc
+import asyncio
+import sys
+sys.path.append('./generated')
+
+import auth_pb2
+import auth_pb2_grpc
+
+import jwt
+import uuid
+import asyncpg
+
+from common_db import async_connection, close_all_async_pools, to_asyncpg, start_pool_stats_logger
+from common_jwt import decode_token, TokenRevokedError
+from common_revocation import revoked_tokens, start_revocation_listener
+from auth_passwords import password_hasher, PasswordHasherBusy
+from grpc_auth_server import (
+    POSTGRES_DB, JWT_EXPIRATION_HOURS, REHASH_PASSWORD_QUERY, REVOKE_TOKEN_QUERY, PURGE_REVOKED_TOKENS_QUERY,
+    init_db, generate_jwt, validate_response, validate_tokens_response
+)
+
+# grpc.aio variant of the Auth Service, backed by asyncpg pools.
+# Start with: python grpc_auth_server.py --aio  (or GRPC_ASYNC=true)
+
+def auth_error(message):
+    return auth_pb2.AuthResponse(status="error", message=message, token="", user_id="", role="")
+
+async def save_rehashed_password(public_id, old_hash, new_hash):
+    """Store a password rehashed at the current PASSWORD_HASH_METHOD; failures only delay the upgrade"""
+    async with async_connection(POSTGRES_DB) as conn:
+        if conn is None:
+            return
+        try:
+            query, args = to_asyncpg(REHASH_PASSWORD_QUERY, {"public_id": public_id, "old_hash": old_hash, "new_hash": new_hash})
+            await conn.execute(query, *args)
+            print(f"✓ Rehashed password for user {public_id}")
+        except Exception as e:
+            print(f"✗ Could not store rehashed password for user {public_id}: {e}")
+
+class AsyncAuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
+    
+    async def Register(self, request, context):
+        username = request.username
+        password = request.password
+        role = request.role or 'student'
+
+        if not username or not password:
+            return auth_error("Missing username or password")
+
+        # Password hashing is CPU-bound; it runs in the password_hasher process pool
+        try:
+            password_hash = await asyncio.wrap_future(password_hasher.hash(password))
+        except PasswordHasherBusy as e:
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+        except Exception as e:
+            print(f"✗ Registration error for user '{username}': {type(e).__name__}: {e}")
+            return auth_error("An internal error occurred during registration")
+        public_id = uuid.uuid4()
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return auth_error("Database connection error")
+
+            try:
+                await conn.execute("""
+                    INSERT INTO users (public_id, username, password_hash, role) 
+                    VALUES ($1, $2, $3, $4);
+                """, public_id, username, password_hash, role)
+            except asyncpg.UniqueViolationError:
+                print(f"✗ Registration failed: Username '{username}' already exists")
+                return auth_error(f"User '{username}' already exists")
+            except Exception as e:
+                print(f"✗ Registration error for user '{username}': {type(e).__name__}: {e}")
+                return auth_error("An internal error occurred during registration")
+
+        token = generate_jwt(public_id, username, role)
+        print(f"✓ User '{username}' registered successfully with ID: {public_id}")
+
+        return auth_pb2.AuthResponse(
+            status="success",
+            message=f"User {username} successfully registered",
+            token=token,
+            user_id=str(public_id),
+            role=role
+        )
+
+    async def Login(self, request, context):
+        username = request.username
+        password = request.password
+
+        if not username or not password:
+            return auth_error("Missing username or password")
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return auth_error("Database connection error")
+
+            try:
+                result = await conn.fetchrow("""
+                    SELECT public_id, password_hash, role FROM users WHERE username = $1;
+                """, username)
+            except Exception as e:
+                print(f"✗ Login error for user '{username}': {type(e).__name__}: {e}")
+                return auth_error("Internal server error")
+
+        verified, new_hash = False, None
+        if result:
+            try:
+                verified, new_hash = await asyncio.wrap_future(
+                    password_hasher.verify(result['password_hash'], password)
+                )
+            except PasswordHasherBusy as e:
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+            except Exception as e:
+                print(f"✗ Password check failed for user '{username}': {type(e).__name__}: {e}")
+                return auth_error("Internal server error")
+
+        if verified:
+            if new_hash:
+                await save_rehashed_password(result['public_id'], result['password_hash'], new_hash)
+
+            token = generate_jwt(result['public_id'], username, result['role'])
+            print(f"✓ User '{username}' logged in successfully")
+
+            return auth_pb2.AuthResponse(
+                status="success",
+                message="Login successful",
+                token=token,
+                user_id=str(result['public_id']),
+                role=result['role']
+            )
+
+        print(f"✗ Login failed for user '{username}': Invalid credentials")
+        return auth_error("Invalid credentials")
+
+    async def ValidateToken(self, request, context):
+        return validate_response(request.token)
+
+    async def ValidateTokens(self, request, context):
+        return validate_tokens_response(request.tokens)
+
+    async def RevokeToken(self, request, context):
+        """Revoke a token (logout); services reject it from then on, until it expires"""
+        try:
+            claims = decode_token(request.token)
+        except (TokenRevokedError, jwt.ExpiredSignatureError):
+            return auth_pb2.RevokeResponse(status="success", message="Token is no longer valid")
+        except jwt.InvalidTokenError:
+            return auth_pb2.RevokeResponse(status="error", message="Invalid token")
+
+        if not claims.get('jti'):
+            # Issued before tokens carried an id; it can only expire
+            return auth_pb2.RevokeResponse(status="error", message="Token cannot be revoked")
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return auth_pb2.RevokeResponse(status="error", message="Database connection error")
+
+            try:
+                query, args = to_asyncpg(REVOKE_TOKEN_QUERY, {
+                    "jti": claims['jti'], "public_id": claims['public_id'], "exp": claims['exp']
+                })
+                async with conn.transaction():
+                    await conn.execute(query, *args)
+                    await conn.execute(PURGE_REVOKED_TOKENS_QUERY)
+            except Exception as e:
+                print(f"✗ Token revocation error: {type(e).__name__}: {e}")
+                return auth_pb2.RevokeResponse(status="error", message="Internal server error")
+
+        # Other replicas and services learn about it through NOTIFY token_revoked
+        revoked_tokens.add(claims['jti'], claims['exp'])
+        print(f"✓ Revoked token {claims['jti']} of user {claims['username']}")
+        return auth_pb2.RevokeResponse(status="success", message="Token revoked")
+
+async def serve_async():
+    init_db()
+    start_revocation_listener(POSTGRES_DB)
+    start_pool_stats_logger()
+    # Start the hashing workers now rather than on the first login
+    password_hasher.start()
+    server = grpc.aio.server()
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(AsyncAuthServiceServicer(), server)
+    server.add_insecure_port('[::]:50051')
+    print("=" * 70)
+    print("gRPC Auth Service (asyncio) starting on port 50051...")
+    print(f"JWT Token Expiration: {JWT_EXPIRATION_HOURS} hours")
+    print("=" * 70)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await close_all_async_pools()
+
+if __name__ == '__main__':
+    asyncio.run(serve_async())
\ No newline at end of file
@@ -9,30 +9,201 @@ import course_pb2_grpc
 import psycopg2
 from psycopg2.extras import DictCursor
 import os
+import threading
+import time
+
+from common_db import (
+    get_connection, release_connection, start_listener, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page, stream_rows
+)
+from common_grpc import use_async_server
+from common_migrations import Migration, PlanCheck, migrate
+from common_singleflight import SingleFlight
 
 # Configuration
 POSTGRES_DB = os.getenv('POSTGRES_DB', 'student_portal_courses')
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
+
+# Catalog cache: longest a cached catalog (and its seat counts) may be served
+# without being reloaded, even if a change notification is missed. 0 disables it.
+COURSE_CACHE_MAX_STALENESS = float(os.getenv('COURSE_CACHE_MAX_STALENESS', '30'))
+COURSE_CHANGED_CHANNEL = 'course_changed'
+
+# Seconds between metrics log lines (catalog cache and request coalescing); 0 disables them
+COURSE_STATS_INTERVAL = float(os.getenv('COURSE_STATS_INTERVAL', '60'))
+
+# Catalog in course_id order, starting after the keyset `after` (NULL = from the start)
+COURSES_QUERY = """
+    SELECT course_id, name, capacity, enrolled, is_open 
+    FROM courses 
+    WHERE %(after)s::text IS NULL OR course_id > %(after)s
+    ORDER BY course_id
+    LIMIT %(limit)s;
+"""
+
+class CatalogCache:
+    """
+    Serialized GetCoursesResponse kept in memory between catalog changes.
+    Dropped whenever a course row changes (via NOTIFY) and never served older
+    than `max_staleness` seconds.
+    """
+
+    def __init__(self, max_staleness=COURSE_CACHE_MAX_STALENESS):
+        self.max_staleness = max_staleness
+        self._lock = threading.Lock()
+        self._payload = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self):
+        """Return (payload, generation); payload is None on a miss, and generation must be passed to put()"""
+        with self._lock:
+            if self._payload is not None and time.monotonic() - self._loaded_at < self.max_staleness:
+                self.hits += 1
+                return self._payload, self._generation
+            self.misses += 1
+            return None, self._generation
+
+    def put(self, payload, generation):
+        with self._lock:
+            # Skip the store if the catalog changed while it was being loaded
+            if generation == self._generation:
+                self._payload = payload
+                self._loaded_at = time.monotonic()
+
+    @property
+    def generation(self):
+        """Bumped on every course change; part of the course_flight keys"""
+        return self._generation
+
+    def invalidate(self, course_id=None):
+        with self._lock:
+            self._generation += 1
+            self._payload = None
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "cached": self._payload is not None
+            }
+
+catalog_cache = CatalogCache()
+
+# Coalesces concurrent identical GetCourses / GetCourseDetails calls into one query. Keys
+# include the catalog generation, so a call arriving after a course change never joins
+# (and gets the result of) a query that started before it.
+course_flight = SingleFlight()
+
+def log_stats_forever(flight):
+    while True:
+        time.sleep(COURSE_STATS_INTERVAL)
+        print(f"Course service stats: catalog cache {catalog_cache.stats()}, coalescing {flight.stats()}")
+
+def start_stats_logger(flight):
+    """Print catalog cache and coalescing metrics every COURSE_STATS_INTERVAL seconds"""
+    if COURSE_STATS_INTERVAL > 0:
+        threading.Thread(target=log_stats_forever, args=(flight,), name="course-stats", daemon=True).start()
+
+def start_catalog_listener():
+    """Invalidate the catalog cache (and advance its generation) whenever the courses table changes"""
+    # Needed even with the cache disabled: course_flight keys use the generation
+    start_listener(POSTGRES_DB, COURSE_CHANGED_CHANNEL, catalog_cache.invalidate)
 
 def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        print(f"Database connection failed: {e}")
-        return None
+    """Check out a pooled connection to the courses database"""
+    return get_connection(POSTGRES_DB)
+
+# Schema of the courses database (see common_migrations); append new versions, never edit applied ones
+MIGRATIONS = [
+    Migration(1, 'create courses and enrollments', [
+        """
+        CREATE TABLE IF NOT EXISTS courses (
+            course_id VARCHAR(20) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            capacity INTEGER NOT NULL,
+            enrolled INTEGER DEFAULT 0,
+            is_open BOOLEAN DEFAULT TRUE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS enrollments (
+            id SERIAL PRIMARY KEY,
+            student_public_id UUID NOT NULL,
+            course_id VARCHAR(20) NOT NULL,
+            enrollment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(student_public_id, course_id)
+        );
+        """
+    ], checks=[
+        PlanCheck('student enrollments page',
+                  """
+                  SELECT course_id, enrollment_date FROM enrollments
+                  WHERE student_public_id = %s AND course_id > %s
+                  ORDER BY course_id LIMIT 100;
+                  """,
+                  ('00000000-0000-0000-0000-000000000001', 'CS101'), 'enrollments'),
+    ]),
+    Migration(2, 'notify course changes', [
+        # Publish every course change (including seat counts) for catalog caches
+        """
+        CREATE OR REPLACE FUNCTION notify_course_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('course_changed', COALESCE(NEW.course_id, OLD.course_id));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS courses_notify_changed ON courses;",
+        """
+        CREATE TRIGGER courses_notify_changed
+        AFTER INSERT OR UPDATE OR DELETE ON courses
+        FOR EACH ROW EXECUTE FUNCTION notify_course_changed();
+        """
+    ]),
+    Migration(3, 'index enrollments by course', [
+        # Course rosters look enrollments up by course_id alone
+        """
+        CREATE INDEX IF NOT EXISTS idx_enrollments_course
+        ON enrollments (course_id) INCLUDE (student_public_id);
+        """
+    ], checks=[
+        PlanCheck('course roster',
+                  "SELECT student_public_id FROM enrollments WHERE course_id = %s;",
+                  ('CS101',), 'enrollments'),
+    ]),
+    Migration(4, 'notify enrollment changes', [
+        # Keeps the grades service's copy of enrollments current (see grades_read_model)
+        """
+        CREATE OR REPLACE FUNCTION notify_enrollment_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('enrollment_changed', json_build_array(
+                COALESCE(NEW.student_public_id, OLD.student_public_id),
+                COALESCE(NEW.course_id, OLD.course_id)
+            )::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS enrollments_notify_changed ON enrollments;",
+        """
+        CREATE TRIGGER enrollments_notify_changed
+        AFTER INSERT OR UPDATE OR DELETE ON enrollments
+        FOR EACH ROW EXECUTE FUNCTION notify_enrollment_changed();
+        """
+    ]),
+]
 
 def init_db():
-    """Initialize courses database with sample data"""
+    """Migrate the courses database and insert sample data"""
+    if migrate(POSTGRES_DB, MIGRATIONS) is None:
+        return
+
     conn = get_db_connection()
     if conn is None:
         print("Cannot initialize DB without a connection.")
@@ -40,28 +211,6 @@ def init_db():
 
     try:
         with conn.cursor() as cur:
-            # Create courses table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS courses (
-                    course_id VARCHAR(20) PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    capacity INTEGER NOT NULL,
-                    enrolled INTEGER DEFAULT 0,
-                    is_open BOOLEAN DEFAULT TRUE
-                );
-            """)
-            
-            # Create enrollments table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS enrollments (
-                    id SERIAL PRIMARY KEY,
-                    student_public_id UUID NOT NULL,
-                    course_id VARCHAR(20) NOT NULL,
-                    enrollment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(student_public_id, course_id)
-                );
-            """)
-            
             # Insert sample courses if they don't exist
             cur.execute("SELECT COUNT(*) FROM courses;")
             if cur.fetchone()[0] == 0:
@@ -84,116 +233,193 @@ def init_db():
         print(f"Error initializing database: {e}")
         conn.rollback()
     finally:
-        conn.close()
+        release_connection(conn)
 
-class CourseServiceServicer(course_pb2_grpc.CourseServiceServicer):
+def course_info(row):
+    return course_pb2.CourseInfo(
+        course_id=row['course_id'],
+        name=row['name'],
+        capacity=row['capacity'],
+        enrolled=row['enrolled'],
+        is_open=row['is_open']
+    )
+
+def fetch_catalog(page_size=0, page_token=""):
+    """Load one keyset page of the catalog (the whole catalog for page_size 0) as a GetCoursesResponse"""
+    try:
+        after, = decode_page_token(page_token)
+    except ValueError as e:
+        return course_pb2.GetCoursesResponse(status="error", message=str(e), courses=[])
+
+    conn = get_db_connection()
+    if conn is None:
+        return course_pb2.GetCoursesResponse(
+            status="error",
+            message="Database connection error",
+            courses=[]
+        )
     
-    def GetCourses(self, request, context):
-        """Get all available courses"""
-        conn = get_db_connection()
-        if conn is None:
+    try:
+        limit = page_limit(page_size)
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            cur.execute(COURSES_QUERY, {"after": after, "limit": limit + 1 if limit else None})
+            rows, next_page_token = split_page(cur.fetchall(), limit, lambda row: [row['course_id']])
+            
             return course_pb2.GetCoursesResponse(
-                status="error",
-                message="Database connection error",
-                courses=[]
+                status="success",
+                message="Courses retrieved successfully",
+                courses=[course_info(row) for row in rows],
+                next_page_token=next_page_token
             )
-        
-        try:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT course_id, name, capacity, enrolled, is_open 
-                    FROM courses 
-                    ORDER BY course_id;
-                """)
-                rows = cur.fetchall()
-                
-                courses = []
-                for row in rows:
-                    course_info = course_pb2.CourseInfo(
-                        course_id=row['course_id'],
-                        name=row['name'],
-                        capacity=row['capacity'],
-                        enrolled=row['enrolled'],
-                        is_open=row['is_open']
-                    )
-                    courses.append(course_info)
-                
-                return course_pb2.GetCoursesResponse(
-                    status="success",
-                    message="Courses retrieved successfully",
-                    courses=courses
+    
+    except Exception as e:
+        print(f"Error fetching courses: {e}")
+        return course_pb2.GetCoursesResponse(
+            status="error",
+            message="Internal server error",
+            courses=[]
+        )
+    finally:
+        release_connection(conn)
+
+def fetch_course_details(course_id):
+    """Load one course as a CourseResponse"""
+    conn = get_db_connection()
+    if conn is None:
+        return course_pb2.CourseResponse(
+            status="error",
+            message="Database connection error",
+            course=None
+        )
+    
+    try:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            cur.execute("""
+                SELECT course_id, name, capacity, enrolled, is_open 
+                FROM courses 
+                WHERE course_id = %s;
+            """, (course_id,))
+            row = cur.fetchone()
+            
+            if row is None:
+                return course_pb2.CourseResponse(
+                    status="error",
+                    message=f"Course {course_id} not found",
+                    course=None
                 )
-        
-        except Exception as e:
-            print(f"Error fetching courses: {e}")
-            return course_pb2.GetCoursesResponse(
-                status="error",
-                message="Internal server error",
-                courses=[]
+            
+            return course_pb2.CourseResponse(
+                status="success",
+                message="Course details retrieved",
+                course=course_info(row)
             )
-        finally:
-            conn.close()
     
-    def GetCourseDetails(self, request, context):
-        """Get details of a specific course"""
-        course_id = request.course_id
-        
+    except Exception as e:
+        print(f"Error fetching course details: {e}")
+        return course_pb2.CourseResponse(
+            status="error",
+            message="Internal server error",
+            course=None
+        )
+    finally:
+        release_connection(conn)
+
+def load_catalog(generation):
+    """Fetch the whole catalog and cache it unless the catalog changed since `generation`"""
+    response = fetch_catalog()
+    if response.status == "success":
+        catalog_cache.put(response.SerializeToString(), generation)
+    return response
+
+class CourseServiceServicer(course_pb2_grpc.CourseServiceServicer):
+    
+    def GetCourses(self, request, context):
+        """Get all available courses (or one page of them), served from the catalog cache when fresh"""
+        # Concurrent identical requests share one query (see course_flight)
+        if request.page_size or request.page_token:
+            return course_flight.do(
+                ('GetCourses', request.page_size, request.page_token, catalog_cache.generation),
+                fetch_catalog, request.page_size, request.page_token
+            )
+
+        payload, generation = catalog_cache.lookup()
+        if payload is not None:
+            return payload
+
+        return course_flight.do(('GetCourses', 0, '', generation), load_catalog, generation)
+
+    def StreamCourses(self, request, context):
+        """Stream the catalog from a server-side cursor, resuming after page_token if given"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
         conn = get_db_connection()
         if conn is None:
-            return course_pb2.CourseResponse(
-                status="error",
-                message="Database connection error",
-                course=None
-            )
-        
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
         try:
-            with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT course_id, name, capacity, enrolled, is_open 
-                    FROM courses 
-                    WHERE course_id = %s;
-                """, (course_id,))
-                row = cur.fetchone()
-                
-                if row is None:
-                    return course_pb2.CourseResponse(
-                        status="error",
-                        message=f"Course {course_id} not found",
-                        course=None
-                    )
-                
-                course_info = course_pb2.CourseInfo(
-                    course_id=row['course_id'],
-                    name=row['name'],
-                    capacity=row['capacity'],
-                    enrolled=row['enrolled'],
-                    is_open=row['is_open']
-                )
-                
-                return course_pb2.CourseResponse(
-                    status="success",
-                    message="Course details retrieved",
-                    course=course_info
-                )
-        
-        except Exception as e:
-            print(f"Error fetching course details: {e}")
-            return course_pb2.CourseResponse(
-                status="error",
-                message="Internal server error",
-                course=None
-            )
+            params = {"after": after, "limit": page_limit(request.page_size)}
+            for row in stream_rows(conn, COURSES_QUERY, params):
+                yield course_info(row)
+        except psycopg2.Error as e:
+            print(f"Error streaming courses: {e}")
+            context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
         finally:
-            conn.close()
+            release_connection(conn)
+    
+    def GetCourseDetails(self, request, context):
+        """Get details of a specific course"""
+        return course_flight.do(
+            ('GetCourseDetails', request.course_id, catalog_cache.generation),
+            fetch_course_details, request.course_id
+        )
+
+def _serialize_courses_response(response):
+    # Cached catalog hits are already serialized
+    if isinstance(response, bytes):
+        return response
+    return response.SerializeToString()
+
+def add_course_service(servicer, server):
+    """Register the Course Service, letting GetCourses return pre-serialized bytes"""
+    rpc_method_handlers = {
+        'GetCourses': grpc.unary_unary_rpc_method_handler(
+            servicer.GetCourses,
+            request_deserializer=course_pb2.GetCoursesRequest.FromString,
+            response_serializer=_serialize_courses_response,
+        ),
+        'GetCourseDetails': grpc.unary_unary_rpc_method_handler(
+            servicer.GetCourseDetails,
+            request_deserializer=course_pb2.CourseRequest.FromString,
+            response_serializer=course_pb2.CourseResponse.SerializeToString,
+        ),
+        'StreamCourses': grpc.unary_stream_rpc_method_handler(
+            servicer.StreamCourses,
+            request_deserializer=course_pb2.GetCoursesRequest.FromString,
+            response_serializer=course_pb2.CourseInfo.SerializeToString,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler('course.CourseService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
 
 def serve():
     init_db()
+    start_catalog_listener()
+    start_stats_logger(course_flight)
+    start_pool_stats_logger()
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    course_pb2_grpc.add_CourseServiceServicer_to_server(CourseServiceServicer(), server)
+    add_course_service(CourseServiceServicer(), server)
     server.add_insecure_port('[::]:50052')
     print("gRPC Course Service starting on port 50052...")
     server.start()
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if use_async_server():
+        import asyncio
+        from grpc_course_server_aio import serve_async
+        asyncio.run(serve_async())
+    else:
+        serve()
\ No newline at end of file
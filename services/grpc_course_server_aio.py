@@ -0,0 +1,164 @@
+import grpc
+import asyncio
+import sys
+sys.path.append('./generated')
+
+import course_pb2
+import course_pb2_grpc
+
+import asyncpg
+
+from common_db import (
+    async_connection, close_all_async_pools, to_asyncpg, stream_async_rows, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page
+)
+from common_singleflight import AsyncSingleFlight
+from grpc_course_server import (
+    POSTGRES_DB, COURSES_QUERY, init_db, catalog_cache, start_catalog_listener, start_stats_logger,
+    add_course_service, course_info
+)
+
+# grpc.aio variant of the Course Service, backed by asyncpg pools.
+# Start with: python grpc_course_server.py --aio  (or GRPC_ASYNC=true)
+
+# Coalesces concurrent identical GetCourses / GetCourseDetails calls into one query
+course_flight = AsyncSingleFlight()
+
+class AsyncCourseServiceServicer(course_pb2_grpc.CourseServiceServicer):
+    
+    async def GetCourses(self, request, context):
+        """Get all available courses (or one page of them), served from the catalog cache when fresh"""
+        # Concurrent identical requests share one query (see course_flight)
+        if request.page_size or request.page_token:
+            return await course_flight.do(
+                ('GetCourses', request.page_size, request.page_token, catalog_cache.generation),
+                self.fetch_catalog, request.page_size, request.page_token
+            )
+
+        payload, generation = catalog_cache.lookup()
+        if payload is not None:
+            return payload
+
+        return await course_flight.do(('GetCourses', 0, '', generation), self.load_catalog, generation)
+
+    async def load_catalog(self, generation):
+        """Fetch the whole catalog and cache it unless the catalog changed since `generation`"""
+        response = await self.fetch_catalog()
+        if response.status == "success":
+            catalog_cache.put(response.SerializeToString(), generation)
+        return response
+
+    async def fetch_catalog(self, page_size=0, page_token=""):
+        try:
+            after, = decode_page_token(page_token)
+        except ValueError as e:
+            return course_pb2.GetCoursesResponse(status="error", message=str(e), courses=[])
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return course_pb2.GetCoursesResponse(
+                    status="error",
+                    message="Database connection error",
+                    courses=[]
+                )
+            
+            try:
+                limit = page_limit(page_size)
+                query, args = to_asyncpg(COURSES_QUERY, {"after": after, "limit": limit + 1 if limit else None})
+                rows, next_page_token = split_page(await conn.fetch(query, *args), limit, lambda row: [row['course_id']])
+                
+                return course_pb2.GetCoursesResponse(
+                    status="success",
+                    message="Courses retrieved successfully",
+                    courses=[course_info(row) for row in rows],
+                    next_page_token=next_page_token
+                )
+            
+            except Exception as e:
+                print(f"Error fetching courses: {e}")
+                return course_pb2.GetCoursesResponse(
+                    status="error",
+                    message="Internal server error",
+                    courses=[]
+                )
+
+    async def StreamCourses(self, request, context):
+        """Stream the catalog from a server-side cursor, resuming after page_token if given"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
+            query, args = to_asyncpg(COURSES_QUERY, {"after": after, "limit": page_limit(request.page_size)})
+            try:
+                async for row in stream_async_rows(conn, query, args):
+                    yield course_info(row)
+            except asyncpg.PostgresError as e:
+                print(f"Error streaming courses: {e}")
+                await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+    
+    async def GetCourseDetails(self, request, context):
+        """Get details of a specific course"""
+        return await course_flight.do(
+            ('GetCourseDetails', request.course_id, catalog_cache.generation),
+            self.fetch_course_details, request.course_id
+        )
+
+    async def fetch_course_details(self, course_id):
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return course_pb2.CourseResponse(
+                    status="error",
+                    message="Database connection error",
+                    course=None
+                )
+            
+            try:
+                row = await conn.fetchrow("""
+                    SELECT course_id, name, capacity, enrolled, is_open 
+                    FROM courses 
+                    WHERE course_id = $1;
+                """, course_id)
+                
+                if row is None:
+                    return course_pb2.CourseResponse(
+                        status="error",
+                        message=f"Course {course_id} not found",
+                        course=None
+                    )
+                
+                return course_pb2.CourseResponse(
+                    status="success",
+                    message="Course details retrieved",
+                    course=course_info(row)
+                )
+            
+            except Exception as e:
+                print(f"Error fetching course details: {e}")
+                return course_pb2.CourseResponse(
+                    status="error",
+                    message="Internal server error",
+                    course=None
+                )
+
+async def serve_async():
+    init_db()
+    start_catalog_listener()
+    start_stats_logger(course_flight)
+    start_pool_stats_logger()
+    server = grpc.aio.server()
+    add_course_service(AsyncCourseServiceServicer(), server)
+    server.add_insecure_port('[::]:50052')
+    print("gRPC Course Service (asyncio) starting on port 50052...")
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await close_all_async_pools()
+
+if __name__ == '__main__':
+    asyncio.run(serve_async())
@@ -9,104 +9,131 @@ import enrollment_pb2_grpc
 import psycopg2
 from psycopg2.extras import DictCursor
 import os
-import jwt
-from datetime import datetime, timezone
+
+from common_db import (
+    get_connection, release_connection, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page, stream_rows
+)
+from common_grpc import use_async_server
+from common_auth import AuthInterceptor, current_user
+from common_revocation import start_revocation_listener
 
 DB_NAME = os.getenv('POSTGRES_DB', 'student_portal_courses')
-DB_USER = os.getenv('POSTGRES_USER', 'postgres')
-DB_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
-DB_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-DB_PORT = os.getenv('POSTGRES_PORT', '5432')
 
-# JWT Configuration (must match auth server)
-JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super_secret_auth_key_12345')
-JWT_ALGORITHM = "HS256"
+# Claim a seat and record the enrollment in one statement. The conditional
+# UPDATE takes the course row lock and re-checks capacity under it, so
+# concurrent enrolls can never push `enrolled` past `capacity`.
+ENROLL_QUERY = """
+    WITH seat AS (
+        UPDATE courses
+        SET enrolled = enrolled + 1
+        WHERE course_id = %(course_id)s
+          AND is_open
+          AND enrolled < capacity
+          AND NOT EXISTS (
+              SELECT 1 FROM enrollments
+              WHERE student_public_id = %(user_id)s AND course_id = %(course_id)s
+          )
+        RETURNING course_id
+    ), added AS (
+        INSERT INTO enrollments (student_public_id, course_id)
+        SELECT %(user_id)s::uuid, course_id FROM seat
+        ON CONFLICT (student_public_id, course_id) DO NOTHING
+        RETURNING course_id
+    )
+    SELECT c.name, c.capacity, c.enrolled, c.is_open,
+           EXISTS (SELECT 1 FROM seat) AS seat_claimed,
+           EXISTS (SELECT 1 FROM added) AS enrolled_now,
+           EXISTS (
+               SELECT 1 FROM enrollments
+               WHERE student_public_id = %(user_id)s AND course_id = %(course_id)s
+           ) AS already_enrolled
+    FROM (SELECT 1) AS one
+    LEFT JOIN courses c ON c.course_id = %(course_id)s;
+"""
+
+# Remove the enrollment and release its seat in one round trip
+DROP_QUERY = """
+    WITH dropped AS (
+        DELETE FROM enrollments
+        WHERE student_public_id = %(user_id)s AND course_id = %(course_id)s
+        RETURNING course_id
+    ), seat AS (
+        UPDATE courses
+        SET enrolled = enrolled - 1
+        WHERE course_id IN (SELECT course_id FROM dropped) AND enrolled > 0
+        RETURNING name
+    )
+    SELECT EXISTS (SELECT 1 FROM dropped) AS dropped,
+           COALESCE(
+               (SELECT name FROM seat),
+               (SELECT name FROM courses WHERE course_id = %(course_id)s),
+               %(course_id)s
+           ) AS course_name;
+"""
+
+# A student's enrollments, most recent first (unpaginated responses)
+STUDENT_ENROLLMENTS_QUERY = """
+    SELECT e.course_id, c.name, e.enrollment_date 
+    FROM enrollments e
+    JOIN courses c ON e.course_id = c.course_id
+    WHERE e.student_public_id = %(user_id)s
+    ORDER BY e.enrollment_date DESC;
+"""
+
+# Keyset page of a student's enrollments in course_id order, starting after `after`
+STUDENT_ENROLLMENTS_PAGE_QUERY = """
+    SELECT e.course_id, c.name, e.enrollment_date 
+    FROM enrollments e
+    JOIN courses c ON e.course_id = c.course_id
+    WHERE e.student_public_id = %(user_id)s
+      AND (%(after)s::text IS NULL OR e.course_id > %(after)s)
+    ORDER BY e.course_id
+    LIMIT %(limit)s;
+"""
+
+def enrollment_info(row):
+    return enrollment_pb2.EnrollmentInfo(
+        course_id=row['course_id'],
+        course_name=row['name'],
+        enrollment_date=str(row['enrollment_date'])
+    )
+
+def enroll_rejection(course, course_id):
+    """Explain why ENROLL_QUERY did not enroll the student, from the row it returned"""
+    if course['name'] is None:
+        return enrollment_pb2.EnrollResponse(
+            status="error",
+            message=f"Course {course_id} not found"
+        )
 
-def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT
+    if not course['is_open']:
+        return enrollment_pb2.EnrollResponse(
+            status="error",
+            message=f"Course {course['name']} is not open for enrollment"
+        )
+
+    if course['already_enrolled'] or course['seat_claimed']:
+        return enrollment_pb2.EnrollResponse(
+            status="error",
+            message=f"You are already enrolled in {course['name']}"
         )
-        return conn
-    except psycopg2.Error as e:
-        print(f"Database connection error: {e}")
-        return None
-
-def validate_token_locally(token):
-    """Validate JWT token locally without calling auth service"""
-    if not token:
-        return {
-            "valid": False,
-            "message": "Token missing"
-        }
-    
-    try:
-        # Decode and verify the JWT token
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        
-        # Check if token has expired (jwt.decode already does this, but being explicit)
-        exp_timestamp = payload.get('exp')
-        if exp_timestamp:
-            exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-            if datetime.now(timezone.utc) > exp_datetime:
-                return {
-                    "valid": False,
-                    "message": "Token expired"
-                }
-        
-        return {
-            "valid": True,
-            "user_id": payload.get('public_id'),
-            "role": payload.get('role'),
-            "username": payload.get('username')
-        }
-    
-    except jwt.ExpiredSignatureError:
-        print(f"✗ Token validation failed: Token expired")
-        return {
-            "valid": False,
-            "message": "Token expired"
-        }
-    except jwt.InvalidTokenError as e:
-        print(f"✗ Token validation failed: Invalid token - {e}")
-        return {
-            "valid": False,
-            "message": "Invalid token"
-        }
-    except Exception as e:
-        print(f"✗ Token validation error: {e}")
-        return {
-            "valid": False,
-            "message": "Token validation error"
-        }
+
+    return enrollment_pb2.EnrollResponse(
+        status="error",
+        message=f"Course {course['name']} is full"
+    )
+
+def get_db_connection():
+    """Check out a pooled connection to the courses database"""
+    return get_connection(DB_NAME)
 
 class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
     
     def EnrollInCourse(self, request, context):
-        token = request.token
         course_id = request.course_id
 
-        # Use local JWT validation instead of calling auth service
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return enrollment_pb2.EnrollResponse(
-                status="error",
-                message=f"Authentication failed: {auth_result.get('message', 'Invalid token')}"
-            )
-
-        user_id = auth_result['user_id']
-        user_role = auth_result['role']
-
-        if user_role != 'student':
-            return enrollment_pb2.EnrollResponse(
-                status="rejected",
-                message=f"Only students can enroll. Your role is '{user_role}'"
-            )
+        user_id = current_user()['user_id']
 
         conn = get_db_connection()
         if conn is None:
@@ -118,38 +145,13 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
         try:
             cur = conn.cursor(cursor_factory=DictCursor)
 
-            cur.execute("SELECT name, capacity, enrolled, is_open FROM courses WHERE course_id = %s;", (course_id,))
+            cur.execute(ENROLL_QUERY, {"user_id": user_id, "course_id": course_id})
             course = cur.fetchone()
 
-            if course is None:
-                return enrollment_pb2.EnrollResponse(
-                    status="error",
-                    message=f"Course {course_id} not found"
-                )
-
-            if not course['is_open']:
-                return enrollment_pb2.EnrollResponse(
-                    status="error",
-                    message=f"Course {course['name']} is not open for enrollment"
-                )
-
-            if course['enrolled'] >= course['capacity']:
-                return enrollment_pb2.EnrollResponse(
-                    status="error",
-                    message=f"Course {course['name']} is full"
-                )
-
-            cur.execute("SELECT 1 FROM enrollments WHERE student_public_id = %s AND course_id = %s;", 
-                        (user_id, course_id))
-            if cur.fetchone() is not None:
-                return enrollment_pb2.EnrollResponse(
-                    status="error",
-                    message=f"You are already enrolled in {course['name']}"
-                )
-
-            cur.execute("UPDATE courses SET enrolled = enrolled + 1 WHERE course_id = %s;", (course_id,))
-            cur.execute("INSERT INTO enrollments (student_public_id, course_id) VALUES (%s, %s);", 
-                        (user_id, course_id))
+            if not course['enrolled_now']:
+                # Undo the seat claim if a concurrent request enrolled this student first
+                conn.rollback()
+                return enroll_rejection(course, course_id)
 
             conn.commit()
             print(f"✓ User {user_id} successfully enrolled in {course_id}")
@@ -167,23 +169,15 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
                 message="An internal error occurred during enrollment"
             )
         finally:
-            if conn:
-                conn.close()
+            release_connection(conn)
 
     def GetStudentEnrollments(self, request, context):
-        token = request.token
-
-        # Use local JWT validation
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return enrollment_pb2.EnrollmentsResponse(
-                status="error",
-                message="Authentication failed",
-                enrollments=[]
-            )
+        user_id = current_user()['user_id']
 
-        user_id = auth_result['user_id']
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            return enrollment_pb2.EnrollmentsResponse(status="error", message=str(e), enrollments=[])
 
         conn = get_db_connection()
         if conn is None:
@@ -195,29 +189,24 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
 
         try:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT e.course_id, c.name, e.enrollment_date 
-                    FROM enrollments e
-                    JOIN courses c ON e.course_id = c.course_id
-                    WHERE e.student_public_id = %s
-                    ORDER BY e.enrollment_date DESC;
-                """, (user_id,))
-                rows = cur.fetchall()
-
-                enrollments = []
-                for row in rows:
-                    enrollment_info = enrollment_pb2.EnrollmentInfo(
-                        course_id=row['course_id'],
-                        course_name=row['name'],
-                        enrollment_date=str(row['enrollment_date'])
-                    )
-                    enrollments.append(enrollment_info)
+                if request.page_size or request.page_token:
+                    limit = page_limit(request.page_size)
+                    cur.execute(STUDENT_ENROLLMENTS_PAGE_QUERY, {
+                        "user_id": user_id, "after": after, "limit": limit + 1 if limit else None
+                    })
+                    rows, next_page_token = split_page(cur.fetchall(), limit, lambda row: [row['course_id']])
+                else:
+                    cur.execute(STUDENT_ENROLLMENTS_QUERY, {"user_id": user_id})
+                    rows, next_page_token = cur.fetchall(), ""
+
+                enrollments = [enrollment_info(row) for row in rows]
 
                 print(f"✓ Retrieved {len(enrollments)} enrollments for user {user_id}")
                 return enrollment_pb2.EnrollmentsResponse(
                     status="success",
                     message="Enrollments retrieved",
-                    enrollments=enrollments
+                    enrollments=enrollments,
+                    next_page_token=next_page_token
                 )
 
         except Exception as e:
@@ -228,30 +217,35 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
                 enrollments=[]
             )
         finally:
-            if conn:
-                conn.close()
+            release_connection(conn)
 
-    def DropFromCourse(self, request, context):
-        token = request.token
-        course_id = request.course_id
+    def StreamStudentEnrollments(self, request, context):
+        """Stream the student's enrollments in course_id order from a server-side cursor"""
+        user_id = current_user()['user_id']
 
-        # Use local JWT validation
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return enrollment_pb2.DropResponse(
-                status="error",
-                message=f"Authentication failed: {auth_result.get('message', 'Invalid token')}"
-            )
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
 
-        user_id = auth_result['user_id']
-        user_role = auth_result['role']
+        conn = get_db_connection()
+        if conn is None:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Database unavailable")
 
-        if user_role != 'student':
-            return enrollment_pb2.DropResponse(
-                status="rejected",
-                message=f"Only students can drop a course. Your role is '{user_role}'"
-            )
+        try:
+            params = {"user_id": user_id, "after": after, "limit": page_limit(request.page_size)}
+            for row in stream_rows(conn, STUDENT_ENROLLMENTS_PAGE_QUERY, params):
+                yield enrollment_info(row)
+        except psycopg2.Error as e:
+            print(f"✗ Error streaming enrollments: {e}")
+            context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+        finally:
+            release_connection(conn)
+
+    def DropFromCourse(self, request, context):
+        course_id = request.course_id
+
+        user_id = current_user()['user_id']
 
         conn = get_db_connection()
         if conn is None:
@@ -263,22 +257,17 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
         try:
             cur = conn.cursor(cursor_factory=DictCursor)
 
-            cur.execute("SELECT 1 FROM enrollments WHERE student_public_id = %s AND course_id = %s;", 
-                        (user_id, course_id))
-            if cur.fetchone() is None:
+            cur.execute(DROP_QUERY, {"user_id": user_id, "course_id": course_id})
+            result = cur.fetchone()
+
+            if not result['dropped']:
+                conn.rollback()
                 return enrollment_pb2.DropResponse(
                     status="error",
                     message=f"You are not enrolled in course {course_id}"
                 )
 
-            cur.execute("SELECT name FROM courses WHERE course_id = %s;", (course_id,))
-            course = cur.fetchone()
-            course_name = course['name'] if course else course_id
-
-            cur.execute("DELETE FROM enrollments WHERE student_public_id = %s AND course_id = %s;", 
-                        (user_id, course_id))
-            cur.execute("UPDATE courses SET enrolled = enrolled - 1 WHERE course_id = %s AND enrolled > 0;", 
-                        (course_id,))
+            course_name = result['course_name']
 
             conn.commit()
             print(f"✓ User {user_id} successfully dropped from {course_id}")
@@ -296,11 +285,15 @@ class EnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
                 message="An internal error occurred during drop process"
             )
         finally:
-            if conn:
-                conn.close()
+            release_connection(conn)
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    start_revocation_listener()
+    start_pool_stats_logger()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        interceptors=[AuthInterceptor()]
+    )
     enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(EnrollmentServiceServicer(), server)
     server.add_insecure_port('[::]:50053')
     print("=" * 70)
@@ -311,4 +304,9 @@ def serve():
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if use_async_server():
+        import asyncio
+        from grpc_enrollment_server_aio import serve_async
+        asyncio.run(serve_async())
+    else:
+        serve()
\ No newline at end of file
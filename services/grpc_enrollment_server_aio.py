@@ -0,0 +1,185 @@
+import grpc
+import asyncio
+import sys
+sys.path.append('./generated')
+
+import enrollment_pb2
+import enrollment_pb2_grpc
+
+import asyncpg
+
+from common_db import (
+    async_connection, close_all_async_pools, to_asyncpg, stream_async_rows, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page
+)
+from common_auth import AsyncAuthInterceptor, current_user
+from common_revocation import start_revocation_listener
+from grpc_enrollment_server import (
+    DB_NAME, ENROLL_QUERY, DROP_QUERY, STUDENT_ENROLLMENTS_QUERY, STUDENT_ENROLLMENTS_PAGE_QUERY,
+    enroll_rejection, enrollment_info
+)
+
+# grpc.aio variant of the Enrollment Service, backed by asyncpg pools.
+# Start with: python grpc_enrollment_server.py --aio  (or GRPC_ASYNC=true)
+
+class AsyncEnrollmentServiceServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
+    
+    async def EnrollInCourse(self, request, context):
+        course_id = request.course_id
+        user_id = current_user()['user_id']
+
+        async with async_connection(DB_NAME) as conn:
+            if conn is None:
+                return enrollment_pb2.EnrollResponse(
+                    status="error",
+                    message="Database is unavailable"
+                )
+
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                query, args = to_asyncpg(ENROLL_QUERY, {"user_id": user_id, "course_id": course_id})
+                course = await conn.fetchrow(query, *args)
+
+                if not course['enrolled_now']:
+                    # Undo the seat claim if a concurrent request enrolled this student first
+                    await transaction.rollback()
+                    return enroll_rejection(course, course_id)
+
+                await transaction.commit()
+                print(f"✓ User {user_id} successfully enrolled in {course_id}")
+
+                return enrollment_pb2.EnrollResponse(
+                    status="success",
+                    message=f"Successfully enrolled in {course['name']}!"
+                )
+
+            except Exception as e:
+                await transaction.rollback()
+                print(f"✗ Enrollment error: {e}")
+                return enrollment_pb2.EnrollResponse(
+                    status="error",
+                    message="An internal error occurred during enrollment"
+                )
+
+    async def GetStudentEnrollments(self, request, context):
+        user_id = current_user()['user_id']
+
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            return enrollment_pb2.EnrollmentsResponse(status="error", message=str(e), enrollments=[])
+
+        async with async_connection(DB_NAME) as conn:
+            if conn is None:
+                return enrollment_pb2.EnrollmentsResponse(
+                    status="error",
+                    message="Database unavailable",
+                    enrollments=[]
+                )
+
+            try:
+                if request.page_size or request.page_token:
+                    limit = page_limit(request.page_size)
+                    query, args = to_asyncpg(STUDENT_ENROLLMENTS_PAGE_QUERY, {
+                        "user_id": user_id, "after": after, "limit": limit + 1 if limit else None
+                    })
+                    rows, next_page_token = split_page(await conn.fetch(query, *args), limit, lambda row: [row['course_id']])
+                else:
+                    query, args = to_asyncpg(STUDENT_ENROLLMENTS_QUERY, {"user_id": user_id})
+                    rows, next_page_token = await conn.fetch(query, *args), ""
+
+                enrollments = [enrollment_info(row) for row in rows]
+
+                print(f"✓ Retrieved {len(enrollments)} enrollments for user {user_id}")
+                return enrollment_pb2.EnrollmentsResponse(
+                    status="success",
+                    message="Enrollments retrieved",
+                    enrollments=enrollments,
+                    next_page_token=next_page_token
+                )
+
+            except Exception as e:
+                print(f"✗ Error fetching enrollments: {e}")
+                return enrollment_pb2.EnrollmentsResponse(
+                    status="error",
+                    message="Internal server error",
+                    enrollments=[]
+                )
+
+    async def StreamStudentEnrollments(self, request, context):
+        """Stream the student's enrollments in course_id order from a server-side cursor"""
+        user_id = current_user()['user_id']
+
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        async with async_connection(DB_NAME) as conn:
+            if conn is None:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "Database unavailable")
+
+            query, args = to_asyncpg(STUDENT_ENROLLMENTS_PAGE_QUERY, {
+                "user_id": user_id, "after": after, "limit": page_limit(request.page_size)
+            })
+            try:
+                async for row in stream_async_rows(conn, query, args):
+                    yield enrollment_info(row)
+            except asyncpg.PostgresError as e:
+                print(f"✗ Error streaming enrollments: {e}")
+                await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+    async def DropFromCourse(self, request, context):
+        course_id = request.course_id
+        user_id = current_user()['user_id']
+
+        async with async_connection(DB_NAME) as conn:
+            if conn is None:
+                return enrollment_pb2.DropResponse(
+                    status="error",
+                    message="Database is unavailable"
+                )
+
+            try:
+                # Single statement, so it commits atomically without an explicit transaction
+                query, args = to_asyncpg(DROP_QUERY, {"user_id": user_id, "course_id": course_id})
+                result = await conn.fetchrow(query, *args)
+
+                if not result['dropped']:
+                    return enrollment_pb2.DropResponse(
+                        status="error",
+                        message=f"You are not enrolled in course {course_id}"
+                    )
+
+                print(f"✓ User {user_id} successfully dropped from {course_id}")
+                return enrollment_pb2.DropResponse(
+                    status="success",
+                    message=f"Successfully dropped from {result['course_name']}."
+                )
+
+            except Exception as e:
+                print(f"✗ Drop error: {e}")
+                return enrollment_pb2.DropResponse(
+                    status="error",
+                    message="An internal error occurred during drop process"
+                )
+
+async def serve_async():
+    start_revocation_listener()
+    start_pool_stats_logger()
+    server = grpc.aio.server(interceptors=[AsyncAuthInterceptor()])
+    enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(AsyncEnrollmentServiceServicer(), server)
+    server.add_insecure_port('[::]:50053')
+    print("=" * 70)
+    print("gRPC Enrollment Service (asyncio) starting on port 50053...")
+    print("Using local JWT validation (independent of auth service)")
+    print("=" * 70)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await close_all_async_pools()
+
+if __name__ == '__main__':
+    asyncio.run(serve_async())
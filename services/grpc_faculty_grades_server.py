@@ -10,55 +10,73 @@ import auth_pb2_grpc
 
 import psycopg2
 from psycopg2.extras import DictCursor
+import csv
+import io
 import os
 import uuid
+from collections import namedtuple
 from datetime import datetime
 
+from common_db import (
+    get_connection, release_connection, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page, stream_rows
+)
+from common_grpc import get_stub, use_async_server
+from common_jwt import validate_token_locally
+from common_auth import AuthInterceptor, current_user
+from common_revocation import start_revocation_listener
+from grpc_grades_server import UPSERT_GRADE_QUERY, upsert_grade_params
+
 # Configuration
 POSTGRES_DB_GRADES = os.getenv('POSTGRES_DB_GRADES', 'student_portal_grades')
 POSTGRES_DB_COURSES = os.getenv('POSTGRES_DB_COURSES', 'student_portal_courses')
 POSTGRES_DB_AUTH = os.getenv('POSTGRES_DB_AUTH', 'student_portal_auth')
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
 
-# Auth service gRPC address
+# Auth service gRPC address (only used when the remote validation fallback is enabled)
 AUTH_GRPC_HOST = os.getenv('AUTH_GRPC_HOST', 'localhost:50051')
+AUTH_REMOTE_VALIDATION = os.getenv('AUTH_REMOTE_VALIDATION', 'false').lower() == 'true'
+
+# Largest number of rows accepted by one UploadGradesBatch call
+GRADE_BATCH_MAX_ROWS = int(os.getenv('GRADE_BATCH_MAX_ROWS', '20000'))
+
+# Students in username order, starting after the keyset `after` (NULL = from the start)
+STUDENTS_QUERY = """
+    SELECT public_id, username 
+    FROM users 
+    WHERE role = 'student'
+      AND (%(after)s::text IS NULL OR username > %(after)s)
+    ORDER BY username
+    LIMIT %(limit)s;
+"""
+
+def student_info(row):
+    return faculty_grades_pb2.StudentInfo(
+        student_id=str(row['public_id']),
+        username=row['username']
+    )
 
 def get_db_connection(db_name):
-    try:
-        conn = psycopg2.connect(
-            dbname=db_name,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        print(f"Database connection failed: {e}")
-        return None
+    """Check out a pooled connection to one of the auth/courses/grades databases"""
+    return get_connection(db_name)
 
 def validate_token_with_auth_service(token):
     """Call Auth Service via gRPC to validate token"""
     try:
-        with grpc.insecure_channel(AUTH_GRPC_HOST) as channel:
-            stub = auth_pb2_grpc.AuthServiceStub(channel)
-            response = stub.ValidateToken(auth_pb2.ValidateRequest(token=token))
-            
-            if response.status == "valid":
-                return {
-                    "valid": True,
-                    "user_id": response.user_id,
-                    "role": response.role,
-                    "username": response.username
-                }
-            else:
-                return {
-                    "valid": False,
-                    "message": response.message
-                }
+        stub = get_stub(AUTH_GRPC_HOST, auth_pb2_grpc.AuthServiceStub)
+        response = stub.ValidateToken(auth_pb2.ValidateRequest(token=token))
+        
+        if response.status == "valid":
+            return {
+                "valid": True,
+                "user_id": response.user_id,
+                "role": response.role,
+                "username": response.username
+            }
+        else:
+            return {
+                "valid": False,
+                "message": response.message
+            }
     except grpc.RpcError as e:
         print(f"gRPC error calling auth service: {e}")
         return {
@@ -66,31 +84,206 @@ def validate_token_with_auth_service(token):
             "message": "Auth service unavailable"
         }
 
+def validate_token(token):
+    """Validate locally; fall back to the Auth service only when AUTH_REMOTE_VALIDATION is enabled"""
+    auth_result = validate_token_locally(token)
+    if not auth_result.get('valid') and token and AUTH_REMOTE_VALIDATION:
+        return validate_token_with_auth_service(token)
+    return auth_result
+
+# ============= BATCH GRADE UPLOAD =============
+
+# One validated upload row, in the column order of the grade_upload staging table
+GradeRow = namedtuple('GradeRow', [
+    'row_num', 'grade_id', 'student_public_id', 'course_id', 'grade', 'semester', 'remarks'
+])
+
+# Which of the uploaded (student, course) pairs are actual enrollments - one set-based lookup
+ENROLLED_PAIRS_QUERY = """
+    SELECT e.student_public_id, e.course_id
+    FROM enrollments e
+    JOIN unnest(%(student_ids)s::uuid[], %(course_ids)s::text[]) AS u(student_public_id, course_id)
+      ON e.student_public_id = u.student_public_id AND e.course_id = u.course_id;
+"""
+
+GRADE_STAGING_TABLE = """
+    CREATE TEMP TABLE grade_upload (
+        row_num INTEGER NOT NULL,
+        grade_id UUID NOT NULL,
+        student_public_id UUID NOT NULL,
+        course_id VARCHAR(20) NOT NULL,
+        grade VARCHAR(5) NOT NULL,
+        semester VARCHAR(20) NOT NULL,
+        remarks TEXT
+    ) ON COMMIT DROP;
+"""
+
+GRADE_STAGING_COPY = f"COPY grade_upload ({', '.join(GradeRow._fields)}) FROM STDIN WITH (FORMAT csv)"
+
+# Upsert the staged rows into grades in one statement and report which staged
+# row produced which grade_id. Staged pairs are unique, so no row conflicts twice.
+MERGE_GRADES_QUERY = """
+    WITH merged AS (
+        INSERT INTO grades (grade_id, student_public_id, course_id,
+                            grade, semester, remarks, uploaded_by_faculty_id)
+        SELECT grade_id, student_public_id, course_id,
+               grade, semester, remarks, %(faculty_id)s
+        FROM grade_upload
+        ON CONFLICT (student_public_id, course_id) DO UPDATE
+        SET grade = EXCLUDED.grade,
+            semester = EXCLUDED.semester,
+            remarks = EXCLUDED.remarks,
+            uploaded_by_faculty_id = EXCLUDED.uploaded_by_faculty_id,
+            date_posted = CURRENT_TIMESTAMP
+        RETURNING grade_id, student_public_id, course_id, (xmax = 0) AS inserted
+    )
+    SELECT u.row_num, m.grade_id,
+           CASE WHEN m.inserted THEN 'inserted' ELSE 'updated' END AS action
+    FROM merged m
+    JOIN grade_upload u
+      ON u.student_public_id = m.student_public_id AND u.course_id = m.course_id;
+"""
+
+def grade_row_error(row_num, student_id, course_id, message):
+    return faculty_grades_pb2.GradeRowResult(
+        row=row_num,
+        student_id=student_id,
+        course_id=course_id,
+        status="error",
+        message=message
+    )
+
+def prepare_grade_rows(requests):
+    """
+    Validate streamed UploadGradeRequests. Returns (rows, errors): GradeRows to
+    stage (the last upload wins when a student/course pair repeats) and error
+    results for rejected rows. Raises ValueError if the batch is too large.
+    """
+    staged = {}  # (student_public_id, course_id) -> GradeRow
+    errors = []
+
+    for row_num, req in enumerate(requests, 1):
+        if row_num > GRADE_BATCH_MAX_ROWS:
+            raise ValueError(f"Batch exceeds {GRADE_BATCH_MAX_ROWS} rows")
+
+        if not req.student_id or not req.course_id or not req.grade:
+            errors.append(grade_row_error(row_num, req.student_id, req.course_id,
+                                          "student_id, course_id and grade are required"))
+            continue
+        try:
+            student_public_id = uuid.UUID(req.student_id)
+        except ValueError:
+            errors.append(grade_row_error(row_num, req.student_id, req.course_id, "Invalid student_id"))
+            continue
+        if len(req.course_id) > 20 or len(req.grade) > 5 or len(req.semester) > 20:
+            errors.append(grade_row_error(row_num, req.student_id, req.course_id,
+                                          "course_id, grade or semester is too long"))
+            continue
+
+        key = (student_public_id, req.course_id)
+        previous = staged.get(key)
+        if previous is not None:
+            errors.append(grade_row_error(previous.row_num, req.student_id, req.course_id,
+                                          f"Superseded by row {row_num}"))
+        staged[key] = GradeRow(row_num, uuid.uuid4(), student_public_id, req.course_id,
+                               req.grade, req.semester, req.remarks)
+
+    return list(staged.values()), errors
+
+def reject_unenrolled(rows, enrolled, errors):
+    """Keep rows whose (student, course) pair is in `enrolled`; record the others as errors"""
+    kept = []
+    for row in rows:
+        if (row.student_public_id, row.course_id) in enrolled:
+            kept.append(row)
+        else:
+            errors.append(grade_row_error(row.row_num, str(row.student_public_id), row.course_id,
+                                          "Student is not enrolled in this course"))
+    return kept
+
+def batch_response(rows, merged, errors):
+    """Summarize a batch upload: merged is a list of (row_num, grade_id, action) from MERGE_GRADES_QUERY"""
+    by_row = {row.row_num: row for row in rows}
+    results = list(errors)
+    for row_num, grade_id, action in merged:
+        row = by_row[row_num]
+        results.append(faculty_grades_pb2.GradeRowResult(
+            row=row_num,
+            student_id=str(row.student_public_id),
+            course_id=row.course_id,
+            status=action,
+            grade_id=str(grade_id)
+        ))
+    results.sort(key=lambda result: result.row)
+
+    inserted = sum(1 for result in results if result.status == "inserted")
+    updated = sum(1 for result in results if result.status == "updated")
+    failed = len(errors)
+
+    if failed and not (inserted or updated):
+        status = "error"
+    elif failed:
+        status = "partial"
+    else:
+        status = "success"
+
+    return faculty_grades_pb2.UploadGradesBatchResponse(
+        status=status,
+        message=f"{inserted} inserted, {updated} updated, {failed} failed",
+        inserted=inserted,
+        updated=updated,
+        failed=failed,
+        results=results
+    )
+
+def fetch_enrolled_pairs(rows):
+    """Set of (student UUID, course_id) pairs among `rows` that are enrolled, or None if the courses DB is unavailable"""
+    conn = get_db_connection(POSTGRES_DB_COURSES)
+    if conn is None:
+        return None
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(ENROLLED_PAIRS_QUERY, {
+                "student_ids": [str(row.student_public_id) for row in rows],
+                "course_ids": [row.course_id for row in rows]
+            })
+            return {(uuid.UUID(str(student_id)), course_id) for student_id, course_id in cur.fetchall()}
+    finally:
+        release_connection(conn)
+
+def merge_grade_rows(rows, faculty_id):
+    """COPY rows into a staging table and merge them into grades in one transaction"""
+    conn = get_db_connection(POSTGRES_DB_GRADES)
+    if conn is None:
+        return None
+
+    buffer = io.StringIO()
+    csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+    buffer.seek(0)
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(GRADE_STAGING_TABLE)
+            cur.copy_expert(GRADE_STAGING_COPY, buffer)
+            cur.execute(MERGE_GRADES_QUERY, {"faculty_id": faculty_id})
+            merged = cur.fetchall()
+        conn.commit()
+        return merged
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_connection(conn)
+
 class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceServicer):
     
     def GetAllStudents(self, request, context):
-        """Get all students in the system (Faculty only)"""
-        token = request.token
-        
-        # Validate token
-        auth_result = validate_token_with_auth_service(token)
-        
-        if not auth_result.get('valid'):
-            return faculty_grades_pb2.StudentsResponse(
-                status="error",
-                message=f"Authentication failed: {auth_result.get('message', 'Invalid token')}",
-                students=[]
-            )
-        
-        user_role = auth_result['role']
-        
-        # Only faculty can access this
-        if user_role != 'faculty':
-            return faculty_grades_pb2.StudentsResponse(
-                status="error",
-                message=f"Access denied. Faculty only. Your role is '{user_role}'",
-                students=[]
-            )
+        """Get all students (or one page of students) in the system (Faculty only)"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            return faculty_grades_pb2.StudentsResponse(status="error", message=str(e), students=[])
         
         conn = get_db_connection(POSTGRES_DB_AUTH)
         if conn is None:
@@ -101,27 +294,16 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
             )
         
         try:
+            limit = page_limit(request.page_size)
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT public_id, username 
-                    FROM users 
-                    WHERE role = 'student'
-                    ORDER BY username;
-                """)
-                rows = cur.fetchall()
-                
-                students = []
-                for row in rows:
-                    student = faculty_grades_pb2.StudentInfo(
-                        student_id=str(row['public_id']),
-                        username=row['username']
-                    )
-                    students.append(student)
+                cur.execute(STUDENTS_QUERY, {"after": after, "limit": limit + 1 if limit else None})
+                rows, next_page_token = split_page(cur.fetchall(), limit, lambda row: [row['username']])
                 
                 return faculty_grades_pb2.StudentsResponse(
                     status="success",
                     message="Students retrieved successfully",
-                    students=students
+                    students=[student_info(row) for row in rows],
+                    next_page_token=next_page_token
                 )
         
         except Exception as e:
@@ -132,37 +314,33 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
                 students=[]
             )
         finally:
-            conn.close()
+            release_connection(conn)
+
+    def StreamAllStudents(self, request, context):
+        """Stream all students in username order from a server-side cursor (Faculty only)"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        conn = get_db_connection(POSTGRES_DB_AUTH)
+        if conn is None:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
+        try:
+            params = {"after": after, "limit": page_limit(request.page_size)}
+            for row in stream_rows(conn, STUDENTS_QUERY, params):
+                yield student_info(row)
+        except psycopg2.Error as e:
+            print(f"Error streaming students: {e}")
+            context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+        finally:
+            release_connection(conn)
     
     def GetStudentEnrollments(self, request, context):
         """Get all courses a student is enrolled in (Faculty only)"""
-        token = request.token
         student_id = request.student_id
         
-        # Validate token
-        auth_result = validate_token_with_auth_service(token)
-        
-        if not auth_result.get('valid'):
-            return faculty_grades_pb2.StudentEnrollmentsResponse(
-                status="error",
-                message="Authentication failed",
-                student_id="",
-                student_username="",
-                enrollments=[]
-            )
-        
-        user_role = auth_result['role']
-        
-        # Only faculty can access this
-        if user_role != 'faculty':
-            return faculty_grades_pb2.StudentEnrollmentsResponse(
-                status="error",
-                message=f"Access denied. Faculty only. Your role is '{user_role}'",
-                student_id="",
-                student_username="",
-                enrollments=[]
-            )
-        
         # Get student username from auth DB
         auth_conn = get_db_connection(POSTGRES_DB_AUTH)
         if auth_conn is None:
@@ -192,7 +370,7 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
                 
                 student_username = user_row['username']
         finally:
-            auth_conn.close()
+            release_connection(auth_conn)
         
         # Get enrollments from courses DB
         courses_conn = get_db_connection(POSTGRES_DB_COURSES)
@@ -243,38 +421,16 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
                 enrollments=[]
             )
         finally:
-            courses_conn.close()
+            release_connection(courses_conn)
     
     def UploadStudentGrade(self, request, context):
         """Upload a grade for a specific student in a specific course (Faculty only)"""
-        token = request.token
         student_id = request.student_id
         course_id = request.course_id
         grade = request.grade
-        semester = request.semester
-        remarks = request.remarks
-        
-        # Validate token
-        auth_result = validate_token_with_auth_service(token)
-        
-        if not auth_result.get('valid'):
-            return faculty_grades_pb2.UploadGradeResponse(
-                status="error",
-                message="Authentication failed",
-                grade_id=""
-            )
-        
-        faculty_id = auth_result['user_id']
-        user_role = auth_result['role']
-        
-        # Only faculty can upload grades
-        if user_role != 'faculty':
-            return faculty_grades_pb2.UploadGradeResponse(
-                status="error",
-                message=f"Only faculty can upload grades. Your role is '{user_role}'",
-                grade_id=""
-            )
         
+        faculty_id = current_user()['user_id']
+
         # Verify student is enrolled in the course
         courses_conn = get_db_connection(POSTGRES_DB_COURSES)
         if courses_conn is None:
@@ -298,7 +454,7 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
                         grade_id=""
                     )
         finally:
-            courses_conn.close()
+            release_connection(courses_conn)
         
         # Upload grade to grades database
         grades_conn = get_db_connection(POSTGRES_DB_GRADES)
@@ -310,36 +466,16 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
             )
         
         try:
-            grade_id = str(uuid.uuid4())
-            
             with grades_conn.cursor() as cur:
-                # Check if grade already exists for this student and course
-                cur.execute("""
-                    SELECT grade_id FROM grades 
-                    WHERE student_public_id = %s AND course_id = %s;
-                """, (student_id, course_id))
-                
-                existing_grade = cur.fetchone()
+                # Insert, or replace the existing grade for this student and course
+                cur.execute(UPSERT_GRADE_QUERY, upsert_grade_params(request, faculty_id))
+                grade_id, inserted = cur.fetchone()
+                grade_id = str(grade_id)
                 
-                if existing_grade:
-                    # Update existing grade
-                    cur.execute("""
-                        UPDATE grades 
-                        SET grade = %s, semester = %s, remarks = %s, 
-                            uploaded_by_faculty_id = %s, date_posted = CURRENT_TIMESTAMP
-                        WHERE student_public_id = %s AND course_id = %s
-                        RETURNING grade_id;
-                    """, (grade, semester, remarks, faculty_id, student_id, course_id))
-                    grade_id = str(cur.fetchone()[0])
-                    message = f"Grade updated to {grade} for course {course_id}"
-                else:
-                    # Insert new grade
-                    cur.execute("""
-                        INSERT INTO grades (grade_id, student_public_id, course_id, 
-                                          grade, semester, remarks, uploaded_by_faculty_id)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s);
-                    """, (grade_id, student_id, course_id, grade, semester, remarks, faculty_id))
+                if inserted:
                     message = f"Grade {grade} uploaded successfully for course {course_id}"
+                else:
+                    message = f"Grade updated to {grade} for course {course_id}"
             
             grades_conn.commit()
             print(f"Faculty {faculty_id} uploaded grade {grade} for student {student_id} in {course_id}")
@@ -359,10 +495,53 @@ class FacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceS
                 grade_id=""
             )
         finally:
-            grades_conn.close()
+            release_connection(grades_conn)
+
+    def UploadGradesBatch(self, request_iterator, context):
+        """Upload many grades in one call: one enrollment check, COPY into staging, one merge (Faculty only)"""
+        faculty_id = current_user()['user_id']
+
+        try:
+            rows, errors = prepare_grade_rows(request_iterator)
+        except ValueError as e:
+            return faculty_grades_pb2.UploadGradesBatchResponse(status="error", message=str(e))
+
+        merged = []
+        if rows:
+            try:
+                enrolled = fetch_enrolled_pairs(rows)
+                if enrolled is None:
+                    return faculty_grades_pb2.UploadGradesBatchResponse(
+                        status="error",
+                        message="Courses database connection error"
+                    )
+                rows = reject_unenrolled(rows, enrolled, errors)
+
+                if rows:
+                    merged = merge_grade_rows(rows, faculty_id)
+                    if merged is None:
+                        return faculty_grades_pb2.UploadGradesBatchResponse(
+                            status="error",
+                            message="Grades database connection error"
+                        )
+            except Exception as e:
+                print(f"Error uploading grade batch: {e}")
+                return faculty_grades_pb2.UploadGradesBatchResponse(
+                    status="error",
+                    message="Failed to upload grades"
+                )
+
+        response = batch_response(rows, merged, errors)
+        print(f"Faculty {faculty_id} uploaded grade batch: {response.message}")
+        return response
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    start_revocation_listener()
+    start_pool_stats_logger()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        interceptors=[AuthInterceptor(validate=validate_token)]
+    )
     faculty_grades_pb2_grpc.add_FacultyGradesServiceServicer_to_server(
         FacultyGradesServiceServicer(), server
     )
@@ -375,11 +554,19 @@ def serve():
     print("  - GetAllStudents")
     print("  - GetStudentEnrollments")
     print("  - UploadStudentGrade")
+    print("  - UploadGradesBatch")
     print("\nAccess Control: Faculty Only")
+    print(f"Token validation: local JWT with verified-token cache"
+          f"{' (Auth service fallback enabled)' if AUTH_REMOTE_VALIDATION else ''}")
     print("=" * 60)
     print("\nServer starting on port 50055...")
     server.start()
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if use_async_server():
+        import asyncio
+        from grpc_faculty_grades_server_aio import serve_async
+        asyncio.run(serve_async())
+    else:
+        serve()
\ No newline at end of file
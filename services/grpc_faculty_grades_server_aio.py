@@ -0,0 +1,311 @@
+import grpc
+import asyncio
+import sys
+sys.path.append('./generated')
+
+import faculty_grades_pb2
+import faculty_grades_pb2_grpc
+
+import asyncpg
+
+from common_db import (
+    async_connection, close_all_async_pools, to_asyncpg, stream_async_rows, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page
+)
+from common_auth import AsyncAuthInterceptor, current_user
+from common_revocation import start_revocation_listener
+from grpc_faculty_grades_server import (
+    POSTGRES_DB_GRADES, POSTGRES_DB_COURSES, POSTGRES_DB_AUTH, STUDENTS_QUERY,
+    AUTH_REMOTE_VALIDATION, GRADE_BATCH_MAX_ROWS, GradeRow,
+    ENROLLED_PAIRS_QUERY, GRADE_STAGING_TABLE, MERGE_GRADES_QUERY,
+    validate_token, student_info, prepare_grade_rows, reject_unenrolled, batch_response
+)
+from grpc_grades_server import UPSERT_GRADE_QUERY, upsert_grade_params
+
+# grpc.aio variant of the Faculty Grades Service, backed by asyncpg pools.
+# Start with: python grpc_faculty_grades_server.py --aio  (or GRPC_ASYNC=true)
+
+class AsyncFacultyGradesServiceServicer(faculty_grades_pb2_grpc.FacultyGradesServiceServicer):
+    
+    async def GetAllStudents(self, request, context):
+        """Get all students (or one page of students) in the system (Faculty only)"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            return faculty_grades_pb2.StudentsResponse(status="error", message=str(e), students=[])
+
+        async with async_connection(POSTGRES_DB_AUTH) as conn:
+            if conn is None:
+                return faculty_grades_pb2.StudentsResponse(
+                    status="error",
+                    message="Database connection error",
+                    students=[]
+                )
+            
+            try:
+                limit = page_limit(request.page_size)
+                query, args = to_asyncpg(STUDENTS_QUERY, {"after": after, "limit": limit + 1 if limit else None})
+                rows, next_page_token = split_page(await conn.fetch(query, *args), limit, lambda row: [row['username']])
+                
+                return faculty_grades_pb2.StudentsResponse(
+                    status="success",
+                    message="Students retrieved successfully",
+                    students=[student_info(row) for row in rows],
+                    next_page_token=next_page_token
+                )
+            
+            except Exception as e:
+                print(f"Error fetching students: {e}")
+                return faculty_grades_pb2.StudentsResponse(
+                    status="error",
+                    message="Internal server error",
+                    students=[]
+                )
+
+    async def StreamAllStudents(self, request, context):
+        """Stream all students in username order from a server-side cursor (Faculty only)"""
+        try:
+            after, = decode_page_token(request.page_token)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        async with async_connection(POSTGRES_DB_AUTH) as conn:
+            if conn is None:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
+            query, args = to_asyncpg(STUDENTS_QUERY, {"after": after, "limit": page_limit(request.page_size)})
+            try:
+                async for row in stream_async_rows(conn, query, args):
+                    yield student_info(row)
+            except asyncpg.PostgresError as e:
+                print(f"Error streaming students: {e}")
+                await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+    
+    async def GetStudentEnrollments(self, request, context):
+        """Get all courses a student is enrolled in (Faculty only)"""
+        student_id = request.student_id
+        
+        # Get student username from auth DB
+        async with async_connection(POSTGRES_DB_AUTH) as auth_conn:
+            if auth_conn is None:
+                return faculty_grades_pb2.StudentEnrollmentsResponse(
+                    status="error",
+                    message="Database connection error",
+                    student_id="",
+                    student_username="",
+                    enrollments=[]
+                )
+            
+            student_username = await auth_conn.fetchval("""
+                SELECT username FROM users WHERE public_id = $1;
+            """, student_id)
+            
+            if not student_username:
+                return faculty_grades_pb2.StudentEnrollmentsResponse(
+                    status="error",
+                    message="Student not found",
+                    student_id="",
+                    student_username="",
+                    enrollments=[]
+                )
+        
+        # Get enrollments from courses DB
+        async with async_connection(POSTGRES_DB_COURSES) as courses_conn:
+            if courses_conn is None:
+                return faculty_grades_pb2.StudentEnrollmentsResponse(
+                    status="error",
+                    message="Courses database connection error",
+                    student_id=student_id,
+                    student_username=student_username,
+                    enrollments=[]
+                )
+            
+            try:
+                rows = await courses_conn.fetch("""
+                    SELECT e.course_id, c.name, e.enrollment_date
+                    FROM enrollments e
+                    JOIN courses c ON e.course_id = c.course_id
+                    WHERE e.student_public_id = $1
+                    ORDER BY e.enrollment_date DESC;
+                """, student_id)
+                
+                enrollments = [
+                    faculty_grades_pb2.EnrollmentInfo(
+                        course_id=row['course_id'],
+                        course_name=row['name'],
+                        enrollment_date=str(row['enrollment_date'])
+                    )
+                    for row in rows
+                ]
+                
+                return faculty_grades_pb2.StudentEnrollmentsResponse(
+                    status="success",
+                    message="Enrollments retrieved successfully",
+                    student_id=student_id,
+                    student_username=student_username,
+                    enrollments=enrollments
+                )
+            
+            except Exception as e:
+                print(f"Error fetching enrollments: {e}")
+                return faculty_grades_pb2.StudentEnrollmentsResponse(
+                    status="error",
+                    message="Internal server error",
+                    student_id=student_id,
+                    student_username=student_username,
+                    enrollments=[]
+                )
+    
+    async def UploadStudentGrade(self, request, context):
+        """Upload a grade for a specific student in a specific course (Faculty only)"""
+        student_id = request.student_id
+        course_id = request.course_id
+        grade = request.grade
+        
+        faculty_id = current_user()['user_id']
+        
+        # Verify student is enrolled in the course
+        async with async_connection(POSTGRES_DB_COURSES) as courses_conn:
+            if courses_conn is None:
+                return faculty_grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Database connection error",
+                    grade_id=""
+                )
+            
+            enrolled = await courses_conn.fetchval("""
+                SELECT 1 FROM enrollments 
+                WHERE student_public_id = $1 AND course_id = $2;
+            """, student_id, course_id)
+            
+            if not enrolled:
+                return faculty_grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Student is not enrolled in this course",
+                    grade_id=""
+                )
+        
+        # Upload grade to grades database
+        async with async_connection(POSTGRES_DB_GRADES) as grades_conn:
+            if grades_conn is None:
+                return faculty_grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Grades database connection error",
+                    grade_id=""
+                )
+            
+            try:
+                query, args = to_asyncpg(UPSERT_GRADE_QUERY, upsert_grade_params(request, faculty_id))
+                row = await grades_conn.fetchrow(query, *args)
+                grade_id = str(row['grade_id'])
+                if row['inserted']:
+                    message = f"Grade {grade} uploaded successfully for course {course_id}"
+                else:
+                    message = f"Grade updated to {grade} for course {course_id}"
+                
+                print(f"Faculty {faculty_id} uploaded grade {grade} for student {student_id} in {course_id}")
+                return faculty_grades_pb2.UploadGradeResponse(
+                    status="success",
+                    message=message,
+                    grade_id=grade_id
+                )
+            
+            except Exception as e:
+                print(f"Error uploading grade: {e}")
+                return faculty_grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Failed to upload grade",
+                    grade_id=""
+                )
+
+    async def UploadGradesBatch(self, request_iterator, context):
+        """Upload many grades in one call: one enrollment check, COPY into staging, one merge (Faculty only)"""
+        faculty_id = current_user()['user_id']
+
+        requests = []
+        async for req in request_iterator:
+            requests.append(req)
+            if len(requests) > GRADE_BATCH_MAX_ROWS:
+                break
+
+        try:
+            rows, errors = prepare_grade_rows(requests)
+        except ValueError as e:
+            return faculty_grades_pb2.UploadGradesBatchResponse(status="error", message=str(e))
+
+        merged = []
+        if rows:
+            try:
+                enrolled = await fetch_enrolled_pairs(rows)
+                if enrolled is None:
+                    return faculty_grades_pb2.UploadGradesBatchResponse(
+                        status="error",
+                        message="Courses database connection error"
+                    )
+                rows = reject_unenrolled(rows, enrolled, errors)
+
+                if rows:
+                    merged = await merge_grade_rows(rows, faculty_id)
+                    if merged is None:
+                        return faculty_grades_pb2.UploadGradesBatchResponse(
+                            status="error",
+                            message="Grades database connection error"
+                        )
+            except Exception as e:
+                print(f"Error uploading grade batch: {e}")
+                return faculty_grades_pb2.UploadGradesBatchResponse(
+                    status="error",
+                    message="Failed to upload grades"
+                )
+
+        response = batch_response(rows, merged, errors)
+        print(f"Faculty {faculty_id} uploaded grade batch: {response.message}")
+        return response
+
+async def fetch_enrolled_pairs(rows):
+    """Set of (student UUID, course_id) pairs among `rows` that are enrolled, or None if the courses DB is unavailable"""
+    async with async_connection(POSTGRES_DB_COURSES) as conn:
+        if conn is None:
+            return None
+        query, args = to_asyncpg(ENROLLED_PAIRS_QUERY, {
+            "student_ids": [row.student_public_id for row in rows],
+            "course_ids": [row.course_id for row in rows]
+        })
+        return {(record['student_public_id'], record['course_id']) for record in await conn.fetch(query, *args)}
+
+async def merge_grade_rows(rows, faculty_id):
+    """COPY rows into a staging table and merge them into grades in one transaction"""
+    async with async_connection(POSTGRES_DB_GRADES) as conn:
+        if conn is None:
+            return None
+        async with conn.transaction():
+            await conn.execute(GRADE_STAGING_TABLE)
+            await conn.copy_records_to_table('grade_upload', records=rows, columns=list(GradeRow._fields))
+            query, args = to_asyncpg(MERGE_GRADES_QUERY, {"faculty_id": faculty_id})
+            records = await conn.fetch(query, *args)
+        return [tuple(record) for record in records]
+
+async def serve_async():
+    start_revocation_listener()
+    # The Auth-service fallback makes a blocking gRPC call, so validation is
+    # moved off the event loop whenever it is enabled
+    start_pool_stats_logger()
+    server = grpc.aio.server(interceptors=[
+        AsyncAuthInterceptor(validate=validate_token, offload=AUTH_REMOTE_VALIDATION)
+    ])
+    faculty_grades_pb2_grpc.add_FacultyGradesServiceServicer_to_server(
+        AsyncFacultyGradesServiceServicer(), server
+    )
+    server.add_insecure_port('[::]:50055')
+    print("=" * 60)
+    print("gRPC Faculty Grades Service (Node 5, asyncio)")
+    print("Port: 50055")
+    print("=" * 60)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await close_all_async_pools()
+
+if __name__ == '__main__':
+    asyncio.run(serve_async())
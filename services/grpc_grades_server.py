@@ -10,84 +10,294 @@ import psycopg2
 from psycopg2.extras import DictCursor
 import os
 import uuid
-from datetime import datetime, timezone
-import jwt
+
+from common_db import (
+    get_connection, release_connection, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page, stream_rows
+)
+from common_grpc import use_async_server
+from common_auth import AuthInterceptor, current_user
+from common_revocation import start_revocation_listener
+from common_migrations import Migration, PlanCheck, migrate
+from grades_read_model import start_read_model_listeners
 
 # Configuration
 POSTGRES_DB = os.getenv('POSTGRES_DB', 'student_portal_grades')
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'postgres')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '1234')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
-POSTGRES_PORT = os.getenv('POSTGRES_PORT', '5432')
-
-# JWT Configuration (must match auth server)
-JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'super_secret_auth_key_12345')
-JWT_ALGORITHM = "HS256"
 
 def get_db_connection():
-    try:
-        conn = psycopg2.connect(
-            dbname=POSTGRES_DB,
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT
+    """Check out a pooled connection to the grades database"""
+    return get_connection(POSTGRES_DB)
+
+# Keep only the newest grade row for each (student, course) pair
+DEDUPE_GRADES_QUERY = """
+    DELETE FROM grades
+    WHERE grade_id IN (
+        SELECT grade_id FROM (
+            SELECT grade_id,
+                   row_number() OVER (
+                       PARTITION BY student_public_id, course_id
+                       ORDER BY date_posted DESC NULLS LAST, grade_id DESC
+                   ) AS row_rank
+            FROM grades
+        ) ranked
+        WHERE row_rank > 1
+    );
+"""
+
+# Insert a grade or replace the student's existing grade for the course, in one round trip.
+# `inserted` tells a new grade apart from an update (xmax is 0 only for freshly inserted rows).
+UPSERT_GRADE_QUERY = """
+    INSERT INTO grades (grade_id, student_public_id, course_id, 
+                        grade, semester, remarks, uploaded_by_faculty_id)
+    VALUES (%(grade_id)s, %(student_id)s, %(course_id)s,
+            %(grade)s, %(semester)s, %(remarks)s, %(faculty_id)s)
+    ON CONFLICT (student_public_id, course_id) DO UPDATE
+    SET grade = EXCLUDED.grade,
+        semester = EXCLUDED.semester,
+        remarks = EXCLUDED.remarks,
+        uploaded_by_faculty_id = EXCLUDED.uploaded_by_faculty_id,
+        date_posted = CURRENT_TIMESTAMP
+    RETURNING grade_id, (xmax = 0) AS inserted;
+"""
+
+def upsert_grade_params(request, faculty_id):
+    """UPSERT_GRADE_QUERY parameters for an UploadGradeRequest"""
+    return {
+        "grade_id": str(uuid.uuid4()),
+        "student_id": request.student_id,
+        "course_id": request.course_id,
+        "grade": request.grade,
+        "semester": request.semester,
+        "remarks": request.remarks,
+        "faculty_id": faculty_id
+    }
+
+# Course names, student usernames and enrollments come from the read model tables
+# (course_names, student_names, student_enrollments; see grades_read_model), so every
+# grade view is a single query against the grades database.
+
+# A student's enrollments with the grade for each (if released), most recent first
+ENROLLED_COURSES_WITH_GRADES_QUERY = """
+    SELECT e.course_id,
+           COALESCE(c.name, e.course_id) AS name,
+           e.enrollment_date,
+           g.grade, g.semester, g.date_posted, g.remarks
+    FROM student_enrollments e
+    LEFT JOIN course_names c ON c.course_id = e.course_id
+    LEFT JOIN grades g ON g.student_public_id = e.student_public_id AND g.course_id = e.course_id
+    WHERE e.student_public_id = %(user_id)s
+    ORDER BY e.enrollment_date DESC;
+"""
+
+# All of a student's grades, newest first
+STUDENT_GRADES_QUERY = """
+    SELECT 
+        g.grade_id,
+        g.course_id,
+        COALESCE(c.name, g.course_id) AS course_name,
+        g.grade,
+        g.semester,
+        g.date_posted,
+        g.remarks
+    FROM grades g
+    LEFT JOIN course_names c ON c.course_id = g.course_id
+    WHERE g.student_public_id = %(user_id)s
+    ORDER BY g.date_posted DESC;
+"""
+
+COURSE_NAME_QUERY = "SELECT name FROM course_names WHERE course_id = %(course_id)s;"
+
+# All grades for a course, newest first (unpaginated responses)
+COURSE_GRADES_QUERY = """
+    SELECT 
+        g.grade_id,
+        g.student_public_id,
+        s.username AS student_name,
+        g.grade,
+        g.date_posted
+    FROM grades g
+    LEFT JOIN student_names s ON s.student_public_id = g.student_public_id
+    WHERE g.course_id = %(course_id)s
+    ORDER BY g.date_posted DESC;
+"""
+
+# Keyset page of a course's grades ordered by student, starting after (after_student, after_grade)
+COURSE_GRADES_PAGE_QUERY = """
+    SELECT 
+        g.grade_id,
+        g.student_public_id,
+        s.username AS student_name,
+        g.grade,
+        g.date_posted
+    FROM grades g
+    LEFT JOIN student_names s ON s.student_public_id = g.student_public_id
+    WHERE g.course_id = %(course_id)s
+      AND (%(after_student)s::uuid IS NULL
+           OR (g.student_public_id, g.grade_id) > (%(after_student)s::uuid, %(after_grade)s::uuid))
+    ORDER BY g.student_public_id, g.grade_id
+    LIMIT %(limit)s;
+"""
+
+def course_grades_key(row):
+    return [str(row['student_public_id']), str(row['grade_id'])]
+
+def student_grade_info(row):
+    return grades_pb2.StudentGradeInfo(
+        student_id=str(row['student_public_id']),
+        student_name=row['student_name'] or "",
+        grade=row['grade'],
+        date_posted=str(row['date_posted'])
+    )
+
+def grade_info(row):
+    return grades_pb2.GradeInfo(
+        grade_id=str(row['grade_id']),
+        course_id=row['course_id'],
+        course_name=row['course_name'],
+        grade=row['grade'],
+        semester=row['semester'],
+        date_posted=str(row['date_posted']),
+        remarks=row['remarks'] or ""
+    )
+
+def course_grade_info(row):
+    """CourseGradeInfo for an ENROLLED_COURSES_WITH_GRADES_QUERY row"""
+    if row['grade'] is None:
+        # Grade not yet released
+        return grades_pb2.CourseGradeInfo(
+            course_id=row['course_id'],
+            course_name=row['name'],
+            enrollment_date=str(row['enrollment_date']),
+            grade_released=False,
+            grade="",
+            semester="",
+            date_posted="",
+            remarks=""
         )
-        return conn
-    except psycopg2.OperationalError as e:
-        print(f"Database connection failed: {e}")
-        return None
-
-def validate_token_locally(token):
-    """Validate JWT token locally without calling auth service"""
-    if not token:
-        return {
-            "valid": False,
-            "message": "Token missing"
-        }
-    
-    try:
-        # Decode and verify the JWT token
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        
-        # Check if token has expired (jwt.decode already does this, but being explicit)
-        exp_timestamp = payload.get('exp')
-        if exp_timestamp:
-            exp_datetime = datetime.fromtimestamp(exp_timestamp, tz=timezone.utc)
-            if datetime.now(timezone.utc) > exp_datetime:
-                return {
-                    "valid": False,
-                    "message": "Token expired"
-                }
-        
-        return {
-            "valid": True,
-            "user_id": payload.get('public_id'),
-            "role": payload.get('role'),
-            "username": payload.get('username')
-        }
-    
-    except jwt.ExpiredSignatureError:
-        print(f"✗ Token validation failed: Token expired")
-        return {
-            "valid": False,
-            "message": "Token expired"
-        }
-    except jwt.InvalidTokenError as e:
-        print(f"✗ Token validation failed: Invalid token - {e}")
-        return {
-            "valid": False,
-            "message": "Invalid token"
-        }
-    except Exception as e:
-        print(f"✗ Token validation error: {e}")
-        return {
-            "valid": False,
-            "message": "Token validation error"
-        }
+
+    return grades_pb2.CourseGradeInfo(
+        course_id=row['course_id'],
+        course_name=row['name'],
+        enrollment_date=str(row['enrollment_date']),
+        grade_released=True,
+        grade=row['grade'],
+        semester=row['semester'],
+        date_posted=str(row['date_posted']),
+        remarks=row['remarks'] or ""
+    )
+
+# Schema of the grades database (see common_migrations); append new versions, never edit applied ones
+MIGRATIONS = [
+    Migration(1, 'create grades', [
+        """
+        CREATE TABLE IF NOT EXISTS grades (
+            grade_id UUID PRIMARY KEY,
+            student_public_id UUID NOT NULL,
+            course_id VARCHAR(20) NOT NULL,
+            grade VARCHAR(5) NOT NULL,
+            semester VARCHAR(20) NOT NULL,
+            date_posted TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            remarks TEXT,
+            uploaded_by_faculty_id UUID NOT NULL
+        );
+        """
+    ]),
+    Migration(2, 'one grade per student and course', [
+        # Drop duplicate rows (keeping the newest) before adding the unique index,
+        # which also replaces the single-column indexes
+        "LOCK TABLE grades IN SHARE ROW EXCLUSIVE MODE;",
+        DEDUPE_GRADES_QUERY,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_grades_student_course
+        ON grades (student_public_id, course_id);
+        """,
+        "DROP INDEX IF EXISTS idx_student_grades;",
+        "DROP INDEX IF EXISTS idx_course_grades;"
+    ], checks=[
+        PlanCheck('student grades lookup',
+                  "SELECT course_id, grade, date_posted FROM grades WHERE student_public_id = %s;",
+                  ('00000000-0000-0000-0000-000000000001',), 'grades'),
+    ]),
+    Migration(3, 'covering index for course grade rosters', [
+        """
+        CREATE INDEX IF NOT EXISTS idx_grades_course_posted
+        ON grades (course_id, date_posted DESC) INCLUDE (student_public_id, grade, grade_id);
+        """
+    ], checks=[
+        PlanCheck('course grades, newest first', COURSE_GRADES_QUERY, {"course_id": 'CS101'}, 'grades'),
+        PlanCheck('course grades page', COURSE_GRADES_PAGE_QUERY,
+                  {"course_id": 'CS101', "after_student": None, "after_grade": None, "limit": 100}, 'grades'),
+    ]),
+    Migration(4, 'read model of course names, student names and enrollments', [
+        # Filled and kept current by grades_read_model from the courses and auth databases
+        """
+        CREATE TABLE IF NOT EXISTS course_names (
+            course_id VARCHAR(20) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS student_names (
+            student_public_id UUID PRIMARY KEY,
+            username VARCHAR(80) NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS student_enrollments (
+            student_public_id UUID NOT NULL,
+            course_id VARCHAR(20) NOT NULL,
+            enrollment_date TIMESTAMP,
+            PRIMARY KEY (student_public_id, course_id)
+        );
+        """
+    ], checks=[
+        PlanCheck('enrolled courses with grades', ENROLLED_COURSES_WITH_GRADES_QUERY,
+                  {"user_id": '00000000-0000-0000-0000-000000000001'}, 'student_enrollments'),
+        PlanCheck('student grades with course names', STUDENT_GRADES_QUERY,
+                  {"user_id": '00000000-0000-0000-0000-000000000001'}, 'grades'),
+        PlanCheck('course grades with student names', COURSE_GRADES_QUERY, {"course_id": 'CS101'}, 'grades'),
+    ]),
+    Migration(5, 'notify student grade view changes', [
+        # The REST gateway drops its cached grade views on these (payload: the student, or '' for everyone)
+        """
+        CREATE OR REPLACE FUNCTION notify_student_grades_changed() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'course_names' THEN
+                PERFORM pg_notify('student_grades_changed', '');
+            ELSE
+                PERFORM pg_notify('student_grades_changed',
+                                  COALESCE(NEW.student_public_id, OLD.student_public_id)::text);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """,
+        "DROP TRIGGER IF EXISTS grades_notify_changed ON grades;",
+        """
+        CREATE TRIGGER grades_notify_changed
+        AFTER INSERT OR UPDATE OR DELETE ON grades
+        FOR EACH ROW EXECUTE FUNCTION notify_student_grades_changed();
+        """,
+        "DROP TRIGGER IF EXISTS student_enrollments_notify_changed ON student_enrollments;",
+        """
+        CREATE TRIGGER student_enrollments_notify_changed
+        AFTER INSERT OR UPDATE OR DELETE ON student_enrollments
+        FOR EACH ROW EXECUTE FUNCTION notify_student_grades_changed();
+        """,
+        "DROP TRIGGER IF EXISTS course_names_notify_changed ON course_names;",
+        """
+        CREATE TRIGGER course_names_notify_changed
+        AFTER INSERT OR UPDATE OR DELETE ON course_names
+        FOR EACH ROW EXECUTE FUNCTION notify_student_grades_changed();
+        """
+    ]),
+]
 
 def init_db():
-    """Initialize grades database"""
+    """Migrate the grades database and insert sample data"""
+    if migrate(POSTGRES_DB, MIGRATIONS) is None:
+        return
+
     conn = get_db_connection()
     if conn is None:
         print("Cannot initialize DB without a connection.")
@@ -95,31 +305,6 @@ def init_db():
 
     try:
         with conn.cursor() as cur:
-            # Create grades table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS grades (
-                    grade_id UUID PRIMARY KEY,
-                    student_public_id UUID NOT NULL,
-                    course_id VARCHAR(20) NOT NULL,
-                    grade VARCHAR(5) NOT NULL,
-                    semester VARCHAR(20) NOT NULL,
-                    date_posted TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    remarks TEXT,
-                    uploaded_by_faculty_id UUID NOT NULL
-                );
-            """)
-            
-            # Create index for faster lookups
-            cur.execute("""
-                CREATE INDEX IF NOT EXISTS idx_student_grades 
-                ON grades(student_public_id);
-            """)
-            
-            cur.execute("""
-                CREATE INDEX IF NOT EXISTS idx_course_grades 
-                ON grades(course_id);
-            """)
-            
             # Insert sample grades if table is empty
             cur.execute("SELECT COUNT(*) FROM grades;")
             if cur.fetchone()[0] == 0:
@@ -149,51 +334,19 @@ def init_db():
         print(f"Error initializing database: {e}")
         conn.rollback()
     finally:
-        conn.close()
+        release_connection(conn)
 
 class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
     
     def GetEnrolledCoursesWithGrades(self, request, context):
         """Get all enrolled courses with their grades (or 'Not Released' status)"""
-        token = request.token
-        
-        # Use local JWT validation instead of calling auth service
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return grades_pb2.EnrolledCoursesWithGradesResponse(
-                status="error",
-                message=f"Authentication failed: {auth_result.get('message', 'Invalid token')}",
-                courses=[],
-                student_name=""
-            )
         
-        user_id = auth_result['user_id']
-        username = auth_result['username']
-        user_role = auth_result['role']
-        
-        # Students can only view their own grades
-        if user_role != 'student':
-            return grades_pb2.EnrolledCoursesWithGradesResponse(
-                status="error",
-                message=f"Only students can view grades. Your role is '{user_role}'",
-                courses=[],
-                student_name=""
-            )
-        
-        # Need to connect to BOTH databases: courses and grades
-        # First, get enrollments from courses database
-        courses_conn = psycopg2.connect(
-            dbname='student_portal_courses',
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            host=POSTGRES_HOST,
-            port=POSTGRES_PORT
-        )
-        
-        grades_conn = get_db_connection()
-        
-        if not courses_conn or not grades_conn:
+        user = current_user()
+        user_id = user['user_id']
+        username = user['username']
+
+        conn = get_db_connection()
+        if conn is None:
             return grades_pb2.EnrolledCoursesWithGradesResponse(
                 status="error",
                 message="Database connection error",
@@ -202,59 +355,9 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
             )
         
         try:
-            course_grades_list = []
-            
-            # Get enrolled courses
-            with courses_conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT e.course_id, c.name, e.enrollment_date
-                    FROM enrollments e
-                    JOIN courses c ON e.course_id = c.course_id
-                    WHERE e.student_public_id = %s
-                    ORDER BY e.enrollment_date DESC;
-                """, (user_id,))
-                enrollments = cur.fetchall()
-            
-            # For each enrollment, check if grade exists
-            with grades_conn.cursor(cursor_factory=DictCursor) as cur:
-                for enrollment in enrollments:
-                    course_id = enrollment['course_id']
-                    
-                    # Check if grade exists for this course and student
-                    cur.execute("""
-                        SELECT grade, semester, date_posted, remarks
-                        FROM grades
-                        WHERE student_public_id = %s AND course_id = %s;
-                    """, (user_id, course_id))
-                    
-                    grade_row = cur.fetchone()
-                    
-                    if grade_row:
-                        # Grade has been released
-                        course_grade = grades_pb2.CourseGradeInfo(
-                            course_id=course_id,
-                            course_name=enrollment['name'],
-                            enrollment_date=str(enrollment['enrollment_date']),
-                            grade_released=True,
-                            grade=grade_row['grade'],
-                            semester=grade_row['semester'],
-                            date_posted=str(grade_row['date_posted']),
-                            remarks=grade_row['remarks'] or ""
-                        )
-                    else:
-                        # Grade not yet released
-                        course_grade = grades_pb2.CourseGradeInfo(
-                            course_id=course_id,
-                            course_name=enrollment['name'],
-                            enrollment_date=str(enrollment['enrollment_date']),
-                            grade_released=False,
-                            grade="",
-                            semester="",
-                            date_posted="",
-                            remarks=""
-                        )
-                    
-                    course_grades_list.append(course_grade)
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                cur.execute(ENROLLED_COURSES_WITH_GRADES_QUERY, {"user_id": user_id})
+                course_grades_list = [course_grade_info(row) for row in cur.fetchall()]
             
             print(f"✓ Retrieved enrolled courses with grades for user {user_id}")
             return grades_pb2.EnrolledCoursesWithGradesResponse(
@@ -273,39 +376,15 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
                 student_name=""
             )
         finally:
-            if courses_conn:
-                courses_conn.close()
-            if grades_conn:
-                grades_conn.close()
+            release_connection(conn)
     
     def GetStudentGrades(self, request, context):
         """Get all grades for a student"""
-        token = request.token
-        
-        # Use local JWT validation
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return grades_pb2.GradesResponse(
-                status="error",
-                message=f"Authentication failed: {auth_result.get('message', 'Invalid token')}",
-                grades=[],
-                student_name=""
-            )
-        
-        user_id = auth_result['user_id']
-        username = auth_result['username']
-        user_role = auth_result['role']
-        
-        # Students can only view their own grades
-        if user_role != 'student':
-            return grades_pb2.GradesResponse(
-                status="error",
-                message=f"Only students can view grades. Your role is '{user_role}'",
-                grades=[],
-                student_name=""
-            )
         
+        user = current_user()
+        user_id = user['user_id']
+        username = user['username']
+
         conn = get_db_connection()
         if conn is None:
             return grades_pb2.GradesResponse(
@@ -317,37 +396,8 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
         
         try:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                # Get grades with course names from course database
-                # Note: This assumes courses table exists. You might need to join
-                # across databases or store course names in grades table
-                cur.execute("""
-                    SELECT 
-                        g.grade_id,
-                        g.course_id,
-                        g.course_id as course_name,
-                        g.grade,
-                        g.semester,
-                        g.date_posted,
-                        g.remarks
-                    FROM grades g
-                    WHERE g.student_public_id = %s
-                    ORDER BY g.date_posted DESC;
-                """, (user_id,))
-                
-                rows = cur.fetchall()
-                
-                grades = []
-                for row in rows:
-                    grade_info = grades_pb2.GradeInfo(
-                        grade_id=str(row['grade_id']),
-                        course_id=row['course_id'],
-                        course_name=row['course_name'],
-                        grade=row['grade'],
-                        semester=row['semester'],
-                        date_posted=str(row['date_posted']),
-                        remarks=row['remarks'] or ""
-                    )
-                    grades.append(grade_info)
+                cur.execute(STUDENT_GRADES_QUERY, {"user_id": user_id})
+                grades = [grade_info(row) for row in cur.fetchall()]
                 
                 print(f"✓ Retrieved {len(grades)} grades for user {user_id}")
                 return grades_pb2.GradesResponse(
@@ -366,38 +416,16 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
                 student_name=""
             )
         finally:
-            conn.close()
+            release_connection(conn)
     
     def UploadGrade(self, request, context):
         """Faculty uploads a grade for a student"""
-        token = request.token
         student_id = request.student_id
         course_id = request.course_id
         grade = request.grade
-        semester = request.semester
-        remarks = request.remarks
-        
-        # Use local JWT validation
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return grades_pb2.UploadGradeResponse(
-                status="error",
-                message="Authentication failed",
-                grade_id=""
-            )
-        
-        faculty_id = auth_result['user_id']
-        user_role = auth_result['role']
-        
-        # Only faculty can upload grades
-        if user_role != 'faculty':
-            return grades_pb2.UploadGradeResponse(
-                status="error",
-                message=f"Only faculty can upload grades. Your role is '{user_role}'",
-                grade_id=""
-            )
         
+        faculty_id = current_user()['user_id']
+
         conn = get_db_connection()
         if conn is None:
             return grades_pb2.UploadGradeResponse(
@@ -407,22 +435,18 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
             )
         
         try:
-            grade_id = str(uuid.uuid4())
-            
             with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO grades (grade_id, student_public_id, course_id, 
-                                      grade, semester, remarks, uploaded_by_faculty_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s);
-                """, (grade_id, student_id, course_id, grade, semester, remarks, faculty_id))
+                cur.execute(UPSERT_GRADE_QUERY, upsert_grade_params(request, faculty_id))
+                grade_id, inserted = cur.fetchone()
             
             conn.commit()
             print(f"✓ Grade uploaded: {grade} for student {student_id} in {course_id}")
             
             return grades_pb2.UploadGradeResponse(
                 status="success",
-                message=f"Grade {grade} uploaded successfully for {course_id}",
-                grade_id=grade_id
+                message=(f"Grade {grade} uploaded successfully for {course_id}" if inserted
+                         else f"Grade updated to {grade} for {course_id}"),
+                grade_id=str(grade_id)
             )
         
         except Exception as e:
@@ -434,32 +458,18 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
                 grade_id=""
             )
         finally:
-            conn.close()
+            release_connection(conn)
     
     def GetCourseGrades(self, request, context):
-        """Faculty views all grades for a specific course"""
-        token = request.token
+        """Faculty views all grades (or one page of grades) for a specific course"""
         course_id = request.course_id
-        
-        # Use local JWT validation
-        auth_result = validate_token_locally(token)
-        
-        if not auth_result.get('valid'):
-            return grades_pb2.CourseGradesResponse(
-                status="error",
-                message="Authentication failed",
-                course_id="",
-                course_name="",
-                student_grades=[]
-            )
-        
-        user_role = auth_result['role']
-        
-        # Only faculty can view course grades
-        if user_role != 'faculty':
+
+        try:
+            after_student, after_grade = decode_page_token(request.page_token, 2)
+        except ValueError as e:
             return grades_pb2.CourseGradesResponse(
                 status="error",
-                message=f"Only faculty can view course grades. Your role is '{user_role}'",
+                message=str(e),
                 course_id="",
                 course_name="",
                 student_grades=[]
@@ -477,35 +487,32 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
         
         try:
             with conn.cursor(cursor_factory=DictCursor) as cur:
-                cur.execute("""
-                    SELECT 
-                        student_public_id,
-                        grade,
-                        date_posted
-                    FROM grades
-                    WHERE course_id = %s
-                    ORDER BY date_posted DESC;
-                """, (course_id,))
-                
-                rows = cur.fetchall()
+                if request.page_size or request.page_token:
+                    limit = page_limit(request.page_size)
+                    cur.execute(COURSE_GRADES_PAGE_QUERY, {
+                        "course_id": course_id,
+                        "after_student": after_student,
+                        "after_grade": after_grade,
+                        "limit": limit + 1 if limit else None
+                    })
+                    rows, next_page_token = split_page(cur.fetchall(), limit, course_grades_key)
+                else:
+                    cur.execute(COURSE_GRADES_QUERY, {"course_id": course_id})
+                    rows, next_page_token = cur.fetchall(), ""
                 
-                student_grades = []
-                for row in rows:
-                    student_grade = grades_pb2.StudentGradeInfo(
-                        student_id=str(row['student_public_id']),
-                        student_name="Student",  # Would need to fetch from auth DB
-                        grade=row['grade'],
-                        date_posted=str(row['date_posted'])
-                    )
-                    student_grades.append(student_grade)
+                student_grades = [student_grade_info(row) for row in rows]
+
+                cur.execute(COURSE_NAME_QUERY, {"course_id": course_id})
+                course = cur.fetchone()
                 
                 print(f"✓ Retrieved {len(student_grades)} grades for course {course_id}")
                 return grades_pb2.CourseGradesResponse(
                     status="success",
                     message="Course grades retrieved",
                     course_id=course_id,
-                    course_name=course_id,  # Would fetch actual name
-                    student_grades=student_grades
+                    course_name=course['name'] if course else course_id,
+                    student_grades=student_grades,
+                    next_page_token=next_page_token
                 )
         
         except Exception as e:
@@ -518,11 +525,43 @@ class GradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
                 student_grades=[]
             )
         finally:
-            conn.close()
+            release_connection(conn)
+
+    def StreamCourseGrades(self, request, context):
+        """Stream a course's grades in student order from a server-side cursor"""
+        try:
+            after_student, after_grade = decode_page_token(request.page_token, 2)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        conn = get_db_connection()
+        if conn is None:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
+        try:
+            params = {
+                "course_id": request.course_id,
+                "after_student": after_student,
+                "after_grade": after_grade,
+                "limit": page_limit(request.page_size)
+            }
+            for row in stream_rows(conn, COURSE_GRADES_PAGE_QUERY, params):
+                yield student_grade_info(row)
+        except psycopg2.Error as e:
+            print(f"✗ Error streaming course grades: {e}")
+            context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+        finally:
+            release_connection(conn)
 
 def serve():
     init_db()
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    start_revocation_listener()
+    start_read_model_listeners(POSTGRES_DB)
+    start_pool_stats_logger()
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        interceptors=[AuthInterceptor()]
+    )
     grades_pb2_grpc.add_GradesServiceServicer_to_server(GradesServiceServicer(), server)
     server.add_insecure_port('[::]:50054')
     print("=" * 70)
@@ -533,4 +572,9 @@ def serve():
     server.wait_for_termination()
 
 if __name__ == '__main__':
-    serve()
\ No newline at end of file
+    if use_async_server():
+        import asyncio
+        from grpc_grades_server_aio import serve_async
+        asyncio.run(serve_async())
+    else:
+        serve()
\ No newline at end of file
@@ -0,0 +1,240 @@
+import grpc
+import asyncio
+import sys
+sys.path.append('./generated')
+
+import grades_pb2
+import grades_pb2_grpc
+
+import asyncpg
+
+from common_db import (
+    async_connection, close_all_async_pools, to_asyncpg, stream_async_rows, start_pool_stats_logger,
+    page_limit, decode_page_token, split_page
+)
+from common_auth import AsyncAuthInterceptor, current_user
+from common_revocation import start_revocation_listener
+from grades_read_model import start_read_model_listeners
+from grpc_grades_server import (
+    POSTGRES_DB, ENROLLED_COURSES_WITH_GRADES_QUERY, STUDENT_GRADES_QUERY, COURSE_NAME_QUERY,
+    COURSE_GRADES_QUERY, COURSE_GRADES_PAGE_QUERY, UPSERT_GRADE_QUERY,
+    init_db, grade_info, course_grade_info, course_grades_key, student_grade_info, upsert_grade_params
+)
+
+# grpc.aio variant of the Grades Service, backed by asyncpg pools.
+# Start with: python grpc_grades_server.py --aio  (or GRPC_ASYNC=true)
+
+class AsyncGradesServiceServicer(grades_pb2_grpc.GradesServiceServicer):
+    
+    async def GetEnrolledCoursesWithGrades(self, request, context):
+        """Get all enrolled courses with their grades (or 'Not Released' status)"""
+        user = current_user()
+        user_id = user['user_id']
+        username = user['username']
+        
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return grades_pb2.EnrolledCoursesWithGradesResponse(
+                    status="error",
+                    message="Database connection error",
+                    courses=[],
+                    student_name=""
+                )
+            
+            try:
+                query, args = to_asyncpg(ENROLLED_COURSES_WITH_GRADES_QUERY, {"user_id": user_id})
+                course_grades_list = [course_grade_info(row) for row in await conn.fetch(query, *args)]
+                
+                print(f"✓ Retrieved enrolled courses with grades for user {user_id}")
+                return grades_pb2.EnrolledCoursesWithGradesResponse(
+                    status="success",
+                    message="Enrolled courses with grades retrieved",
+                    courses=course_grades_list,
+                    student_name=username
+                )
+            
+            except Exception as e:
+                print(f"✗ Error fetching enrolled courses with grades: {e}")
+                return grades_pb2.EnrolledCoursesWithGradesResponse(
+                    status="error",
+                    message=f"Internal server error: {str(e)}",
+                    courses=[],
+                    student_name=""
+                )
+    
+    async def GetStudentGrades(self, request, context):
+        """Get all grades for a student"""
+        user = current_user()
+        user_id = user['user_id']
+        username = user['username']
+        
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return grades_pb2.GradesResponse(
+                    status="error",
+                    message="Database connection error",
+                    grades=[],
+                    student_name=""
+                )
+            
+            try:
+                query, args = to_asyncpg(STUDENT_GRADES_QUERY, {"user_id": user_id})
+                grades = [grade_info(row) for row in await conn.fetch(query, *args)]
+                
+                print(f"✓ Retrieved {len(grades)} grades for user {user_id}")
+                return grades_pb2.GradesResponse(
+                    status="success",
+                    message="Grades retrieved successfully",
+                    grades=grades,
+                    student_name=username
+                )
+            
+            except Exception as e:
+                print(f"✗ Error fetching grades: {e}")
+                return grades_pb2.GradesResponse(
+                    status="error",
+                    message="Internal server error",
+                    grades=[],
+                    student_name=""
+                )
+    
+    async def UploadGrade(self, request, context):
+        """Faculty uploads a grade for a student"""
+        faculty_id = current_user()['user_id']
+        
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Database connection error",
+                    grade_id=""
+                )
+            
+            try:
+                query, args = to_asyncpg(UPSERT_GRADE_QUERY, upsert_grade_params(request, faculty_id))
+                row = await conn.fetchrow(query, *args)
+                
+                print(f"✓ Grade uploaded: {request.grade} for student {request.student_id} in {request.course_id}")
+                return grades_pb2.UploadGradeResponse(
+                    status="success",
+                    message=(f"Grade {request.grade} uploaded successfully for {request.course_id}" if row['inserted']
+                             else f"Grade updated to {request.grade} for {request.course_id}"),
+                    grade_id=str(row['grade_id'])
+                )
+            
+            except Exception as e:
+                print(f"✗ Error uploading grade: {e}")
+                return grades_pb2.UploadGradeResponse(
+                    status="error",
+                    message="Failed to upload grade",
+                    grade_id=""
+                )
+    
+    async def GetCourseGrades(self, request, context):
+        """Faculty views all grades (or one page of grades) for a specific course"""
+        course_id = request.course_id
+
+        try:
+            after_student, after_grade = decode_page_token(request.page_token, 2)
+        except ValueError as e:
+            return grades_pb2.CourseGradesResponse(
+                status="error",
+                message=str(e),
+                course_id="",
+                course_name="",
+                student_grades=[]
+            )
+        
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                return grades_pb2.CourseGradesResponse(
+                    status="error",
+                    message="Database connection error",
+                    course_id="",
+                    course_name="",
+                    student_grades=[]
+                )
+            
+            try:
+                if request.page_size or request.page_token:
+                    limit = page_limit(request.page_size)
+                    query, args = to_asyncpg(COURSE_GRADES_PAGE_QUERY, {
+                        "course_id": course_id,
+                        "after_student": after_student,
+                        "after_grade": after_grade,
+                        "limit": limit + 1 if limit else None
+                    })
+                    rows, next_page_token = split_page(await conn.fetch(query, *args), limit, course_grades_key)
+                else:
+                    query, args = to_asyncpg(COURSE_GRADES_QUERY, {"course_id": course_id})
+                    rows, next_page_token = await conn.fetch(query, *args), ""
+                
+                student_grades = [student_grade_info(row) for row in rows]
+
+                query, args = to_asyncpg(COURSE_NAME_QUERY, {"course_id": course_id})
+                course_name = await conn.fetchval(query, *args)
+                
+                print(f"✓ Retrieved {len(student_grades)} grades for course {course_id}")
+                return grades_pb2.CourseGradesResponse(
+                    status="success",
+                    message="Course grades retrieved",
+                    course_id=course_id,
+                    course_name=course_name or course_id,
+                    student_grades=student_grades,
+                    next_page_token=next_page_token
+                )
+            
+            except Exception as e:
+                print(f"✗ Error fetching course grades: {e}")
+                return grades_pb2.CourseGradesResponse(
+                    status="error",
+                    message="Internal server error",
+                    course_id="",
+                    course_name="",
+                    student_grades=[]
+                )
+
+    async def StreamCourseGrades(self, request, context):
+        """Stream a course's grades in student order from a server-side cursor"""
+        try:
+            after_student, after_grade = decode_page_token(request.page_token, 2)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        async with async_connection(POSTGRES_DB) as conn:
+            if conn is None:
+                await context.abort(grpc.StatusCode.UNAVAILABLE, "Database connection error")
+
+            query, args = to_asyncpg(COURSE_GRADES_PAGE_QUERY, {
+                "course_id": request.course_id,
+                "after_student": after_student,
+                "after_grade": after_grade,
+                "limit": page_limit(request.page_size)
+            })
+            try:
+                async for row in stream_async_rows(conn, query, args):
+                    yield student_grade_info(row)
+            except asyncpg.PostgresError as e:
+                print(f"✗ Error streaming course grades: {e}")
+                await context.abort(grpc.StatusCode.INTERNAL, "Internal server error")
+
+async def serve_async():
+    init_db()
+    start_revocation_listener()
+    start_read_model_listeners(POSTGRES_DB)
+    start_pool_stats_logger()
+    server = grpc.aio.server(interceptors=[AsyncAuthInterceptor()])
+    grades_pb2_grpc.add_GradesServiceServicer_to_server(AsyncGradesServiceServicer(), server)
+    server.add_insecure_port('[::]:50054')
+    print("=" * 70)
+    print("gRPC Grades Service (asyncio) starting on port 50054...")
+    print("Using local JWT validation (independent of auth service)")
+    print("=" * 70)
+    await server.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await close_all_async_pools()
+
+if __name__ == '__main__':
+    asyncio.run(serve_async())
@@ -0,0 +1,37 @@
+import os
+import sys
+
+# Production serving for the Flask apps (REST gateway and view server). Run from services/:
+#   gunicorn -b 0.0.0.0:5001 rest_gateway:app
+#   gunicorn -b 0.0.0.0:5000 app_view:app
+# gunicorn picks this file up from the working directory. The app is imported once in the
+# master (preload) and forked into WSGI_WORKERS processes of WSGI_THREADS threads each.
+# gRPC channels, listener threads and other per-process state are created after the fork
+# by the app module's init_worker(). kill -HUP <master pid> replaces the workers gracefully.
+
+sys.path.append('./generated')
+
+workers = int(os.getenv('WSGI_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+threads = int(os.getenv('WSGI_THREADS', '8'))
+worker_class = 'gthread'
+preload_app = True
+
+# Seconds a worker may spend on one request, and to finish in-flight requests on reload/shutdown
+timeout = int(os.getenv('WSGI_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('WSGI_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WSGI_KEEPALIVE', '5'))
+
+# Recycle workers now and then; the jitter keeps them from restarting together
+max_requests = int(os.getenv('WSGI_MAX_REQUESTS', '0'))
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+accesslog = os.getenv('WSGI_ACCESS_LOG') or None
+
+
+def post_fork(server, worker):
+    """Give each worker its own gRPC channels and background threads"""
+    module = sys.modules.get(server.app.app_uri.split(':')[0])
+    init_worker = getattr(module, 'init_worker', None)
+    if init_worker is not None:
+        init_worker()
+    print(f"✓ Worker {worker.pid} initialized")
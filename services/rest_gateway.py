@@ -1,6 +1,9 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+import csv
 import grpc
+import io
+import os
 import sys
 sys.path.append('./generated')
 
@@ -15,507 +18,216 @@ import grades_pb2_grpc
 import faculty_grades_pb2
 import faculty_grades_pb2_grpc
 
+from common_grpc import get_stub, channel_ready, close_all_channels
+from common_auth import auth_metadata
+from common_revocation import start_revocation_listener
+from gateway_cache import response_cache, gateway_flight, start_invalidation_listener
+from gateway_json import message_serializer
+from gateway_routes import Service, Route, add_routes, bearer_token, error_response, is_paginated, json_response
+from gateway_compression import init_compression
+
 app = Flask(__name__)
 CORS(app)
-
-# gRPC service addresses
-AUTH_GRPC = 'localhost:50051'
-COURSE_GRPC = 'localhost:50052'
-ENROLLMENT_GRPC = 'localhost:50053'
-GRADES_GRPC = 'localhost:50054'
-FACULTY_GRADES_GRPC = 'localhost:50055'
-
-# ============= AUTH ENDPOINTS =============
-
-@app.route('/api/v1/auth/register', methods=['POST'])
-def register():
-    data = request.json
-    try:
-        with grpc.insecure_channel(AUTH_GRPC) as channel:
-            stub = auth_pb2_grpc.AuthServiceStub(channel)
-            response = stub.Register(auth_pb2.RegisterRequest(
-                username=data.get('username', ''),
-                password=data.get('password', ''),
-                role=data.get('role', 'student')
-            ))
-            
-            if response.status == "success":
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message,
-                    "token": response.token,
-                    "user_id": response.user_id,
-                    "role": response.role
-                }), 201
-            else:
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message
-                }), 400 if response.status == "error" else 500
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Auth service unavailable"}), 503
-
-@app.route('/api/v1/auth/login', methods=['POST'])
-def login():
-    data = request.json
-    try:
-        with grpc.insecure_channel(AUTH_GRPC) as channel:
-            stub = auth_pb2_grpc.AuthServiceStub(channel)
-            response = stub.Login(auth_pb2.LoginRequest(
-                username=data.get('username', ''),
-                password=data.get('password', '')
-            ))
-            
-            if response.status == "success":
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message,
-                    "token": response.token,
-                    "user_id": response.user_id,
-                    "role": response.role
-                }), 200
-            else:
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message
-                }), 401
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Auth service unavailable"}), 503
-
-@app.route('/api/v1/auth/validate', methods=['POST'])
-def validate():
-    data = request.json
-    token = data.get('token', '')
-    
-    try:
-        with grpc.insecure_channel(AUTH_GRPC) as channel:
-            stub = auth_pb2_grpc.AuthServiceStub(channel)
-            response = stub.ValidateToken(auth_pb2.ValidateRequest(token=token))
-            
-            if response.status == "valid":
-                return jsonify({
-                    "status": response.status,
-                    "user_id": response.user_id,
-                    "role": response.role,
-                    "username": response.username
-                }), 200
-            else:
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message
-                }), 401
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Auth service unavailable"}), 503
-
-# ============= COURSE ENDPOINTS =============
-
-@app.route('/api/v1/courses', methods=['GET'])
-def get_courses():
-    try:
-        with grpc.insecure_channel(COURSE_GRPC) as channel:
-            stub = course_pb2_grpc.CourseServiceStub(channel)
-            response = stub.GetCourses(course_pb2.GetCoursesRequest())
-            
-            if response.status == "success":
-                courses = {}
-                for course in response.courses:
-                    courses[course.course_id] = {
-                        "name": course.name,
-                        "capacity": course.capacity,
-                        "enrolled": course.enrolled,
-                        "open": course.is_open
-                    }
-                return jsonify(courses), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 500
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Course service unavailable"}), 503
-
-@app.route('/api/v1/courses/<course_id>', methods=['GET'])
-def get_course_details(course_id):
-    try:
-        with grpc.insecure_channel(COURSE_GRPC) as channel:
-            stub = course_pb2_grpc.CourseServiceStub(channel)
-            response = stub.GetCourseDetails(course_pb2.CourseRequest(course_id=course_id))
-            
-            if response.status == "success" and response.course:
-                return jsonify({
-                    "status": "success",
-                    "course": {
-                        "course_id": response.course.course_id,
-                        "name": response.course.name,
-                        "capacity": response.course.capacity,
-                        "enrolled": response.course.enrolled,
-                        "open": response.course.is_open
-                    }
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 404
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Course service unavailable"}), 503
-
-# ============= ENROLLMENT ENDPOINTS =============
-
-@app.route('/api/v1/enroll/course/<course_id>', methods=['POST'])
-def enroll_in_course(course_id):
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(ENROLLMENT_GRPC) as channel:
-            stub = enrollment_pb2_grpc.EnrollmentServiceStub(channel)
-            response = stub.EnrollInCourse(enrollment_pb2.EnrollRequest(
-                token=token,
-                course_id=course_id
-            ))
-            
-            if response.status == "success":
-                return jsonify({"status": response.status, "message": response.message}), 200
-            elif response.status == "rejected":
-                return jsonify({"status": response.status, "message": response.message}), 403
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Enrollment service unavailable"}), 503
-
-# REPLACED: @app.route('/api/v1/enrollments', methods=['GET'])
-@app.route('/api/v1/enroll/student', methods=['GET']) # NEW ROUTE FOR CONSISTENCY
-def get_student_enrollments():
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(ENROLLMENT_GRPC) as channel:
-            stub = enrollment_pb2_grpc.EnrollmentServiceStub(channel)
-            response = stub.GetStudentEnrollments(enrollment_pb2.StudentRequest(token=token))
-            
-            if response.status == "success":
-                enrollments = []
-                for enroll in response.enrollments:
-                    enrollments.append({
-                        "course_id": enroll.course_id,
-                        "course_name": enroll.course_name,
-                        "enrollment_date": enroll.enrollment_date
-                    })
-                return jsonify({
-                    "status": "success",
-                    "enrollments": enrollments
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Enrollment service unavailable"}), 503
-
-
-@app.route('/api/v1/enroll/drop/<course_id>', methods=['DELETE']) # NEW DROP ENDPOINT
-def drop_course(course_id):
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(ENROLLMENT_GRPC) as channel:
-            stub = enrollment_pb2_grpc.EnrollmentServiceStub(channel)
-            response = stub.DropFromCourse(enrollment_pb2.DropRequest(
-                token=token,
-                course_id=course_id
-            ))
-            
-            if response.status == "success":
-                return jsonify({"status": response.status, "message": response.message}), 200
-            elif response.status == "rejected":
-                return jsonify({"status": response.status, "message": response.message}), 403
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Enrollment service unavailable"}), 503
-
-# ============= GRADES ENDPOINTS (Student View) =============
-
-@app.route('/api/v1/grades/enrolled-with-grades', methods=['GET'])
-def get_enrolled_courses_with_grades():
-    """Student views their enrolled courses with grades"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
+init_compression(app)
+
+# gRPC service addresses (comma-separate several addresses to round-robin across replicas)
+AUTH_GRPC = os.getenv('AUTH_GRPC', 'localhost:50051')
+COURSE_GRPC = os.getenv('COURSE_GRPC', 'localhost:50052')
+ENROLLMENT_GRPC = os.getenv('ENROLLMENT_GRPC', 'localhost:50053')
+GRADES_GRPC = os.getenv('GRADES_GRPC', 'localhost:50054')
+FACULTY_GRADES_GRPC = os.getenv('FACULTY_GRADES_GRPC', 'localhost:50055')
+
+# Response cache TTLs in seconds (0 = no caching, ETags only); see gateway_cache
+COURSES_CACHE_TTL = float(os.getenv('COURSES_CACHE_TTL', '5'))
+GRADES_CACHE_TTL = float(os.getenv('GRADES_CACHE_TTL', '10'))
+# Databases whose change notifications drop cached responses in every worker
+POSTGRES_DB_COURSES = os.getenv('POSTGRES_DB_COURSES', 'student_portal_courses')
+POSTGRES_DB_GRADES = os.getenv('POSTGRES_DB_GRADES', 'student_portal_grades')
+
+# ============= SERVICES =============
+
+AUTH = Service(
+    AUTH_GRPC, auth_pb2_grpc.AuthServiceStub,
+    auth_pb2.DESCRIPTOR.services_by_name['AuthService'], "Auth service unavailable"
+)
+COURSES = Service(
+    COURSE_GRPC, course_pb2_grpc.CourseServiceStub,
+    course_pb2.DESCRIPTOR.services_by_name['CourseService'], "Course service unavailable"
+)
+ENROLLMENT = Service(
+    ENROLLMENT_GRPC, enrollment_pb2_grpc.EnrollmentServiceStub,
+    enrollment_pb2.DESCRIPTOR.services_by_name['EnrollmentService'], "Enrollment service unavailable"
+)
+GRADES = Service(
+    GRADES_GRPC, grades_pb2_grpc.GradesServiceStub,
+    grades_pb2.DESCRIPTOR.services_by_name['GradesService'], "Grades service unavailable"
+)
+FACULTY_GRADES = Service(
+    FACULTY_GRADES_GRPC, faculty_grades_pb2_grpc.FacultyGradesServiceStub,
+    faculty_grades_pb2.DESCRIPTOR.services_by_name['FacultyGradesService'], "Faculty Grades service unavailable"
+)
+
+# Login and registration shed by the Auth Service's password hashing backpressure
+AUTH_BUSY_MESSAGE = "Too many sign-ins in progress, please retry shortly"
+
+catalog_entry = message_serializer(course_pb2.CourseInfo.DESCRIPTOR, omit=('course_id',))
+
+def catalog_json(response):
+    """The catalog keyed by course_id; paginated requests (or a capped catalog) also get the next page token"""
+    courses = {course.course_id: catalog_entry(course) for course in response.courses}
+    if is_paginated() or response.next_page_token:
+        return {"courses": courses, "next_page_token": response.next_page_token}
+    return courses
+
+# ============= ROUTES =============
+# See gateway_routes.Route; the endpoint names are what invalidates_cache refers to
+
+ROUTES = [
+    # Auth
+    Route('register', 'POST', '/api/v1/auth/register', AUTH, 'Register', body=True,
+          defaults={'role': 'student'}, statuses={'success': 201, 'error': 400}, error_status=500,
+          busy_message=AUTH_BUSY_MESSAGE),
+    Route('login', 'POST', '/api/v1/auth/login', AUTH, 'Login', body=True,
+          error_status=401, busy_message=AUTH_BUSY_MESSAGE),
+    Route('validate', 'POST', '/api/v1/auth/validate', AUTH, 'ValidateToken', body=True,
+          statuses={'valid': 200}, error_status=401, omit=('message',)),
+    # Many tokens in one Auth service call; results follow the request order
+    Route('validate_batch', 'POST', '/api/v1/auth/validate-batch', AUTH, 'ValidateTokens', body=True,
+          omit=('message',)),
+    # Revoke the caller's token, so no service accepts it again
+    Route('logout', 'POST', '/api/v1/auth/logout', AUTH, 'RevokeToken', auth=True, invalidates=()),
+
+    # Courses
+    Route('get_courses', 'GET', '/api/v1/courses', COURSES, 'GetCourses',
+          error_status=500, render=catalog_json, cache_ttl=COURSES_CACHE_TTL),
+    Route('stream_courses', 'GET', '/api/v1/courses/stream', COURSES, 'StreamCourses'),
+    Route('get_course_details', 'GET', '/api/v1/courses/<course_id>', COURSES, 'GetCourseDetails',
+          error_status=404, omit=('message',), cache_ttl=COURSES_CACHE_TTL),
+
+    # Enrollment
+    Route('enroll_in_course', 'POST', '/api/v1/enroll/course/<course_id>', ENROLLMENT, 'EnrollInCourse', auth=True,
+          statuses={'success': 200, 'rejected': 403}, invalidates=('get_courses', 'get_course_details')),
+    Route('get_student_enrollments', 'GET', '/api/v1/enroll/student', ENROLLMENT, 'GetStudentEnrollments', auth=True,
+          omit=('message',)),
+    Route('stream_student_enrollments', 'GET', '/api/v1/enroll/student/stream', ENROLLMENT, 'StreamStudentEnrollments',
+          auth=True),
+    Route('drop_course', 'DELETE', '/api/v1/enroll/drop/<course_id>', ENROLLMENT, 'DropFromCourse', auth=True,
+          statuses={'success': 200, 'rejected': 403}, invalidates=('get_courses', 'get_course_details')),
+
+    # Grades (student view)
+    Route('get_enrolled_courses_with_grades', 'GET', '/api/v1/grades/enrolled-with-grades', GRADES,
+          'GetEnrolledCoursesWithGrades', auth=True, omit=('message',), cache_ttl=GRADES_CACHE_TTL, private=True),
+    Route('get_my_grades', 'GET', '/api/v1/grades/my-grades', GRADES, 'GetStudentGrades', auth=True,
+          omit=('message',), cache_ttl=GRADES_CACHE_TTL, private=True),
+
+    # Grades (faculty)
+    Route('upload_grade', 'POST', '/api/v1/grades/upload', GRADES, 'UploadGrade', auth=True, body=True,
+          statuses={'success': 201}, invalidates_user='student_id'),
+    Route('get_course_grades', 'GET', '/api/v1/grades/course/<course_id>', GRADES, 'GetCourseGrades', auth=True,
+          omit=('message',)),
+    Route('stream_course_grades', 'GET', '/api/v1/grades/course/<course_id>/stream', GRADES, 'StreamCourseGrades',
+          auth=True),
+
+    # Faculty grades (Node 5: Port 50055)
+    Route('get_all_students', 'GET', '/api/v1/faculty/students', FACULTY_GRADES, 'GetAllStudents', auth=True),
+    Route('stream_all_students', 'GET', '/api/v1/faculty/students/stream', FACULTY_GRADES, 'StreamAllStudents',
+          auth=True),
+    Route('get_student_enrollments_by_faculty', 'GET', '/api/v1/faculty/students/<student_id>/enrollments',
+          FACULTY_GRADES, 'GetStudentEnrollments', auth=True),
+    Route('faculty_upload_student_grade', 'POST', '/api/v1/faculty/grades/upload', FACULTY_GRADES,
+          'UploadStudentGrade', auth=True, body=True, defaults={'semester': 'Fall 2024'},
+          statuses={'success': 201}, invalidates_user='student_id',
+          unavailable_message="Faculty Grades service unavailable (Port 50055)"),
+]
+
+add_routes(app, ROUTES)
+
+# ============= FACULTY BATCH UPLOAD (client-streaming) =============
+
+batch_result_json = message_serializer(faculty_grades_pb2.GradeRowResult.DESCRIPTOR)
+
+@app.route('/api/v1/faculty/grades/upload-batch', methods=['POST'])
+def faculty_upload_grades_batch():
+    """
+    Faculty uploads many grades at once. Accepts a CSV body (Content-Type: text/csv,
+    header row student_id,course_id,grade,semester,remarks) or JSON: a list of grade
+    objects or {"grades": [...]}. Returns a per-row result summary.
+    """
+    token = bearer_token()
     if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(GRADES_GRPC) as channel:
-            stub = grades_pb2_grpc.GradesServiceStub(channel)
-            response = stub.GetEnrolledCoursesWithGrades(
-                grades_pb2.EnrolledCoursesWithGradesRequest(token=token)
-            )
-            
-            if response.status == "success":
-                courses = []
-                for course in response.courses:
-                    courses.append({
-                        "course_id": course.course_id,
-                        "course_name": course.course_name,
-                        "enrollment_date": course.enrollment_date,
-                        "grade_released": course.grade_released,
-                        "grade": course.grade if course.grade_released else "Not Released",
-                        "semester": course.semester,
-                        "date_posted": course.date_posted,
-                        "remarks": course.remarks
-                    })
-                return jsonify({
-                    "status": "success",
-                    "student_name": response.student_name,
-                    "courses": courses
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Grades service unavailable"}), 503
-
-@app.route('/api/v1/grades/my-grades', methods=['GET'])
-def get_my_grades():
-    """Student views their own grades"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(GRADES_GRPC) as channel:
-            stub = grades_pb2_grpc.GradesServiceStub(channel)
-            response = stub.GetStudentGrades(grades_pb2.GradesRequest(token=token))
-            
-            if response.status == "success":
-                grades = []
-                for grade in response.grades:
-                    grades.append({
-                        "grade_id": grade.grade_id,
-                        "course_id": grade.course_id,
-                        "course_name": grade.course_name,
-                        "grade": grade.grade,
-                        "semester": grade.semester,
-                        "date_posted": grade.date_posted,
-                        "remarks": grade.remarks
-                    })
-                return jsonify({
-                    "status": "success",
-                    "student_name": response.student_name,
-                    "grades": grades
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Grades service unavailable"}), 503
-
-@app.route('/api/v1/grades/upload', methods=['POST'])
-def upload_grade():
-    """Faculty uploads a grade"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    data = request.json
-    
-    try:
-        with grpc.insecure_channel(GRADES_GRPC) as channel:
-            stub = grades_pb2_grpc.GradesServiceStub(channel)
-            response = stub.UploadGrade(grades_pb2.UploadGradeRequest(
-                token=token,
-                student_id=data.get('student_id', ''),
-                course_id=data.get('course_id', ''),
-                grade=data.get('grade', ''),
-                semester=data.get('semester', ''),
-                remarks=data.get('remarks', '')
-            ))
-            
-            if response.status == "success":
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message,
-                    "grade_id": response.grade_id
-                }), 201
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Grades service unavailable"}), 503
-
-@app.route('/api/v1/grades/course/<course_id>', methods=['GET'])
-def get_course_grades(course_id):
-    """Faculty views all grades for a course"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(GRADES_GRPC) as channel:
-            stub = grades_pb2_grpc.GradesServiceStub(channel)
-            response = stub.GetCourseGrades(grades_pb2.CourseGradesRequest(
-                token=token,
-                course_id=course_id
-            ))
-            
-            if response.status == "success":
-                student_grades = []
-                for sg in response.student_grades:
-                    student_grades.append({
-                        "student_id": sg.student_id,
-                        "student_name": sg.student_name,
-                        "grade": sg.grade,
-                        "date_posted": sg.date_posted
-                    })
-                return jsonify({
-                    "status": "success",
-                    "course_id": response.course_id,
-                    "course_name": response.course_name,
-                    "student_grades": student_grades
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Grades service unavailable"}), 503
-
-# ============= FACULTY GRADES ENDPOINTS (NEW - Node 5: Port 50055) =============
-
-@app.route('/api/v1/faculty/students', methods=['GET'])
-def get_all_students():
-    """Faculty gets list of all students in the system"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(FACULTY_GRADES_GRPC) as channel:
-            stub = faculty_grades_pb2_grpc.FacultyGradesServiceStub(channel)
-            response = stub.GetAllStudents(faculty_grades_pb2.GetStudentsRequest(token=token))
-            
-            if response.status == "success":
-                students = []
-                for student in response.students:
-                    students.append({
-                        "student_id": student.student_id,
-                        "username": student.username
-                    })
-                return jsonify({
-                    "status": "success",
-                    "message": response.message,
-                    "students": students
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Faculty Grades service unavailable"}), 503
-
-@app.route('/api/v1/faculty/students/<student_id>/enrollments', methods=['GET'])
-def get_student_enrollments_by_faculty(student_id):
-    """Faculty gets all courses a specific student is enrolled in"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    try:
-        with grpc.insecure_channel(FACULTY_GRADES_GRPC) as channel:
-            stub = faculty_grades_pb2_grpc.FacultyGradesServiceStub(channel)
-            response = stub.GetStudentEnrollments(
-                faculty_grades_pb2.GetEnrollmentsRequest(token=token, student_id=student_id)
+        return error_response("Token missing", 401)
+    
+    if request.mimetype == 'text/csv':
+        rows = csv.DictReader(io.StringIO(request.get_data(as_text=True)))
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get('grades') if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            return error_response("Expected a CSV body or a JSON list of grades", 400)
+    
+    def upload_requests():
+        for row in rows:
+            yield faculty_grades_pb2.UploadGradeRequest(
+                student_id=(row.get('student_id') or '').strip(),
+                course_id=(row.get('course_id') or '').strip(),
+                grade=(row.get('grade') or '').strip(),
+                semester=(row.get('semester') or 'Fall 2024').strip(),
+                remarks=row.get('remarks') or ''
             )
-            
-            if response.status == "success":
-                enrollments = []
-                for enrollment in response.enrollments:
-                    enrollments.append({
-                        "course_id": enrollment.course_id,
-                        "course_name": enrollment.course_name,
-                        "enrollment_date": enrollment.enrollment_date
-                    })
-                return jsonify({
-                    "status": "success",
-                    "message": response.message,
-                    "student_id": response.student_id,
-                    "student_username": response.student_username,
-                    "enrollments": enrollments
-                }), 200
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
-    except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Faculty Grades service unavailable"}), 503
-
-@app.route('/api/v1/faculty/grades/upload', methods=['POST'])
-def faculty_upload_student_grade():
-    """Faculty uploads a grade for a specific student (NEW dedicated endpoint)"""
-    token = request.headers.get('Authorization')
-    if token and token.startswith('Bearer '):
-        token = token[7:]
-    
-    if not token:
-        return jsonify({"status": "error", "message": "Token missing"}), 401
-    
-    data = request.json
     
     try:
-        with grpc.insecure_channel(FACULTY_GRADES_GRPC) as channel:
-            stub = faculty_grades_pb2_grpc.FacultyGradesServiceStub(channel)
-            response = stub.UploadStudentGrade(faculty_grades_pb2.UploadGradeRequest(
-                token=token,
-                student_id=data.get('student_id', ''),
-                course_id=data.get('course_id', ''),
-                grade=data.get('grade', ''),
-                semester=data.get('semester', 'Fall 2024'),
-                remarks=data.get('remarks', '')
-            ))
-            
-            if response.status == "success":
-                return jsonify({
-                    "status": response.status,
-                    "message": response.message,
-                    "grade_id": response.grade_id
-                }), 201
-            else:
-                return jsonify({"status": response.status, "message": response.message}), 400
+        stub = get_stub(FACULTY_GRADES_GRPC, faculty_grades_pb2_grpc.FacultyGradesServiceStub)
+        response = stub.UploadGradesBatch(upload_requests(), metadata=auth_metadata(token))
+        
+        response_cache.invalidate(users={
+            result.student_id for result in response.results if result.status in ("inserted", "updated")
+        })
+        
+        return json_response({
+            "status": response.status,
+            "message": response.message,
+            "inserted": response.inserted,
+            "updated": response.updated,
+            "failed": response.failed,
+            "results": [batch_result_json(result) for result in response.results]
+        }, 400 if response.status == "error" else 200)
     except grpc.RpcError as e:
-        return jsonify({"status": "error", "message": "Faculty Grades service unavailable (Port 50055)"}), 503
+        return error_response("Faculty Grades service unavailable (Port 50055)", 503)
 
 # ============= HEALTH CHECK =============
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify REST gateway is running"""
+    services = {
+        "auth": AUTH_GRPC,
+        "courses": COURSE_GRPC,
+        "enrollment": ENROLLMENT_GRPC,
+        "grades": GRADES_GRPC,
+        "faculty_grades": FACULTY_GRADES_GRPC
+    }
     services_status = {
         "gateway": "running",
-        "services": {
-            "auth": AUTH_GRPC,
-            "courses": COURSE_GRPC,
-            "enrollment": ENROLLMENT_GRPC,
-            "grades": GRADES_GRPC,
-            "faculty_grades": FACULTY_GRADES_GRPC
-        }
+        "services": services,
+        "ready": {name: channel_ready(target, timeout=0.5) for name, target in services.items()},
+        "response_cache": response_cache.stats(),
+        "coalescing": gateway_flight.stats()
     }
     return jsonify(services_status), 200
 
+def init_worker():
+    """Per-process startup; gunicorn calls it in every worker after fork (see gunicorn.conf.py)"""
+    # Channels do not survive fork; each worker opens its own on first use
+    close_all_channels()
+    # Cached private responses must not outlive a revoked token
+    start_revocation_listener()
+    # Writes handled by other workers: course rows (seat counts) and each student's grade views
+    if COURSES_CACHE_TTL > 0:
+        start_invalidation_listener(POSTGRES_DB_COURSES, 'course_changed', ('get_courses', 'get_course_details'))
+    if GRADES_CACHE_TTL > 0:
+        start_invalidation_listener(POSTGRES_DB_GRADES, 'student_grades_changed',
+                                    ('get_enrolled_courses_with_grades', 'get_my_grades'), per_user=True)
+
 if __name__ == '__main__':
     print("=" * 70)
     print("REST Gateway starting on port 5001...")
@@ -531,5 +243,7 @@ if __name__ == '__main__':
     print("  GET  /api/v1/faculty/students")
     print("  GET  /api/v1/faculty/students/<id>/enrollments")
     print("  POST /api/v1/faculty/grades/upload")
+    print("  POST /api/v1/faculty/grades/upload-batch")
     print("=" * 70)
+    init_worker()
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
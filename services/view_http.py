@@ -0,0 +1,142 @@
+import contextvars
+import http.cookiejar
+import io
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+# HTTP client for the view server's calls to the REST gateway. One requests.Session per
+# process keeps a pool of keep-alive connections, so a page action no longer opens a new
+# TCP connection to the gateway. Connection failures are retried for every method (the
+# request never reached the gateway); 502/503/504 only for idempotent methods.
+
+GATEWAY_POOL_SIZE = int(os.getenv('GATEWAY_POOL_SIZE', '32'))   # kept-alive connections per gateway host
+GATEWAY_RETRIES = int(os.getenv('GATEWAY_RETRIES', '2'))
+GATEWAY_RETRY_BACKOFF = float(os.getenv('GATEWAY_RETRY_BACKOFF', '0.1'))
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# Direct mode: run the gateway's routes inside the view server, calling the gRPC
+# services over this process's own pooled channels instead of over HTTP to rest_gateway.
+# Configure the services with the gateway's variables (AUTH_GRPC, COURSE_GRPC, ...).
+VIEW_DIRECT_GRPC = os.getenv('VIEW_DIRECT_GRPC', 'false').lower() == 'true'
+
+_session = None
+_lock = threading.Lock()
+
+
+def gateway_module():
+    import rest_gateway
+    return rest_gateway
+
+
+class _WSGIBody(io.RawIOBase):
+    """Readable file over a WSGI response iterable, consumed inside `context`"""
+
+    def __init__(self, app_iter, context):
+        self._app_iter = app_iter
+        self._chunks = iter(app_iter)
+        self._context = context
+        self._pending = memoryview(b'')
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            chunk = self._context.run(next, self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed and hasattr(self._app_iter, 'close'):
+            self._context.run(self._app_iter.close)
+        super().close()
+
+
+class GatewayAppAdapter(HTTPAdapter):
+    """Transport that hands each request to rest_gateway's WSGI app in this process"""
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        environ = EnvironBuilder(
+            path=url.path,
+            query_string=url.query,
+            method=request.method,
+            headers=dict(request.headers),
+            data=request.body or b'',
+            base_url=f'{url.scheme}://{url.netloc}'
+        ).get_environ()
+        # The gateway's Flask contexts live in their own contextvars context: its streamed
+        # responses keep them pushed until the body is consumed, after this app's own have popped
+        context = contextvars.Context()
+        app_iter, status, headers = context.run(run_wsgi_app, gateway_module().app, environ)
+
+        code, _, reason = status.partition(' ')
+        raw = HTTPResponse(
+            body=io.BufferedReader(_WSGIBody(app_iter, context)),
+            headers=headers.to_wsgi_list(),
+            status=int(code),
+            reason=reason,
+            preload_content=False,
+            decode_content=False
+        )
+        response = self.build_response(request, raw)
+        if not stream:
+            response.content
+        return response
+
+
+def make_session():
+    if VIEW_DIRECT_GRPC:
+        adapter = GatewayAppAdapter()
+    else:
+        retry = Retry(
+            total=GATEWAY_RETRIES,
+            connect=GATEWAY_RETRIES,
+            read=GATEWAY_RETRIES,
+            status=GATEWAY_RETRIES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            status_forcelist=(502, 503, 504),
+            backoff_factor=GATEWAY_RETRY_BACKOFF,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=GATEWAY_POOL_SIZE, pool_block=False, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # The session is shared by every user's requests: never store or replay cookies
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def gateway_session():
+    """The process-wide pooled session (created on first use)"""
+    global _session
+    session = _session
+    if session is None:
+        with _lock:
+            if _session is None:
+                _session = make_session()
+            session = _session
+    return session
+
+
+def close_gateway_session():
+    """Drop the pooled connections (at shutdown, or in a worker after fork)"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
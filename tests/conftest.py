@@ -0,0 +1,24 @@
+import os
+import sys
+
+# The services import each other (and their generated stubs) as top-level modules
+SERVICES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services')
+sys.path.insert(0, SERVICES)
+sys.path.append(os.path.join(SERVICES, 'generated'))
+
+import psycopg2
+import pytest
+
+
+@pytest.fixture(scope='module')
+def postgres_admin():
+    """Autocommit connection to the server's `postgres` database, for creating scratch databases"""
+    from common_db import POSTGRES_HOST, POSTGRES_PASSWORD, POSTGRES_PORT, POSTGRES_USER
+    try:
+        conn = psycopg2.connect(dbname='postgres', user=POSTGRES_USER, password=POSTGRES_PASSWORD,
+                                host=POSTGRES_HOST, port=POSTGRES_PORT, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+    conn.autocommit = True
+    yield conn
+    conn.close()
@@ -0,0 +1,250 @@
+"""
+AuthInterceptor / AsyncAuthInterceptor: every call must be authenticated and
+authorized against METHOD_POLICIES before the servicer runs. Unary calls are
+rejected with the method's response (status/message), streaming calls are
+aborted with UNAUTHENTICATED or PERMISSION_DENIED, and methods without a policy
+are denied outright. Runs against in-process sync and grpc.aio servers.
+"""
+import asyncio
+import threading
+from concurrent import futures
+
+import grpc
+import jwt
+import pytest
+
+import common_jwt
+import enrollment_pb2
+import enrollment_pb2_grpc
+import faculty_grades_pb2
+import faculty_grades_pb2_grpc
+import grades_pb2
+from common_auth import METHOD_POLICIES, AsyncAuthInterceptor, AuthInterceptor, auth_metadata, current_user
+from common_jwt import generate_token
+from common_revocation import RevocationSet
+
+STUDENT_TOKEN = generate_token('student-1', 'stu', 'student')
+FACULTY_TOKEN = generate_token('faculty-1', 'prof', 'faculty')
+
+GET_ALL_STUDENTS = '/faculty_grades.FacultyGradesService/GetAllStudents'
+STREAM_ALL_STUDENTS = '/faculty_grades.FacultyGradesService/StreamAllStudents'
+
+
+class FacultyServicer(faculty_grades_pb2_grpc.FacultyGradesServiceServicer):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def GetAllStudents(self, request, context):
+        self.calls.append('GetAllStudents')
+        return faculty_grades_pb2.StudentsResponse(status='success', message=current_user()['username'])
+
+    def StreamAllStudents(self, request, context):
+        self.calls.append('StreamAllStudents')
+        yield faculty_grades_pb2.StudentInfo(username=current_user()['username'])
+
+    def UploadGradesBatch(self, request_iterator, context):
+        self.calls.append('UploadGradesBatch')
+        return faculty_grades_pb2.UploadGradesBatchResponse(status='success', message=str(len(list(request_iterator))))
+
+
+class EnrollmentServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def EnrollInCourse(self, request, context):
+        self.calls.append('EnrollInCourse')
+        return enrollment_pb2.EnrollResponse(status='success', message=current_user()['username'])
+
+
+class AsyncFacultyServicer(faculty_grades_pb2_grpc.FacultyGradesServiceServicer):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def GetAllStudents(self, request, context):
+        self.calls.append('GetAllStudents')
+        return faculty_grades_pb2.StudentsResponse(status='success', message=current_user()['username'])
+
+    async def StreamAllStudents(self, request, context):
+        self.calls.append('StreamAllStudents')
+        yield faculty_grades_pb2.StudentInfo(username=current_user()['username'])
+
+    async def UploadGradesBatch(self, request_iterator, context):
+        self.calls.append('UploadGradesBatch')
+        count = 0
+        async for _ in request_iterator:
+            count += 1
+        return faculty_grades_pb2.UploadGradesBatchResponse(status='success', message=str(count))
+
+
+class AsyncEnrollmentServicer(enrollment_pb2_grpc.EnrollmentServiceServicer):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def EnrollInCourse(self, request, context):
+        self.calls.append('EnrollInCourse')
+        return enrollment_pb2.EnrollResponse(status='success', message=current_user()['username'])
+
+
+def sync_server(policies, calls):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), interceptors=[AuthInterceptor(policies=policies)])
+    faculty_grades_pb2_grpc.add_FacultyGradesServiceServicer_to_server(FacultyServicer(calls), server)
+    enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(EnrollmentServicer(calls), server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    return port, lambda: server.stop(None)
+
+
+def aio_server(policies, calls):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        server = grpc.aio.server(interceptors=[AsyncAuthInterceptor(policies=policies)])
+        faculty_grades_pb2_grpc.add_FacultyGradesServiceServicer_to_server(AsyncFacultyServicer(calls), server)
+        enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(AsyncEnrollmentServicer(calls), server)
+        port = server.add_insecure_port('localhost:0')
+        await server.start()
+        return server, port
+
+    server, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return port, stop
+
+
+class Client:
+    """Stubs for a running server, plus the servicer calls it has recorded"""
+
+    def __init__(self, port, calls):
+        self.channel = grpc.insecure_channel(f'localhost:{port}')
+        self.faculty = faculty_grades_pb2_grpc.FacultyGradesServiceStub(self.channel)
+        self.enrollment = enrollment_pb2_grpc.EnrollmentServiceStub(self.channel)
+        self.calls = calls
+
+    def get_all_students(self, token=None):
+        return self.faculty.GetAllStudents(faculty_grades_pb2.GetStudentsRequest(), metadata=_metadata(token))
+
+    def stream_all_students(self, token=None):
+        return list(self.faculty.StreamAllStudents(faculty_grades_pb2.GetStudentsRequest(), metadata=_metadata(token)))
+
+
+def _metadata(token):
+    return auth_metadata(token) if token else None
+
+
+@pytest.fixture(params=[sync_server, aio_server], ids=['sync', 'aio'])
+def start_client(request):
+    """Factory: start a server of the parametrized kind with the given policies and return a Client"""
+    stops = []
+
+    def start(policies=METHOD_POLICIES):
+        calls = []
+        port, stop = request.param(policies, calls)
+        client = Client(port, calls)
+        stops.append((client, stop))
+        return client
+
+    yield start
+    for client, stop in stops:
+        client.channel.close()
+        stop()
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    revoked = RevocationSet(capacity=100)
+    monkeypatch.setattr(common_jwt, 'revoked_tokens', revoked)
+    return revoked
+
+
+def assert_rejected(client, token, unary_message, code):
+    response = client.get_all_students(token)
+    assert response.status == 'error'
+    assert response.message.startswith(unary_message)
+    with pytest.raises(grpc.RpcError) as error:
+        client.stream_all_students(token)
+    assert error.value.code() == code
+    assert client.calls == []
+
+
+def test_allowed_calls_reach_the_servicer_with_the_caller(start_client):
+    client = start_client()
+    assert client.get_all_students(FACULTY_TOKEN).message == 'prof'
+    assert [student.username for student in client.stream_all_students(FACULTY_TOKEN)] == ['prof']
+    assert client.calls == ['GetAllStudents', 'StreamAllStudents']
+
+
+def test_call_without_metadata_is_unauthenticated(start_client):
+    assert_rejected(start_client(), None, "Authentication failed: Token missing", grpc.StatusCode.UNAUTHENTICATED)
+
+
+def test_call_with_bad_token_is_unauthenticated(start_client):
+    forged = generate_token('faculty-1', 'prof', 'faculty')[:-4] + 'AAAA'
+    for token in ('not-a-jwt', forged):
+        assert_rejected(start_client(), token, "Authentication failed: Invalid token",
+                        grpc.StatusCode.UNAUTHENTICATED)
+
+
+def test_call_with_revoked_token_is_unauthenticated(start_client, revocations):
+    claims = jwt.decode(FACULTY_TOKEN, options={'verify_signature': False})
+    revocations.add(claims['jti'], claims['exp'])
+    assert_rejected(start_client(), FACULTY_TOKEN, "Authentication failed: Token revoked",
+                    grpc.StatusCode.UNAUTHENTICATED)
+
+
+def test_wrong_role_is_permission_denied(start_client):
+    client = start_client()
+    assert_rejected(client, STUDENT_TOKEN, "Access denied. Allowed roles: faculty", grpc.StatusCode.PERMISSION_DENIED)
+    # A policy's own denied status is used for its unary responses
+    response = client.enrollment.EnrollInCourse(enrollment_pb2.EnrollRequest(course_id='CS101'),
+                                                metadata=auth_metadata(FACULTY_TOKEN))
+    assert (response.status, client.calls) == ('rejected', [])
+
+
+def test_method_without_a_policy_is_denied(start_client):
+    policies = {method: policy for method, policy in METHOD_POLICIES.items()
+                if method not in (GET_ALL_STUDENTS, STREAM_ALL_STUDENTS)}
+    client = start_client(policies)
+    for call in (client.get_all_students, client.stream_all_students):
+        with pytest.raises(grpc.RpcError) as error:
+            call(FACULTY_TOKEN)
+        assert error.value.code() == grpc.StatusCode.PERMISSION_DENIED
+        assert 'has no access policy' in error.value.details()
+    assert client.calls == []
+
+
+def test_unary_requests_fall_back_to_the_token_field(start_client):
+    client = start_client()
+    response = client.enrollment.EnrollInCourse(enrollment_pb2.EnrollRequest(token=STUDENT_TOKEN, course_id='CS101'))
+    assert (response.status, response.message) == ('success', 'stu')
+    # Metadata takes precedence over the field
+    response = client.enrollment.EnrollInCourse(enrollment_pb2.EnrollRequest(token=STUDENT_TOKEN, course_id='CS101'),
+                                                metadata=auth_metadata(FACULTY_TOKEN))
+    assert response.status == 'rejected'
+    assert client.calls == ['EnrollInCourse']
+
+
+def test_client_streams_need_metadata(start_client):
+    client = start_client()
+    rows = [faculty_grades_pb2.UploadGradeRequest(token=FACULTY_TOKEN, student_id='s', course_id='c', grade='A')] * 2
+    response = client.faculty.UploadGradesBatch(iter(rows))
+    assert response.status == 'error' and response.message.startswith("Authentication failed")
+    assert client.calls == []
+    assert client.faculty.UploadGradesBatch(iter(rows), metadata=auth_metadata(FACULTY_TOKEN)).message == '2'
+    assert client.calls == ['UploadGradesBatch']
+
+
+def test_every_intercepted_method_has_a_policy():
+    services = [enrollment_pb2.DESCRIPTOR.services_by_name['EnrollmentService'],
+                grades_pb2.DESCRIPTOR.services_by_name['GradesService'],
+                faculty_grades_pb2.DESCRIPTOR.services_by_name['FacultyGradesService']]
+    methods = {f'/{service.full_name}/{method.name}' for service in services for method in service.methods}
+    assert methods == set(METHOD_POLICIES)
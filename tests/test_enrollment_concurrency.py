@@ -0,0 +1,156 @@
+"""
+Concurrency stress test for ENROLL_QUERY: hundreds of parallel EnrollInCourse calls
+against one capacity-N course, through a real gRPC server and a real PostgreSQL
+database. Run with `python -m pytest tests/test_enrollment_concurrency.py`; the
+POSTGRES_* variables select the server (the test creates and drops its own database)
+and the test is skipped when none is reachable.
+"""
+import asyncio
+import os
+import threading
+import uuid
+from concurrent import futures
+
+os.environ['POSTGRES_DB'] = os.getenv('STRESS_POSTGRES_DB', 'student_portal_courses_stress')
+os.environ.setdefault('DB_POOL_MAX_SIZE', '20')
+os.environ.setdefault('DB_POOL_STATS_INTERVAL', '0')
+
+import grpc
+import pytest
+
+import enrollment_pb2
+import enrollment_pb2_grpc
+from common_auth import AsyncAuthInterceptor, AuthInterceptor, auth_metadata
+from common_db import (
+    close_all_async_pools, close_all_pools, get_connection, release_connection
+)
+from common_jwt import generate_token
+from common_migrations import migrate
+from grpc_course_server import MIGRATIONS, POSTGRES_DB
+from grpc_enrollment_server import EnrollmentServiceServicer
+from grpc_enrollment_server_aio import AsyncEnrollmentServiceServicer
+
+CAPACITY = int(os.getenv('STRESS_CAPACITY', '25'))
+STUDENTS = int(os.getenv('STRESS_STUDENTS', '300'))
+# Each student enrolls this many times at once, so duplicate requests race as well
+ATTEMPTS_PER_STUDENT = int(os.getenv('STRESS_ATTEMPTS', '2'))
+CLIENT_THREADS = int(os.getenv('STRESS_CLIENT_THREADS', '64'))
+COURSE_ID = 'STRESS101'
+
+
+@pytest.fixture(scope='module')
+def database(postgres_admin):
+    with postgres_admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {POSTGRES_DB};')
+        cur.execute(f'CREATE DATABASE {POSTGRES_DB};')
+    assert migrate(POSTGRES_DB, MIGRATIONS) is not None
+    yield POSTGRES_DB
+    close_all_pools()
+    with postgres_admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {POSTGRES_DB} WITH (FORCE);')
+
+
+@pytest.fixture
+def course(database):
+    conn = get_connection(database)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM enrollments;")
+            cur.execute("DELETE FROM courses;")
+            cur.execute(
+                "INSERT INTO courses (course_id, name, capacity, enrolled, is_open) VALUES (%s, %s, %s, 0, TRUE);",
+                (COURSE_ID, 'Stress Testing', CAPACITY)
+            )
+        conn.commit()
+    finally:
+        release_connection(conn)
+    return COURSE_ID
+
+
+def sync_server():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=32), interceptors=[AuthInterceptor()])
+    enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(EnrollmentServiceServicer(), server)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+    return port, lambda: server.stop(None)
+
+
+def aio_server():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        server = grpc.aio.server(interceptors=[AsyncAuthInterceptor()])
+        enrollment_pb2_grpc.add_EnrollmentServiceServicer_to_server(AsyncEnrollmentServiceServicer(), server)
+        port = server.add_insecure_port('localhost:0')
+        await server.start()
+        return server, port
+
+    async def shutdown(server):
+        await server.stop(None)
+        await close_all_async_pools()
+
+    server, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(shutdown(server), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+    return port, stop
+
+
+@pytest.mark.parametrize('start_server', [sync_server, aio_server], ids=['sync', 'aio'])
+def test_parallel_enrolls_never_oversubscribe(course, start_server):
+    port, stop = start_server()
+    students = [str(uuid.uuid4()) for _ in range(STUDENTS)]
+    tokens = {student: generate_token(student, f'stress{i}', 'student') for i, student in enumerate(students)}
+    attempts = [student for student in students for _ in range(ATTEMPTS_PER_STUDENT)]
+
+    channel = grpc.insecure_channel(f'localhost:{port}')
+    stub = enrollment_pb2_grpc.EnrollmentServiceStub(channel)
+    barrier = threading.Barrier(CLIENT_THREADS)
+
+    def enroll(index):
+        if index < CLIENT_THREADS:
+            barrier.wait()      # release the first wave together
+        student = attempts[index]
+        response = stub.EnrollInCourse(
+            enrollment_pb2.EnrollRequest(course_id=course),
+            metadata=auth_metadata(tokens[student]), timeout=60
+        )
+        return student, response.status
+
+    try:
+        with futures.ThreadPoolExecutor(max_workers=CLIENT_THREADS) as pool:
+            results = list(pool.map(enroll, range(len(attempts))))
+    finally:
+        channel.close()
+        stop()
+
+    enrolled_students = [student for student, status in results if status == 'success']
+    assert len(results) == STUDENTS * ATTEMPTS_PER_STUDENT
+    assert len(enrolled_students) == CAPACITY
+    assert len(set(enrolled_students)) == CAPACITY
+
+    conn = get_connection(POSTGRES_DB)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT enrolled, capacity FROM courses WHERE course_id = %s;", (course,))
+            enrolled, capacity = cur.fetchone()
+            cur.execute("SELECT COUNT(*) FROM enrollments WHERE course_id = %s;", (course,))
+            rows, = cur.fetchone()
+            cur.execute("""
+                SELECT student_public_id, course_id FROM enrollments
+                GROUP BY student_public_id, course_id HAVING COUNT(*) > 1;
+            """)
+            duplicates = cur.fetchall()
+            cur.execute("SELECT student_public_id::text FROM enrollments WHERE course_id = %s;", (course,))
+            enrolled_rows = {student for student, in cur.fetchall()}
+    finally:
+        release_connection(conn)
+
+    assert enrolled == capacity == CAPACITY
+    assert rows == CAPACITY
+    assert duplicates == []
+    assert enrolled_rows == set(enrolled_students)
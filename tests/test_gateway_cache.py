@@ -0,0 +1,151 @@
+"""
+gateway_cache on a small Flask app: strong ETags and 304s, per-user isolation of
+private routes, invalidation on writes and on NOTIFY, and TTL 0 meaning no caching.
+"""
+import itertools
+
+import pytest
+from flask import Flask, jsonify
+
+import common_db
+import gateway_cache
+from common_jwt import generate_token
+from gateway_cache import cached_response, invalidates_cache, response_cache, start_invalidation_listener, strong_etag
+
+ALICE = generate_token('alice-id', 'alice', 'student')
+BOB = generate_token('bob-id', 'bob', 'student')
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    calls = itertools.count(1)
+    app.live_calls = []
+
+    @app.route('/courses')
+    @cached_response(60)
+    def courses():
+        return jsonify({'call': next(calls)})
+
+    @app.route('/grades')
+    @cached_response(60, private=True)
+    def grades():
+        return jsonify({'call': next(calls), 'user': gateway_cache.caller_id()})
+
+    @app.route('/live')
+    @cached_response(0)
+    def live():
+        app.live_calls.append(1)
+        return jsonify({'status': 'ok'})
+
+    @app.route('/missing')
+    @cached_response(60)
+    def missing():
+        return jsonify({'call': next(calls)}), 404
+
+    @app.route('/grades', methods=['POST'])
+    @invalidates_cache('courses')
+    def upload():
+        return jsonify({'status': 'success'})
+
+    response_cache.clear()
+    yield app.test_client()
+    response_cache.clear()
+
+
+def test_etag_is_strong_and_stable(client):
+    first = client.get('/courses')
+    second = client.get('/courses')
+    etag, weak = first.get_etag()
+    assert not weak
+    assert etag == strong_etag(first.data) == second.get_etag()[0]
+    assert first.data == second.data
+    assert strong_etag(b'{"a":1}') == strong_etag(b'{"a":1}') != strong_etag(b'{"a":2}')
+
+
+def test_if_none_match_gets_an_empty_304(client):
+    etag = client.get('/courses').get_etag()[0]
+    response = client.get('/courses', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.get_etag()[0] == etag
+    # A compressed copy's ETag is recognized too
+    assert client.get('/courses', headers={'If-None-Match': f'"{etag}-gzip"'}).status_code == 304
+    assert client.get('/courses', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_private_routes_are_cached_per_user(client):
+    alice = client.get('/grades', headers=bearer(ALICE))
+    bob = client.get('/grades', headers=bearer(BOB))
+    assert (alice.json['user'], bob.json['user']) == ('alice-id', 'bob-id')
+    assert client.get('/grades', headers=bearer(ALICE)).json == alice.json
+    assert client.get('/grades', headers=bearer(BOB)).json == bob.json
+    assert alice.headers['Cache-Control'] == 'no-cache, private'
+    assert 'Authorization' in alice.headers['Vary']
+    # Bob's ETag does not unlock Alice's entry
+    response = client.get('/grades', headers=dict(bearer(ALICE), **{'If-None-Match': bob.headers['ETag']}))
+    assert response.status_code == 200 and response.json == alice.json
+
+
+def test_private_routes_without_a_valid_token_bypass_the_cache(client):
+    client.get('/grades', headers=bearer(ALICE))
+    for headers in ({}, bearer('not-a-jwt')):
+        first = client.get('/grades', headers=headers)
+        assert first.json['user'] is None
+        assert client.get('/grades', headers=headers).json['call'] == first.json['call'] + 1
+        assert 'ETag' not in first.headers
+    assert response_cache.stats()['entries'] == 1
+
+
+def test_failed_responses_are_not_cached(client):
+    first = client.get('/missing')
+    assert first.status_code == 404
+    assert client.get('/missing').json['call'] == first.json['call'] + 1
+    assert response_cache.stats()['entries'] == 0
+
+
+def test_writes_invalidate_the_caller_and_the_named_endpoints(client):
+    courses = client.get('/courses').json
+    alice = client.get('/grades', headers=bearer(ALICE)).json
+    bob = client.get('/grades', headers=bearer(BOB)).json
+
+    assert client.post('/grades', headers=bearer(ALICE)).status_code == 200
+    assert client.get('/courses').json != courses
+    assert client.get('/grades', headers=bearer(ALICE)).json != alice
+    assert client.get('/grades', headers=bearer(BOB)).json == bob
+
+
+def test_notifications_invalidate_cached_entries(client, monkeypatch):
+    listeners = {}
+    monkeypatch.setattr(common_db, 'start_listener',
+                        lambda dbname, channel, on_notify: listeners.setdefault(channel, on_notify))
+    start_invalidation_listener('grades_db', 'grades_changed', ('grades',), per_user=True)
+    start_invalidation_listener('courses_db', 'courses_changed', ('courses',))
+
+    courses = client.get('/courses').json
+    alice = client.get('/grades', headers=bearer(ALICE)).json
+    bob = client.get('/grades', headers=bearer(BOB)).json
+
+    listeners['grades_changed']('alice-id')
+    assert client.get('/grades', headers=bearer(ALICE)).json != alice
+    assert client.get('/grades', headers=bearer(BOB)).json == bob
+    assert client.get('/courses').json == courses
+
+    # A (re)connect drops every entry of the listener's endpoints
+    listeners['grades_changed'](None)
+    assert client.get('/grades', headers=bearer(BOB)).json != bob
+
+    listeners['courses_changed']('ignored')
+    assert client.get('/courses').json != courses
+
+
+def test_ttl_zero_keeps_etags_but_does_not_cache(client):
+    etag = client.get('/live').get_etag()[0]
+    response = client.get('/live', headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304
+    assert len(client.application.live_calls) == 2
+    assert response_cache.stats()['entries'] == 0
@@ -0,0 +1,145 @@
+"""
+gateway_json's writers must produce exactly the bytes jsonify would for the same
+message, with orjson installed and without it.
+"""
+import importlib
+import sys
+
+import pytest
+from flask import Flask, jsonify
+from google.protobuf.descriptor import FieldDescriptor
+
+import auth_pb2
+import course_pb2
+import enrollment_pb2
+import faculty_grades_pb2
+import gateway_json
+import grades_pb2
+
+PB2_MODULES = [auth_pb2, course_pb2, enrollment_pb2, faculty_grades_pb2, grades_pb2]
+
+# Quotes, backslashes, control characters, non-ASCII and characters outside the BMP
+TEXTS = {
+    'ascii': ['CS101', 'Intro to "Systems" \\ part 1\n\t'],
+    'non_ascii': ['Café – Ünïcode', 'line sep \x01 \U0001F600 日本語'],
+}
+INTEGERS = [0, -7, 2**31 - 1, -2**31]
+INTEGERS_64 = [2**63 - 1, -2**63]
+
+
+def message_descriptors():
+    def walk(descriptor):
+        if not descriptor.GetOptions().map_entry:
+            yield descriptor
+        for nested in descriptor.nested_types:
+            yield from walk(nested)
+
+    for module in PB2_MODULES:
+        for descriptor in module.DESCRIPTOR.message_types_by_name.values():
+            yield from walk(descriptor)
+
+
+DESCRIPTORS = sorted(message_descriptors(), key=lambda descriptor: descriptor.full_name)
+
+
+def scalar(field, texts, index):
+    if field.cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        return texts[index % len(texts)]
+    if field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        return index % 2 == 0
+    if field.cpp_type == FieldDescriptor.CPPTYPE_INT64:
+        return INTEGERS_64[index % len(INTEGERS_64)]
+    if field.cpp_type in (FieldDescriptor.CPPTYPE_UINT32, FieldDescriptor.CPPTYPE_UINT64):
+        return abs(INTEGERS[index % len(INTEGERS)])
+    if field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        return field.enum_type.values[index % len(field.enum_type.values)].number
+    return INTEGERS[index % len(INTEGERS)]
+
+
+def fill(message, texts, index=0, depth=0):
+    """Set every field of `message` (two elements for repeated and map fields)"""
+    for field in message.DESCRIPTOR.fields:
+        value = getattr(message, field.name)
+        if field.message_type is not None and field.message_type.GetOptions().map_entry:
+            key_field, value_field = field.message_type.fields_by_name['key'], field.message_type.fields_by_name['value']
+            for item in range(2):
+                key = scalar(key_field, [f'{text}{item}' for text in texts], index + item)
+                if value_field.message_type is not None:
+                    fill(value[key], texts, index + item, depth + 1)
+                else:
+                    value[key] = scalar(value_field, texts, index + item)
+        elif field.label == FieldDescriptor.LABEL_REPEATED:
+            for item in range(2):
+                if field.message_type is not None:
+                    if depth < 3:
+                        fill(value.add(), texts, index + item, depth + 1)
+                else:
+                    value.append(scalar(field, texts, index + item))
+        elif field.message_type is not None:
+            if depth < 3:
+                fill(value, texts, index + 1, depth + 1)
+        else:
+            setattr(message, field.name, scalar(field, texts, index))
+    return message
+
+
+def messages(descriptor):
+    message_class = _message_class(descriptor)
+    yield 'empty', message_class()
+    for name, texts in TEXTS.items():
+        yield name, fill(message_class(), texts)
+        yield f'{name}_shifted', fill(message_class(), texts, index=1)
+
+
+def _message_class(descriptor):
+    module = next(module for module in PB2_MODULES if module.DESCRIPTOR is descriptor.file)
+    names = descriptor.full_name[len(descriptor.file.package) + 1:].split('.')
+    message_class = getattr(module, names[0])
+    for name in names[1:]:
+        message_class = getattr(message_class, name)
+    return message_class
+
+
+@pytest.fixture(scope='module')
+def app():
+    return Flask(__name__)
+
+
+def jsonify_bytes(app, obj):
+    """The body jsonify sends outside debug mode, without its trailing newline"""
+    with app.app_context():
+        return jsonify(obj).get_data().rstrip(b'\n')
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def writers(request, monkeypatch):
+    """gateway_json reloaded with orjson importable, or with the import blocked"""
+    if request.param == 'json':
+        monkeypatch.setitem(sys.modules, 'orjson', None)
+    module = importlib.reload(gateway_json)
+    if request.param == 'orjson' and module.orjson is None:
+        pytest.skip("orjson is not installed")
+    assert (module.orjson is None) == (request.param == 'json')
+    yield module
+    monkeypatch.undo()
+    importlib.reload(gateway_json)
+
+
+@pytest.mark.parametrize('descriptor', DESCRIPTORS, ids=lambda descriptor: descriptor.full_name)
+def test_message_writer_matches_jsonify(app, writers, descriptor):
+    for omit in ((), ('message',)):
+        serializer = writers.message_serializer(descriptor, omit)
+        writer = writers.message_writer(descriptor, omit)
+        for case, message in messages(descriptor):
+            assert writer(message) == jsonify_bytes(app, serializer(message)), case
+
+
+@pytest.mark.parametrize('obj', [
+    {},
+    {'status': 'success', 'message': 'ok', 'count': 3, 'open': True, 'none': None},
+    {'b': [1, 2, {'z': 'Ünïcode \U0001F600', 'a': [True, False]}], 'a': 'line sep "q" \\'},
+    {'big': 2**70, 'negative': -2**63, 'nested': {'list': [[], {}]}},
+], ids=['empty', 'flat', 'nested_non_ascii', 'big_integers'])
+def test_dumps_matches_jsonify(app, writers, obj):
+    assert writers.dumps(obj) == jsonify_bytes(app, obj)
+
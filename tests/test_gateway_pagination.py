@@ -0,0 +1,75 @@
+"""
+List routes return next_page_token only when the client paginated (page_size or
+page_token in the query string) or there is a next page; plain list responses keep
+their original shape. The gRPC services are replaced by canned responses.
+"""
+import pytest
+
+import course_pb2
+import gateway_routes
+import grades_pb2
+import rest_gateway
+from gateway_cache import response_cache
+
+COURSES = [course_pb2.CourseInfo(course_id='CS101', name='Intro', capacity=30)]
+CATALOG = {'CS101': {'name': 'Intro', 'capacity': 30, 'enrolled': 0, 'open': False}}
+GRADES = [grades_pb2.StudentGradeInfo(student_id='s-1', student_name='alice', grade='A')]
+
+
+class FakeStub:
+    """Answers every RPC with the canned response for its name, recording the requests"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def __getattr__(self, rpc):
+        def call(request, metadata=None):
+            self.requests.append(request)
+            return self.responses[rpc]
+        return call
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """(client, set_token): the gateway app with canned responses carrying the given next_page_token"""
+    stub = FakeStub({})
+
+    def set_token(token):
+        stub.responses.update(
+            GetCourses=course_pb2.GetCoursesResponse(status='success', courses=COURSES, next_page_token=token),
+            GetCourseGrades=grades_pb2.CourseGradesResponse(status='success', course_id='CS101',
+                                                            student_grades=GRADES, next_page_token=token))
+        response_cache.clear()
+
+    monkeypatch.setattr(gateway_routes, 'get_stub', lambda target, stub_class: stub)
+    set_token('')
+    yield rest_gateway.app.test_client(), set_token
+    response_cache.clear()
+
+
+def course_grades(client, query=''):
+    return client.get(f'/api/v1/grades/course/CS101{query}', headers={'Authorization': 'Bearer t'}).json
+
+
+def test_unpaginated_lists_have_no_page_token(gateway):
+    client, _ = gateway
+    assert client.get('/api/v1/courses').json == CATALOG
+    body = course_grades(client)
+    assert 'next_page_token' not in body
+    assert body['student_grades'][0]['student_name'] == 'alice'
+
+
+@pytest.mark.parametrize('query', ['?page_size=1', '?page_token=abc', '?page_size=1&page_token=abc'])
+def test_paginated_requests_get_the_page_token_even_on_the_last_page(gateway, query):
+    client, _ = gateway
+    body = client.get(f'/api/v1/courses{query}').json
+    assert body == {'courses': CATALOG, 'next_page_token': ''}
+    assert course_grades(client, query)['next_page_token'] == ''
+
+
+def test_a_next_page_is_always_reported(gateway):
+    client, set_token = gateway
+    set_token('next')
+    assert client.get('/api/v1/courses').json['next_page_token'] == 'next'
+    assert course_grades(client)['next_page_token'] == 'next'
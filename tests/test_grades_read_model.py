@@ -0,0 +1,125 @@
+"""
+grades_read_model.rebuild resyncs a projection in place: the copy ends up equal to
+the source, and only rows that actually changed are written, so a resync that finds
+nothing new sends no student_grades_changed notifications. Needs PostgreSQL.
+"""
+import select
+
+import psycopg2
+import pytest
+
+import grades_read_model
+import grpc_grades_server
+from common_db import POSTGRES_HOST, POSTGRES_PASSWORD, POSTGRES_PORT, POSTGRES_USER, close_all_pools
+from common_migrations import migrate
+
+SOURCE_DB = 'student_portal_read_model_source'
+TARGET_DB = 'student_portal_read_model_grades'
+
+STUDENTS = ['00000000-0000-0000-0000-00000000000%d' % i for i in range(1, 4)]
+
+
+def connect(dbname):
+    conn = psycopg2.connect(dbname=dbname, user=POSTGRES_USER, password=POSTGRES_PASSWORD,
+                            host=POSTGRES_HOST, port=POSTGRES_PORT)
+    conn.autocommit = True
+    return conn
+
+
+@pytest.fixture
+def databases(postgres_admin):
+    with postgres_admin.cursor() as cur:
+        for dbname in (SOURCE_DB, TARGET_DB):
+            cur.execute(f'DROP DATABASE IF EXISTS {dbname} WITH (FORCE);')
+            cur.execute(f'CREATE DATABASE {dbname};')
+    assert migrate(TARGET_DB, grpc_grades_server.MIGRATIONS)
+    source = connect(SOURCE_DB)
+    with source.cursor() as cur:
+        cur.execute("CREATE TABLE courses (course_id VARCHAR(20) PRIMARY KEY, name VARCHAR(100) NOT NULL);")
+        cur.execute("""
+            CREATE TABLE enrollments (
+                student_public_id UUID, course_id VARCHAR(20), enrollment_date TIMESTAMP DEFAULT '2024-09-01',
+                PRIMARY KEY (student_public_id, course_id)
+            );
+        """)
+        cur.execute("INSERT INTO courses VALUES ('CS101', 'Intro'), ('CS102', 'Systems');")
+        cur.execute("INSERT INTO enrollments (student_public_id, course_id) VALUES (%s, 'CS101'), (%s, 'CS101'), "
+                    "(%s, 'CS102');", STUDENTS)
+    listener = connect(TARGET_DB)
+    with listener.cursor() as cur:
+        cur.execute("LISTEN student_grades_changed;")
+    yield source, listener
+    source.close()
+    listener.close()
+    close_all_pools()
+    with postgres_admin.cursor() as cur:
+        for dbname in (SOURCE_DB, TARGET_DB):
+            cur.execute(f'DROP DATABASE IF EXISTS {dbname} WITH (FORCE);')
+
+
+def projections():
+    return [projection._replace(source_db=SOURCE_DB)
+            for projection in (grades_read_model.COURSE_NAMES, grades_read_model.STUDENT_ENROLLMENTS)]
+
+
+def resync():
+    for projection in projections():
+        grades_read_model.rebuild(projection, TARGET_DB)
+
+
+def notifications(listener):
+    """Payloads of the notifications delivered so far (they are sent on commit)"""
+    while select.select([listener], [], [], 0.2)[0]:
+        listener.poll()
+    payloads = sorted(notify.payload for notify in listener.notifies)
+    listener.notifies.clear()
+    return payloads
+
+
+def rows(conn, query):
+    with conn.cursor() as cur:
+        cur.execute(query)
+        return sorted(tuple(str(value) for value in row) for row in cur.fetchall())
+
+
+def assert_in_sync(source):
+    target = connect(TARGET_DB)
+    try:
+        assert rows(target, "SELECT * FROM course_names;") == rows(source, "SELECT * FROM courses;")
+        assert (rows(target, "SELECT * FROM student_enrollments;")
+                == rows(source, "SELECT * FROM enrollments;"))
+    finally:
+        target.close()
+
+
+def test_resync_without_changes_writes_nothing(databases):
+    source, listener = databases
+    resync()
+    assert_in_sync(source)
+    assert notifications(listener) == [''] + STUDENTS
+
+    resync()
+    assert_in_sync(source)
+    assert notifications(listener) == []
+
+
+def test_resync_applies_only_the_changes(databases):
+    source, listener = databases
+    resync()
+    notifications(listener)
+
+    with source.cursor() as cur:
+        cur.execute("UPDATE enrollments SET enrollment_date = '2024-09-02' WHERE student_public_id = %s;",
+                    (STUDENTS[0],))
+        cur.execute("DELETE FROM enrollments WHERE student_public_id = %s;", (STUDENTS[1],))
+        cur.execute("INSERT INTO enrollments (student_public_id, course_id) VALUES (%s, 'CS101');", (STUDENTS[2],))
+    resync()
+    assert_in_sync(source)
+    assert notifications(listener) == STUDENTS
+
+    with source.cursor() as cur:
+        cur.execute("UPDATE courses SET name = 'Introduction' WHERE course_id = 'CS101';")
+        cur.execute("DELETE FROM courses WHERE course_id = 'CS102';")
+    resync()
+    assert_in_sync(source)
+    assert notifications(listener) == ['']
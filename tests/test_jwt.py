@@ -0,0 +1,170 @@
+"""
+TokenVerifier replaces jwt.decode with its own HS256 verification, so it must reject
+everything jwt.decode would: bad signatures, other algorithms, unknown keys, expired,
+not-yet-valid or malformed tokens.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import jwt
+import pytest
+
+import common_jwt
+from common_jwt import ClaimsCache, TokenVerifier
+
+KEYS = {'old': 'retired-secret-0123456789abcdef0123', 'new': 'current-secret-0123456789abcdef0123'}
+
+
+def claims(**overrides):
+    now = int(time.time())
+    values = {'public_id': 'u-1', 'username': 'alice', 'role': 'student', 'iat': now, 'exp': now + 3600, 'jti': 'j-1'}
+    values.update(overrides)
+    return {name: value for name, value in values.items() if value is not None}
+
+
+def sign(payload, kid='new', secret=None, algorithm='HS256', headers=None):
+    headers = dict({'kid': kid} if kid else {}, **(headers or {}))
+    return jwt.encode(payload, KEYS.get(kid, 'x' * 32) if secret is None else secret, algorithm=algorithm,
+                      headers=headers)
+
+
+def segment(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def resign(header_segment, payload_segment, secret=KEYS['new']):
+    """A token whose segments are taken as given, with a valid HS256 signature over them"""
+    signing_input = f'{header_segment}.{payload_segment}'
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f'{signing_input}.{segment(signature)}'
+
+
+@pytest.fixture
+def verifier():
+    return TokenVerifier(KEYS, 'new')
+
+
+def test_valid_token_round_trips(verifier):
+    payload = claims()
+    assert verifier.decode(sign(payload)) == payload
+    assert verifier.decode(verifier.encode(payload)) == payload
+
+
+def test_forged_signature_is_rejected(verifier):
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(sign(claims(), secret='attacker-secret-0123456789abcdef'))
+    token = sign(claims())
+    header, payload, signature = token.split('.')
+    tampered = segment(json.dumps(claims(role='faculty')).encode())
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(f'{header}.{tampered}.{signature}')
+
+
+@pytest.mark.parametrize('cut', [1, 10, 43])
+def test_truncated_signature_is_rejected(verifier, cut):
+    token = sign(claims())
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.decode(token[:-cut])
+
+
+def test_alg_none_is_rejected(verifier):
+    token = jwt.encode(claims(), None, algorithm='none', headers={'kid': 'new'})
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.decode(token)
+    # An unsigned token with the signature of a real one grafted on
+    header = segment(json.dumps({'alg': 'none', 'kid': 'new'}).encode())
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.decode(resign(header, segment(json.dumps(claims()).encode())))
+
+
+def test_hs512_is_rejected(verifier):
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        verifier.decode(sign(claims(), algorithm='HS512'))
+
+
+def test_unknown_kid_is_rejected(verifier):
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(sign(claims(), kid='other', secret=KEYS['new']))
+
+
+def test_missing_kid_uses_the_active_key(verifier):
+    payload = claims()
+    assert verifier.decode(sign(payload, kid=None, secret=KEYS['new'])) == payload
+    with pytest.raises(jwt.InvalidSignatureError):
+        verifier.decode(sign(payload, kid=None, secret=KEYS['old']))
+
+
+def test_rotation_accepts_listed_keys_and_rejects_retired_ones():
+    token = sign(claims(), kid='old')
+    # Rotated: signing with 'new', 'old' still accepted
+    assert TokenVerifier(KEYS, 'new').decode(token)['username'] == 'alice'
+    # Retired: 'old' removed from the key list
+    with pytest.raises(jwt.InvalidSignatureError):
+        TokenVerifier({'new': KEYS['new']}, 'new').decode(token)
+
+
+def test_expired_token_is_rejected(verifier):
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(sign(claims(exp=int(time.time()) - 1)))
+
+
+def test_token_without_exp_is_rejected(verifier):
+    with pytest.raises(jwt.MissingRequiredClaimError):
+        verifier.decode(sign(claims(exp=None)))
+
+
+@pytest.mark.parametrize('claim', ['nbf', 'iat'])
+def test_token_not_yet_valid_is_rejected(verifier, claim):
+    with pytest.raises(jwt.ImmatureSignatureError):
+        verifier.decode(sign(claims(**{claim: int(time.time()) + 600})))
+    assert verifier.decode(sign(claims(**{claim: int(time.time()) - 600})))['username'] == 'alice'
+
+
+@pytest.mark.parametrize('claim, value', [('exp', 'tomorrow'), ('nbf', 'now'), ('iat', True)])
+def test_non_numeric_time_claims_are_rejected(verifier, claim, value):
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.decode(sign(claims(**{claim: value})))
+
+
+@pytest.mark.parametrize('token', [
+    'not-a-token',
+    '!!!.e30.c2ln',
+    resign(segment(json.dumps({'alg': 'HS256'}).encode()), '%%%'),
+    resign('e30', segment(json.dumps(claims()).encode())),                     # header without alg
+    resign(segment(b'[1, 2]'), segment(json.dumps(claims()).encode())),        # header not an object
+    resign(segment(json.dumps({'alg': 'HS256'}).encode()), segment(b'[1, 2]')),
+    resign(segment(json.dumps({'alg': 'HS256'}).encode()), segment(b'"claims"')),
+    resign(segment(json.dumps({'alg': 'HS256'}).encode()), segment(b'{not json')),
+], ids=['no_segments', 'bad_base64_header', 'bad_base64_payload', 'no_alg', 'header_list',
+        'payload_list', 'payload_string', 'payload_not_json'])
+def test_malformed_tokens_are_rejected(verifier, token):
+    with pytest.raises(jwt.InvalidTokenError):
+        verifier.decode(token)
+    with pytest.raises(jwt.InvalidTokenError):
+        jwt.decode(token, KEYS['new'], algorithms=['HS256'])
+
+
+def test_cached_claims_expire_with_the_token(verifier, monkeypatch):
+    now = time.time()
+    token = sign(claims(iat=int(now), exp=int(now) + 60))
+    assert verifier.decode(token)['username'] == 'alice'
+    assert len(verifier.cache._entries) == 1
+
+    monkeypatch.setattr(common_jwt.time, 'time', lambda: now + 120)
+    with pytest.raises(jwt.ExpiredSignatureError):
+        verifier.decode(token)
+    assert len(verifier.cache._entries) == 0
+
+
+def test_claims_cache_rejects_expired_entries():
+    cache = ClaimsCache(max_size=2)
+    cache.put(b'live', {'exp': time.time() + 60})
+    cache.put(b'dead', {'exp': time.time() - 1})
+    assert cache.get(b'live') is not None
+    assert cache.get(b'dead') is None
+    cache.put(b'third', {'exp': time.time() + 60})
+    cache.put(b'fourth', {'exp': time.time() + 60})
+    assert cache.get(b'live') is None       # least recently used, evicted
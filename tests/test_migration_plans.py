@@ -0,0 +1,70 @@
+"""
+Every service's migrations, applied to a scratch database: the hot queries they
+declare (PlanCheck) must be able to use an index, and migrating again must be a
+no-op. Skipped when no PostgreSQL server is reachable (see conftest.py).
+"""
+import pytest
+
+import grpc_auth_server
+import grpc_course_server
+import grpc_grades_server
+from common_db import close_all_pools, get_connection, release_connection
+from common_migrations import check_plans, migrate
+
+SERVICES = {
+    'auth': grpc_auth_server.MIGRATIONS,
+    'course': grpc_course_server.MIGRATIONS,
+    'grades': grpc_grades_server.MIGRATIONS,
+}
+
+SCHEMA_QUERIES = [
+    "SELECT table_name, column_name, data_type, is_nullable, column_default FROM information_schema.columns "
+    "WHERE table_schema = 'public' ORDER BY 1, 2;",
+    "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = 'public' ORDER BY 1;",
+    "SELECT tgname, tgrelid::regclass::text FROM pg_trigger WHERE NOT tgisinternal ORDER BY 1, 2;",
+    "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE connamespace = 'public'::regnamespace ORDER BY 1;",
+    "SELECT proname, md5(prosrc) FROM pg_proc WHERE pronamespace = 'public'::regnamespace ORDER BY 1;",
+    "SELECT version, name, applied_at FROM schema_migrations ORDER BY version;",
+]
+
+
+def schema(dbname):
+    conn = get_connection(dbname)
+    try:
+        with conn.cursor() as cur:
+            snapshot = []
+            for query in SCHEMA_QUERIES:
+                cur.execute(query)
+                snapshot.append(cur.fetchall())
+        conn.rollback()
+        return snapshot
+    finally:
+        release_connection(conn)
+
+
+@pytest.fixture(params=sorted(SERVICES))
+def service_database(request, postgres_admin):
+    dbname = f'student_portal_{request.param}_plans'
+    with postgres_admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {dbname} WITH (FORCE);')
+        cur.execute(f'CREATE DATABASE {dbname};')
+    yield dbname, SERVICES[request.param]
+    close_all_pools()
+    with postgres_admin.cursor() as cur:
+        cur.execute(f'DROP DATABASE IF EXISTS {dbname} WITH (FORCE);')
+
+
+def test_hot_queries_use_an_index(service_database):
+    dbname, migrations = service_database
+    applied = migrate(dbname, migrations)
+    assert applied == sorted(migration.version for migration in migrations)
+    assert any(migration.checks for migration in migrations)
+    assert check_plans(dbname, migrations) == []
+
+
+def test_migrating_again_changes_nothing(service_database):
+    dbname, migrations = service_database
+    assert migrate(dbname, migrations) is not None
+    before = schema(dbname)
+    assert migrate(dbname, migrations) == []
+    assert schema(dbname) == before
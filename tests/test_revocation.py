@@ -0,0 +1,117 @@
+"""
+BloomFilter and RevocationSet: revoked jtis are always reported, expired ones are
+dropped on rebuilds, and jtis never revoked are never reported (the exact map
+confirms every bloom filter hit).
+"""
+import random
+import uuid
+
+import pytest
+
+import common_db
+import common_jwt
+import common_revocation
+from common_jwt import TokenRevokedError, decode_token, generate_token
+from common_revocation import BloomFilter, RevocationSet, start_revocation_listener
+
+NOW = 1_700_000_000.0
+
+
+def random_jtis(seed, count):
+    rng = random.Random(seed)
+    return [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(count)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Pin common_revocation's time.time(); set clock.now to move it"""
+    class Clock:
+        now = NOW
+    monkeypatch.setattr(common_revocation.time, 'time', lambda: Clock.now)
+    return Clock
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(1000, 0.01)
+    added = random_jtis(1, 1000)
+    for jti in added:
+        bloom.add(jti)
+    assert all(jti in bloom for jti in added)
+    false_positives = sum(jti in bloom for jti in random_jtis(2, 10000))
+    assert false_positives < 10000 * 0.01 * 3
+
+
+def test_add_makes_a_jti_revoked(clock):
+    revoked = RevocationSet(capacity=100)
+    assert not revoked.is_revoked('jti-1')
+    revoked.add('jti-1', NOW + 60)
+    assert revoked.is_revoked('jti-1')
+    assert len(revoked) == 1
+    # Already expired: nothing to revoke
+    revoked.add('jti-2', NOW - 1)
+    assert not revoked.is_revoked('jti-2')
+    assert len(revoked) == 1
+
+
+def test_revocations_lapse_when_the_token_expires(clock):
+    revoked = RevocationSet(capacity=100)
+    revoked.add('jti-1', NOW + 60)
+    clock.now = NOW + 61
+    assert not revoked.is_revoked('jti-1')
+
+
+def test_replace_keeps_live_and_drops_expired_entries(clock):
+    revoked = RevocationSet(capacity=100)
+    revoked.add('old', NOW + 60)
+    revoked.replace([('live', NOW + 60), ('expired', NOW - 1)])
+    assert revoked.is_revoked('live')
+    assert not revoked.is_revoked('expired')
+    assert not revoked.is_revoked('old')
+    assert len(revoked) == 1
+
+
+def test_rebuild_on_overflow_drops_expired_entries_and_grows(clock):
+    revoked = RevocationSet(capacity=4)
+    for i in range(4):
+        revoked.add(f'short-{i}', NOW + 10)
+    clock.now = NOW + 20
+    # The fifth entry overflows the capacity: the rebuild drops the four expired ones
+    revoked.add('live', NOW + 60)
+    assert len(revoked) == 1 and revoked.capacity == 4
+    assert revoked.is_revoked('live')
+
+    live = [f'live-{i}' for i in range(10)]
+    for jti in live:
+        revoked.add(jti, NOW + 60)
+    assert revoked.capacity >= 8
+    assert all(revoked.is_revoked(jti) for jti in live + ['live'])
+
+
+def test_jtis_never_revoked_are_not_reported(clock):
+    revoked = RevocationSet(capacity=200, error_rate=0.05)
+    revoked.replace((jti, NOW + 60) for jti in random_jtis(3, 200))
+    assert not any(revoked.is_revoked(jti) for jti in random_jtis(4, 20000))
+    assert not revoked.is_revoked(None) and not revoked.is_revoked('')
+
+
+def test_listener_notifications_add_revocations(monkeypatch):
+    revoked = RevocationSet(capacity=100)
+    listeners = {}
+    monkeypatch.setattr(common_revocation, 'revoked_tokens', revoked)
+    monkeypatch.setattr(common_db, 'start_listener',
+                        lambda dbname, channel, on_notify: listeners.setdefault(channel, on_notify))
+    start_revocation_listener('auth_db')
+    exp = int(common_revocation.time.time()) + 60
+    listeners[common_revocation.TOKEN_REVOKED_CHANNEL](f'jti-1 {exp}')
+    assert revoked.is_revoked('jti-1')
+
+
+def test_decode_token_rejects_revoked_tokens(monkeypatch):
+    revoked = RevocationSet(capacity=100)
+    monkeypatch.setattr(common_jwt, 'revoked_tokens', revoked)
+    token = generate_token('u-1', 'alice', 'student')
+    claims = decode_token(token)
+    revoked.add(claims['jti'], claims['exp'])
+    with pytest.raises(TokenRevokedError):
+        decode_token(token)
+    assert decode_token(generate_token('u-1', 'alice', 'student'))['username'] == 'alice'
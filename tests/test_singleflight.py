@@ -0,0 +1,152 @@
+"""
+SingleFlight / AsyncSingleFlight: concurrent callers with the same key share one
+call, its exception reaches every waiter, and nothing is kept once it completes.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from common_singleflight import AsyncSingleFlight, SingleFlight
+
+CALLERS = 8
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_threads(flight, fn):
+    """CALLERS threads calling flight.do('key', fn) at once; returns each one's result or exception"""
+    outcomes = [None] * CALLERS
+
+    def caller(i):
+        try:
+            outcomes[i] = flight.do('key', fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = []
+
+    def load():
+        executions.append(1)
+        release.wait()
+        return {'courses': 3}
+
+    threads, outcomes = run_threads(flight, load)
+    wait_for(lambda: flight.stats()['calls'] == CALLERS)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(executions) == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert flight.stats()['coalesced'] == CALLERS - 1
+    assert flight._calls == {}
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def load():
+        release.wait()
+        raise ValueError('database down')
+
+    threads, outcomes = run_threads(flight, load)
+    wait_for(lambda: flight.stats()['calls'] == CALLERS)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert flight.stats()['executions'] == 1
+    # Failures are not kept either
+    assert flight.do('key', lambda: 'retried') == 'retried'
+
+
+async def start_callers(flight, fn):
+    tasks = [asyncio.ensure_future(flight.do('key', fn)) for _ in range(CALLERS)]
+    while flight.stats()['calls'] < CALLERS:
+        await asyncio.sleep(0)
+    return tasks
+
+
+def test_async_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        executions = []
+
+        async def load():
+            executions.append(1)
+            await release.wait()
+            return {'courses': 3}
+
+        tasks = await start_callers(flight, load)
+        release.set()
+        results = await asyncio.gather(*tasks)
+        assert len(executions) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.stats()['coalesced'] == CALLERS - 1
+        # Removed before the result was returned, not by a later callback
+        assert flight._calls == {}
+
+    asyncio.run(scenario())
+
+
+def test_async_exception_reaches_every_caller():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+
+        async def load():
+            await release.wait()
+            raise ValueError('database down')
+
+        tasks = await start_callers(flight, load)
+        release.set()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert flight.stats()['executions'] == 1
+        assert flight._calls == {}
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize('cancelled', [0, CALLERS - 1], ids=['leader', 'follower'])
+def test_async_cancelled_caller_does_not_cancel_the_call(cancelled):
+    async def scenario():
+        flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        finished = []
+
+        async def load():
+            await release.wait()
+            finished.append(1)
+            return 'catalog'
+
+        tasks = await start_callers(flight, load)
+        tasks[cancelled].cancel()
+        await asyncio.sleep(0)
+        release.set()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        assert isinstance(outcomes.pop(cancelled), asyncio.CancelledError)
+        assert outcomes == ['catalog'] * (CALLERS - 1)
+        assert finished == [1]
+        assert flight._calls == {}
+
+    asyncio.run(scenario())